@@ -1,55 +1,72 @@
 import os
 from flask import Flask, session
-from dotenv import load_dotenv
 from app.extensions import db, migrate, login_manager, mail  # ✅ ADDED mail
-import os
-basedir = os.path.abspath(os.path.dirname(__file__))
-from app.routes.dashboard import dash_bp
 
-# Load environment variables from .env file
-load_dotenv()
 
-def create_app():
+def create_app(config=None):
     """
     Factory function to create and configure the Flask application.
+    Settings come from config.Config (read from the environment / .env)
+    unless another config object is passed in.
+
+    Blueprints and optional clients are imported here rather than at module
+    level, so importing `app` (e.g. for a CLI job) stays cheap.
     """
     app = Flask(__name__, template_folder='templates', static_folder='static')
 
     # Application Configuration
-    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'a_very_secret_key_for_dev')
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///travelbuddy.db')
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['OPENROUTER_API_KEY'] = os.getenv("OPENROUTER_API_KEY")
-    app.config['OPENWEATHER_API_KEY'] = os.getenv("OPENWEATHER_API_KEY") 
-    app.config['UPLOAD_FOLDER'] = os.path.join(basedir, 'app', 'static', 'images', 'profiles')
-
-    # Gmail SMTP settings (from .env)
-    app.config['MAIL_SERVER'] = os.getenv("MAIL_SERVER", "smtp.gmail.com")
-    app.config['MAIL_PORT'] = int(os.getenv("MAIL_PORT", 587))
-    app.config['MAIL_USE_TLS'] = True
-    app.config['MAIL_USE_SSL'] = False
-    app.config['MAIL_USERNAME'] = os.getenv("MAIL_USERNAME")
-    app.config['MAIL_PASSWORD'] = os.getenv("MAIL_PASSWORD")
-    app.config['MAIL_DEFAULT_SENDER'] = (
-        "TravelBuddy SOS",
-        os.getenv("MAIL_USERNAME")
-)
-
-    # Configure UPLOAD_FOLDER for file uploads (e.g., trip documents, profile pictures)
-    UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
-    os.makedirs(UPLOAD_FOLDER, exist_ok=True) 
-    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    if config is None:
+        from config import Config
+        config = Config()
+    app.config.from_object(config)
+
+    from app import logs
+    logs.init_app(app)
+    app.config['DOCUMENT_STORAGE_ROOT'] = app.config['DOCUMENT_STORAGE_ROOT'] or os.path.join(app.instance_path, 'documents')
+    app.config['ASSET_BUILD_DIR'] = app.config['ASSET_BUILD_DIR'] or os.path.join(app.static_folder, 'dist')
+    app.config['LOCATION_ARCHIVE_DIR'] = app.config['LOCATION_ARCHIVE_DIR'] or os.path.join(app.instance_path, 'location_archive')
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+    from app.storage import UploadRequest
+    app.request_class = UploadRequest
 
     # Initialize Flask extensions with the app
     db.init_app(app)
-    migrate.init_app(app, db)
+    from app.database import configure_engine
+    configure_engine(app)
+    from app.metrics import metrics
+    metrics.init_app(app)
+    migrate.init_app(app, db, directory=os.path.join(os.path.dirname(app.root_path), 'migrations'))
     login_manager.init_app(app)
     mail.init_app(app)  # ✅ ADDED THIS LINE - EMAILS NOW WORK!
 
+    from app.weather_cache import weather_cache
+    weather_cache.init_app(app)
+
+    from app.utils import llm_breaker
+    llm_breaker.configure(
+        failure_threshold=app.config['LLM_BREAKER_FAILURE_THRESHOLD'],
+        window_size=app.config['LLM_BREAKER_WINDOW'],
+        min_calls=app.config['LLM_BREAKER_MIN_CALLS'],
+        open_seconds=app.config['LLM_BREAKER_OPEN_SECONDS'],
+        half_open_max_calls=app.config['LLM_BREAKER_HALF_OPEN_CALLS']
+    )
+
+    from app.passwords import password_hasher
+    password_hasher.init_app(app)
+
+    from app.identity_cache import identity_cache
+    identity_cache.init_app(app)
+
+    from app.trajectory import trajectory
+    trajectory.init_app(app)
+
+    from app.positions import positions
+    positions.init_app(app)
+
     @login_manager.user_loader
     def load_user(user_id):
-        from app.models import User
-        return User.query.get(int(user_id))
+        return identity_cache.load(int(user_id))
 
     # Import blueprints for routes
     from app.routes.auth import auth_bp
@@ -58,6 +75,7 @@ def create_app():
     from app.routes.trips import trips_bp
     from app.routes.main import main_bp
     from app.routes.safety import safety_bp
+    from app.routes.authority import authority_api_bp
     # Register Blueprints
 
     app.register_blueprint(safety_bp, url_prefix='/safety')
@@ -66,10 +84,23 @@ def create_app():
     app.register_blueprint(destination_bp, url_prefix='/destination')
     app.register_blueprint(trips_bp, url_prefix='/trips') 
     app.register_blueprint(main_bp)
+    app.register_blueprint(authority_api_bp, url_prefix='/authority/api')
     
     
 
 
+    from app.cli import register_cli
+    register_cli(app)
+
+    from app.assets import asset_manifest
+    asset_manifest.init_app(app)
+
+    from app.compression import compress
+    compress.init_app(app)
+
+    from app.images import profile_image_url
+    app.add_template_global(profile_image_url)
+
     @app.context_processor
     def inject_user_and_session():
         from flask_login import current_user
@@ -0,0 +1,197 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import tempfile
+
+from flask import current_app, request, send_from_directory, url_for, abort
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip siblings are always written
+    brotli = None
+
+# --------------------------------------------------
+# FINGERPRINTED STATIC ASSETS (`flask build-assets`)
+# --------------------------------------------------
+# The build copies every file under app/static to <name>.<hash><ext> in the
+# asset build folder, next to .gz and .br siblings for text formats, and
+# records the mapping in manifest.json. asset_url() resolves through the
+# manifest, and /assets/ serves the best precompressed sibling the client
+# accepts with a one-year immutable Cache-Control, so repeat page loads do
+# not request static files at all. Without a build, asset_url() falls back
+# to the regular /static URL.
+#
+# A build is written to a temporary sibling of the build folder and swapped
+# in when complete. The build folder must lie inside the static folder (or
+# be explicitly allowed elsewhere) and must not contain it, since its old
+# contents are deleted.
+
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 10
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+MIN_COMPRESS_SIZE = 256
+ONE_YEAR = 31536000
+
+
+def _compressible(path):
+    content_type = mimetypes.guess_type(path)[0] or ''
+    return content_type.startswith(COMPRESSIBLE_TYPES) and os.path.getsize(path) >= MIN_COMPRESS_SIZE
+
+
+def _write_if_smaller(path, data, original_size):
+    if len(data) < original_size:
+        with open(path, 'wb') as f:
+            f.write(data)
+        return True
+    return False
+
+
+class AssetBuildError(ValueError):
+    """Raised when the build folder is not a safe place to write (and delete) a build."""
+
+
+def check_build_dir(static_folder, build_dir, allow_outside=False):
+    """Raises AssetBuildError unless `build_dir` can be replaced by a build of `static_folder`."""
+    static = os.path.realpath(static_folder)
+    build = os.path.realpath(build_dir)
+    common = os.path.commonpath([static, build])
+    if common == build:
+        raise AssetBuildError(f"Build folder {build_dir} is or contains the static folder {static_folder}")
+    if common != static and not allow_outside:
+        raise AssetBuildError(f"Build folder {build_dir} is outside the static folder {static_folder}; "
+                              f"pass --allow-outside to build there anyway")
+    if (os.path.isdir(build) and os.listdir(build)
+            and not os.path.isfile(os.path.join(build, MANIFEST_NAME))):
+        raise AssetBuildError(f"Build folder {build_dir} is not empty and holds no previous build")
+
+
+def _swap_in(new_dir, build_dir, prefix):
+    """Replaces `build_dir` with `new_dir` (same parent), then deletes the old build."""
+    old_dir = None
+    if os.path.isdir(build_dir):
+        old_dir = os.path.join(os.path.dirname(build_dir), f"{prefix}old-{os.getpid()}")
+        shutil.rmtree(old_dir, ignore_errors=True)
+        os.rename(build_dir, old_dir)
+    os.rename(new_dir, build_dir)
+    if old_dir:
+        shutil.rmtree(old_dir)
+
+
+def build_assets(static_folder, build_dir, allow_outside=False):
+    """
+    Writes hashed copies (plus .gz/.br siblings) of every static file into
+    `build_dir` and returns the manifest {source path: hashed path}. See
+    check_build_dir for the folders it refuses.
+    """
+    check_build_dir(static_folder, build_dir, allow_outside)
+    build_dir = os.path.realpath(build_dir)
+    parent = os.path.dirname(build_dir)
+    prefix = f".{os.path.basename(build_dir)}-"
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=prefix + 'new-', dir=parent)
+    try:
+        os.chmod(staging, 0o755)  # mkdtemp makes it private to the builder
+        manifest = _write_build(static_folder, staging, build_dir, prefix)
+        _swap_in(staging, build_dir, prefix)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
+
+
+def _write_build(static_folder, out_dir, build_dir, prefix):
+    manifest = {}
+    for dirpath, dirnames, filenames in os.walk(static_folder):
+        # Do not pick up the build folder, or its staging siblings, inside the static folder
+        dirnames[:] = [d for d in dirnames
+                       if os.path.realpath(os.path.join(dirpath, d)) != build_dir and not d.startswith(prefix)]
+        for filename in sorted(filenames):
+            source = os.path.join(dirpath, filename)
+            logical = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+            stem, ext = os.path.splitext(logical)
+            hashed = f"{stem}.{digest}{ext}"
+
+            target = os.path.join(out_dir, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+            if _compressible(source):
+                _write_if_smaller(target + '.gz', gzip.compress(data, compresslevel=9, mtime=0), len(data))
+                if brotli is not None:
+                    _write_if_smaller(target + '.br', brotli.compress(data, quality=11), len(data))
+            manifest[logical] = hashed
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class AssetManifest:
+    def __init__(self):
+        self.build_dir = None
+        self.entries = {}
+        self._mtime = None
+
+    def init_app(self, app):
+        self.build_dir = app.config['ASSET_BUILD_DIR']
+        self.reload()
+        app.add_url_rule('/assets/<path:filename>', endpoint='assets', view_func=serve_asset)
+        app.add_template_global(asset_url)
+
+    def reload(self):
+        """(Re)reads manifest.json if it changed; a missing manifest means no build."""
+        path = os.path.join(self.build_dir, MANIFEST_NAME)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            self.entries, self._mtime = {}, None
+            return
+        if mtime != self._mtime:
+            with open(path) as f:
+                self.entries = json.load(f)
+            self._mtime = mtime
+
+    def lookup(self, filename):
+        if current_app.debug:
+            self.reload()
+        return self.entries.get(filename)
+
+
+asset_manifest = AssetManifest()
+
+
+def asset_url(filename):
+    """url_for('static', ...) replacement that resolves to the fingerprinted build when present."""
+    hashed = asset_manifest.lookup(filename)
+    if hashed is None:
+        return url_for('static', filename=filename)
+    return url_for('assets', filename=hashed)
+
+
+def serve_asset(filename):
+    """Serves a fingerprinted asset, preferring a precompressed sibling the client accepts."""
+    build_dir = asset_manifest.build_dir
+    if filename.endswith(('.gz', '.br')) or filename == MANIFEST_NAME:
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    accepted = request.accept_encodings
+    served, encoding = filename, None
+    for suffix, name in (('.br', 'br'), ('.gz', 'gzip')):
+        if accepted[name] and os.path.isfile(os.path.join(build_dir, filename + suffix)):
+            served, encoding = filename + suffix, name
+            break
+
+    response = send_from_directory(build_dir, served, mimetype=mimetype, max_age=ONE_YEAR)
+    if encoding:
+        response.content_encoding = encoding
+        del response.headers['Content-Disposition']
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
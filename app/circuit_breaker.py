@@ -0,0 +1,165 @@
+import threading
+import time
+from collections import deque
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker for an upstream dependency.
+
+    Outcomes of the last `window_size` calls are kept in a rolling window.
+    Once at least `min_calls` outcomes are recorded and the failure rate
+    reaches `failure_threshold`, the breaker opens and rejects calls for
+    `open_seconds`. After that it lets `half_open_max_calls` probe calls
+    through: a successful probe closes the breaker, a failed one re-opens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=0.5, window_size=20, min_calls=5,
+                 open_seconds=30.0, half_open_max_calls=1):
+        self.name = name
+        self._lock = threading.Lock()
+        self.configure(
+            failure_threshold=failure_threshold,
+            window_size=window_size,
+            min_calls=min_calls,
+            open_seconds=open_seconds,
+            half_open_max_calls=half_open_max_calls
+        )
+        self._reset_counters()
+
+    def configure(self, failure_threshold=None, window_size=None, min_calls=None,
+                  open_seconds=None, half_open_max_calls=None):
+        """Updates the tuning parameters; unspecified values are kept."""
+        with self._lock:
+            if failure_threshold is not None:
+                self.failure_threshold = float(failure_threshold)
+            if window_size is not None:
+                self.window_size = int(window_size)
+                old = list(getattr(self, '_window', []))
+                self._window = deque(old[-self.window_size:], maxlen=self.window_size)
+            if min_calls is not None:
+                self.min_calls = int(min_calls)
+            if open_seconds is not None:
+                self.open_seconds = float(open_seconds)
+            if half_open_max_calls is not None:
+                self.half_open_max_calls = int(half_open_max_calls)
+
+    def _reset_counters(self):
+        self._state = self.CLOSED
+        self._opened_at = None
+        self._half_open_in_flight = 0
+        self._window.clear()
+        self.total_calls = 0
+        self.total_failures = 0
+        self.total_timeouts = 0
+        self.total_rejected = 0
+        self.times_opened = 0
+
+    def reset(self):
+        """Closes the breaker and clears all counters."""
+        with self._lock:
+            self._reset_counters()
+
+    # --------------------------------------------------
+    # STATE
+    # --------------------------------------------------
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._half_open_in_flight = 0
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._half_open_in_flight = 0
+        self.times_opened += 1
+
+    def _failure_rate(self):
+        if not self._window:
+            return 0.0
+        return self._window.count(False) / len(self._window)
+
+    # --------------------------------------------------
+    # CALL PROTOCOL
+    # --------------------------------------------------
+    def before_call(self):
+        """
+        Reserves a slot for a call, raising CircuitOpenError if the breaker
+        is open or all half-open probe slots are taken.
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.OPEN:
+                self.total_rejected += 1
+                raise CircuitOpenError(f"{self.name} circuit is open")
+            if self._state == self.HALF_OPEN:
+                if self._half_open_in_flight >= self.half_open_max_calls:
+                    self.total_rejected += 1
+                    raise CircuitOpenError(f"{self.name} circuit is half-open, probe in progress")
+                self._half_open_in_flight += 1
+            self.total_calls += 1
+
+    def record_success(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._half_open_in_flight = 0
+                self._window.clear()
+            self._window.append(True)
+
+    def record_failure(self, timeout=False):
+        with self._lock:
+            self.total_failures += 1
+            if timeout:
+                self.total_timeouts += 1
+            if self._state == self.HALF_OPEN:
+                self._open()
+                return
+            self._window.append(False)
+            if (self._state == self.CLOSED
+                    and len(self._window) >= self.min_calls
+                    and self._failure_rate() >= self.failure_threshold):
+                self._open()
+
+    def release(self):
+        """Frees a half-open slot for a call that ended without an outcome."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._half_open_in_flight > 0:
+                self._half_open_in_flight -= 1
+
+    # --------------------------------------------------
+    # METRICS
+    # --------------------------------------------------
+    def snapshot(self):
+        """Returns the breaker state and counters as a JSON-serializable dict."""
+        with self._lock:
+            self._maybe_half_open()
+            retry_in = None
+            if self._state == self.OPEN:
+                retry_in = max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+            return {
+                'name': self.name,
+                'state': self._state,
+                'failure_rate': round(self._failure_rate(), 4),
+                'window_calls': len(self._window),
+                'total_calls': self.total_calls,
+                'total_failures': self.total_failures,
+                'total_timeouts': self.total_timeouts,
+                'total_rejected': self.total_rejected,
+                'times_opened': self.times_opened,
+                'retry_in_seconds': round(retry_in, 2) if retry_in is not None else None,
+            }
@@ -0,0 +1,163 @@
+import json
+import os
+import sys
+import time
+
+import click
+
+
+def register_cli(app):
+    """Registers the `flask` maintenance and scheduled-job commands."""
+
+    @app.cli.command('init-db')
+    def init_db():
+        """Create the database tables or apply pending migrations."""
+        from app.database import upgrade_database
+        from app.extensions import db
+
+        upgrade_database()
+        click.echo(f"Tables ready in {db.engine.url.render_as_string(hide_password=True)}")
+
+    @app.cli.command('serve')
+    @click.option('--profile', type=click.Choice(['cpu', 'threads', 'io']),
+                  help='Worker model (default: SERVE_PROFILE or threads). See gunicorn.conf.py.')
+    @click.option('--bind', help='Address to listen on (default: BIND or 0.0.0.0:$PORT).')
+    @click.option('--workers', type=int, help='Worker processes (default: sized from the CPU count).')
+    def serve(profile, bind, workers):
+        """Run the production server (gunicorn with gunicorn.conf.py)."""
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            raise click.ClickException("gunicorn is not installed: pip install gunicorn (and gevent for --profile io)")
+
+        project_root = os.path.dirname(app.root_path)
+        if profile:
+            os.environ['SERVE_PROFILE'] = profile
+        if bind:
+            os.environ['BIND'] = bind
+        if workers:
+            os.environ['WEB_CONCURRENCY'] = str(workers)
+        os.execvp(sys.executable, [
+            sys.executable, '-m', 'gunicorn',
+            '--chdir', project_root,
+            '--config', os.path.join(project_root, 'gunicorn.conf.py'),
+            'wsgi:app',
+        ])
+
+    @app.cli.command('prefetch-weather')
+    @click.option('--days', default=3, show_default=True, help='Warm destinations of trips starting within this many days.')
+    @click.option('--workers', default=4, show_default=True, help='Parallel OpenWeather requests.')
+    @click.option('--rate', default=5.0, show_default=True, help='Maximum OpenWeather requests per second.')
+    @click.option('--every', default=0, help='Repeat every N minutes instead of running once (for a job process).')
+    def prefetch_weather(days, workers, rate, every):
+        """Warm the weather cache for upcoming trips (schedule via cron or --every)."""
+        from app.weather_prefetch import prefetch_upcoming_trip_weather
+
+        while True:
+            report = prefetch_upcoming_trip_weather(days=days, workers=workers, rate=rate)
+            click.echo(json.dumps(report))
+            if not every:
+                break
+            time.sleep(every * 60)
+
+    @app.cli.command('import-tourists')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--chunk-size', default=200, show_default=True, help='Rows inserted per transaction.')
+    @click.option('--no-email', is_flag=True, help='Skip the welcome emails.')
+    def import_tourists_command(path, chunk_size, no_email):
+        """Bulk-register a tour group from a CSV or JSONL file."""
+        from app.tourist_import import read_rows, import_tourists
+
+        report = import_tourists(read_rows(path), chunk_size=chunk_size, send_emails=not no_email)
+        click.echo(json.dumps(report.as_dict(), indent=2))
+
+    @app.cli.command('location-retention')
+    @click.option('--full-days', type=int, help='Keep every fix this many days (default: LOCATION_FULL_RESOLUTION_DAYS).')
+    @click.option('--downsample-minutes', type=int,
+                  help='Then keep one fix per user per this many minutes (default: LOCATION_DOWNSAMPLE_MINUTES; 0 = off).')
+    @click.option('--archive-days', type=int,
+                  help='Archive and delete fixes older than this (default: LOCATION_ARCHIVE_AFTER_DAYS; 0 = never).')
+    @click.option('--batch-size', type=int, help='Rows per transaction (default: LOCATION_RETENTION_BATCH).')
+    @click.option('--pause-ms', default=0, show_default=True, help='Sleep between batches to leave room for ingest.')
+    @click.option('--dry-run', is_flag=True, help='Count what would be archived and deleted without changing anything.')
+    @click.option('--every', default=0, help='Repeat every N minutes instead of running once (for a job process).')
+    def location_retention(full_days, downsample_minutes, archive_days, batch_size, pause_ms, dry_run, every):
+        """Downsample and archive old LocationHistory rows in small transactions."""
+        from app.retention import run_retention
+
+        config = app.config
+        while True:
+            try:
+                report = run_retention(
+                    full_days=config['LOCATION_FULL_RESOLUTION_DAYS'] if full_days is None else full_days,
+                    downsample_minutes=(config['LOCATION_DOWNSAMPLE_MINUTES']
+                                        if downsample_minutes is None else downsample_minutes),
+                    archive_days=config['LOCATION_ARCHIVE_AFTER_DAYS'] if archive_days is None else archive_days,
+                    archive_dir=config['LOCATION_ARCHIVE_DIR'],
+                    batch_size=batch_size or config['LOCATION_RETENTION_BATCH'],
+                    pause=pause_ms / 1000,
+                    dry_run=dry_run,
+                )
+            except ValueError as e:
+                raise click.ClickException(str(e))
+            click.echo(json.dumps(report.as_dict(), indent=2))
+            if not every:
+                break
+            time.sleep(every * 60)
+
+    @app.cli.command('export')
+    @click.argument('kind', type=click.Choice(['locations', 'safety_alerts', 'sos_alerts', 'incidents']))
+    @click.option('--format', 'fmt', type=click.Choice(['ndjson', 'csv']), default='ndjson', show_default=True)
+    @click.option('--gzip', 'compress', is_flag=True, help='Gzip the output.')
+    @click.option('--user-id', type=int, help='Only this tourist.')
+    @click.option('--since', help='From this ISO date or datetime (inclusive).')
+    @click.option('--until', help='Up to this ISO date or datetime (exclusive).')
+    @click.option('--geofence', type=int, help='Only rows inside this geofence.')
+    @click.option('--bbox', help="Only rows inside 'min_lat,min_lng,max_lat,max_lng'.")
+    @click.option('--output', '-o', type=click.Path(dir_okay=False), help='Write here instead of stdout.')
+    def export_command(kind, fmt, compress, user_id, since, until, geofence, bbox, output):
+        """Stream location history, alerts or incidents as NDJSON or CSV."""
+        from app.exports import ExportError, parse_time, resolve_zone, stream_export
+
+        try:
+            pieces = stream_export(kind, fmt, compress, user_id=user_id,
+                                   since=parse_time(since, '--since'), until=parse_time(until, '--until'),
+                                   zone=resolve_zone(geofence, bbox))
+        except ExportError as e:
+            raise click.ClickException(str(e))
+        out = open(output, 'wb') if output else sys.stdout.buffer
+        try:
+            for piece in pieces:
+                out.write(piece)
+        finally:
+            if output:
+                out.close()
+
+    @app.cli.command('gc-documents')
+    @click.option('--grace-hours', default=24.0, show_default=True,
+                  help='Keep unreferenced blobs modified more recently than this.')
+    @click.option('--dry-run', is_flag=True, help='Count what would be deleted without deleting it.')
+    def gc_documents(grace_hours, dry_run):
+        """Delete stored trip documents that no TripDocument references any more."""
+        from app.extensions import db
+        from app.models import TripDocument
+        from app.storage import collect_garbage
+
+        referenced = set(db.session.scalars(db.select(TripDocument.sha256).distinct()))
+        report = collect_garbage(referenced, grace_seconds=grace_hours * 3600, dry_run=dry_run)
+        click.echo(json.dumps(report, indent=2))
+
+    @app.cli.command('build-assets')
+    @click.option('--allow-outside', is_flag=True, help='Allow an ASSET_BUILD_DIR outside app/static.')
+    def build_assets_command(allow_outside):
+        """Write fingerprinted, precompressed copies of app/static and their manifest."""
+        from app.assets import AssetBuildError, build_assets, brotli
+
+        build_dir = app.config['ASSET_BUILD_DIR']
+        try:
+            manifest = build_assets(app.static_folder, build_dir, allow_outside=allow_outside)
+        except AssetBuildError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Built {len(manifest)} assets into {build_dir}")
+        if brotli is None:
+            click.echo("brotli is not installed; only gzip variants were written.")
@@ -0,0 +1,168 @@
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+
+# --------------------------------------------------
+# COLUMNAR FILES (movement traces, LocationHistory archives)
+# --------------------------------------------------
+# A small append-only columnar format built on `array` and zlib, so location
+# data can be written and read in bulk without numpy or pyarrow:
+#
+#   MAGIC | u32 header length | header JSON {schema, meta}
+#   repeated row groups: b'G' | u32 group header length | {rows, sizes} | column blocks
+#   b'E'
+#
+# Every column block is one zlib-compressed little-endian array. A column is
+# described by (name, typecode[, encoding][, scale]):
+#   typecode  an `array` typecode: 'q' int64, 'd' float64, 'f' float32, 'b' int8, 'B' uint8 ...
+#   encoding  'plain', or 'delta' for slowly changing integers (timestamps, ids)
+#   scale     store round(value * scale) as an integer, e.g. 1e7 for coordinates
+#             (about 1 cm), which with delta encoding compresses far better than floats
+# Floats stored plain may be None, written as NaN and read back as None.
+
+MAGIC = b'TBCOL\x01'
+_U32 = struct.Struct('<I')
+
+
+class ColumnarError(ValueError):
+    pass
+
+
+def column(name, typecode, encoding='plain', scale=None):
+    return {'name': name, 'type': typecode, 'encoding': encoding, 'scale': scale}
+
+
+def _encode(spec, values):
+    scale = spec['scale']
+    if scale:
+        values = [round(v * scale) for v in values]
+    elif spec['type'] in 'fd':
+        values = [float('nan') if v is None else v for v in values]
+    if spec['encoding'] == 'delta':
+        values = [b - a for a, b in zip([0] + values[:-1], values)]
+    data = array(spec['type'], values)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return zlib.compress(data.tobytes(), 6)
+
+
+def _decode(spec, blob):
+    data = array(spec['type'])
+    data.frombytes(zlib.decompress(blob))
+    if sys.byteorder == 'big':
+        data.byteswap()
+    values = list(accumulate(data)) if spec['encoding'] == 'delta' else data.tolist()
+    if spec['scale']:
+        scale = spec['scale']
+        return [v / scale for v in values]
+    if spec['type'] in 'fd':
+        return [None if v != v else v for v in values]
+    return values
+
+
+class ColumnarWriter:
+    """
+    Writes row groups of columns to `path` (via a temporary file that
+    replaces `path` on close, so readers never see a half-written file).
+    """
+
+    def __init__(self, path, schema, meta=None):
+        self.path = path
+        self.schema = schema
+        self.rows = 0
+        self._tmp_path = f'{path}.tmp'
+        self._file = open(self._tmp_path, 'wb')
+        header = json.dumps({'schema': schema, 'meta': meta or {}}).encode()
+        self._file.write(MAGIC + _U32.pack(len(header)) + header)
+
+    def write(self, columns):
+        """Appends one row group; `columns` maps every column name to an equal-length sequence."""
+        lengths = {len(columns[spec['name']]) for spec in self.schema}
+        if len(lengths) != 1:
+            raise ColumnarError(f"Columns have different lengths: {sorted(lengths)}")
+        rows = lengths.pop()
+        if not rows:
+            return
+        blocks = [_encode(spec, list(columns[spec['name']])) for spec in self.schema]
+        header = json.dumps({'rows': rows, 'sizes': [len(b) for b in blocks]}).encode()
+        self._file.write(b'G' + _U32.pack(len(header)) + header)
+        for block in blocks:
+            self._file.write(block)
+        self.rows += rows
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.write(b'E')
+        self._file.flush()
+        os.fsync(self._file.fileno())  # durable before it replaces `path`
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ColumnarReader:
+    """Reads a columnar file one row group at a time."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        if self._file.read(len(MAGIC)) != MAGIC:
+            self._file.close()
+            raise ColumnarError(f"{path} is not a columnar file")
+        header = json.loads(self._read_block())
+        self.schema = header['schema']
+        self.meta = header['meta']
+
+    def _read_block(self):
+        (length,) = _U32.unpack(self._file.read(_U32.size))
+        return self._file.read(length)
+
+    def row_groups(self, names=None):
+        """Yields {name: list} per row group, decoding only the requested columns."""
+        wanted = set(names) if names else None
+        while True:
+            marker = self._file.read(1)
+            if marker in (b'E', b''):
+                return
+            if marker != b'G':
+                raise ColumnarError(f"{self.path}: corrupt row group marker {marker!r}")
+            group = json.loads(self._read_block())
+            columns = {}
+            for spec, size in zip(self.schema, group['sizes']):
+                if wanted is None or spec['name'] in wanted:
+                    columns[spec['name']] = _decode(spec, self._file.read(size))
+                else:
+                    self._file.seek(size, os.SEEK_CUR)
+            yield columns
+
+    def rows(self, names=None):
+        """Yields one tuple per row, in schema order (or in `names` order)."""
+        names = names or [spec['name'] for spec in self.schema]
+        for columns in self.row_groups(names):
+            yield from zip(*(columns[name] for name in names))
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
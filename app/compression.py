@@ -0,0 +1,107 @@
+import gzip
+import hashlib
+from functools import wraps
+
+from flask import g, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# --------------------------------------------------
+# RESPONSE COMPRESSION AND ETAGS
+# --------------------------------------------------
+# An after_request hook for buffered HTML/JSON/text responses. It gives each
+# 200 GET response a weak ETag computed from the body, answers a matching
+# If-None-Match with an empty 304, and compresses bodies above a size
+# threshold with brotli or gzip, depending on what the client accepts.
+# Streamed and file responses (send_file, direct_passthrough) are left
+# alone, as is any view decorated with @no_compress.
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 4
+DEFAULT_MIMETYPES = (
+    'text/html',
+    'text/plain',
+    'text/css',
+    'text/csv',
+    'text/javascript',
+    'application/javascript',
+    'application/json',
+    'application/geo+json',
+    'image/svg+xml',
+)
+
+
+def no_compress(view):
+    """Opts a view out of compression and ETag handling."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.skip_compression = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def body_etag(data):
+    return hashlib.blake2b(data, digest_size=12).hexdigest()
+
+
+class Compress:
+    def __init__(self):
+        self.min_size = DEFAULT_MIN_SIZE
+        self.gzip_level = DEFAULT_GZIP_LEVEL
+        self.brotli_quality = DEFAULT_BROTLI_QUALITY
+        self.mimetypes = DEFAULT_MIMETYPES
+
+    def init_app(self, app):
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE)
+        self.gzip_level = app.config.get('COMPRESS_LEVEL', DEFAULT_GZIP_LEVEL)
+        self.brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', DEFAULT_BROTLI_QUALITY)
+        self.mimetypes = tuple(app.config.get('COMPRESS_MIMETYPES') or DEFAULT_MIMETYPES)
+        app.after_request(self.after_request)
+
+    def _encoding(self):
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def after_request(self, response):
+        if (
+            g.get('skip_compression')
+            or response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in self.mimetypes
+        ):
+            return response
+
+        data = response.get_data()
+        response.vary.add('Accept-Encoding')
+        if request.method in ('GET', 'HEAD'):
+            if 'ETag' not in response.headers:
+                response.set_etag(body_etag(data), weak=True)
+            response.make_conditional(request)
+            if response.status_code == 304:
+                return response
+
+        encoding = self._encoding() if len(data) >= self.min_size else None
+        if encoding:
+            compressed = self.compress(data, encoding)
+            if len(compressed) < len(data):
+                response.set_data(compressed)
+                response.content_encoding = encoding
+        return response
+
+
+compress = Compress()
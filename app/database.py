@@ -0,0 +1,130 @@
+from functools import wraps
+
+from flask import g, has_request_context
+from sqlalchemy import event, inspect
+
+from app.extensions import db
+
+# --------------------------------------------------
+# DATABASE ENGINE TUNING
+# --------------------------------------------------
+# Pool settings come from the environment (DB_POOL_*, read in config.py), so
+# they can be sized to the worker model. SQLite gets a per-connection pragma
+# profile: WAL lets readers run alongside the single writer,
+# synchronous=NORMAL drops the fsync on every commit (still crash-safe in WAL
+# mode), and busy_timeout makes concurrent writers wait instead of failing
+# with "database is locked".
+# On PostgreSQL every transaction opened during a request runs with SET LOCAL
+# statement_timeout chosen by the route's class, so a slow report query
+# cannot hold a worker as long as an interactive page would allow.
+
+SQLITE_PROFILES = {
+    'default': {},
+    'fast': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+    },
+}
+
+# Route class of views that do not declare one (timeouts per class: config.py)
+DEFAULT_ROUTE_CLASS = 'interactive'
+
+# Migration matching the schema db.create_all() built before migrations were added
+BASELINE_REVISION = '0c5d2a9e41b7'
+
+
+def db_route_class(name):
+    """
+    Declares the class of a route ('ingest', 'interactive', 'report'),
+    which picks its PostgreSQL statement timeout.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g.db_route_class = name
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _sqlite_pragmas(app):
+    pragmas = dict(SQLITE_PROFILES.get(app.config['SQLITE_PROFILE'], {}))
+    if app.config['SQLITE_PROFILE'] != 'default':
+        pragmas['cache_size'] = -int(app.config['SQLITE_CACHE_KB'])
+        pragmas['busy_timeout'] = int(app.config['SQLITE_BUSY_TIMEOUT_MS'])
+    return pragmas
+
+
+def configure_engine(app):
+    """Attaches the SQLite pragma profile or PostgreSQL statement timeouts to the app's engine."""
+    with app.app_context():
+        engine = db.engine
+
+    if engine.dialect.name == 'sqlite':
+        pragmas = _sqlite_pragmas(app)
+        if not pragmas:
+            return
+
+        @event.listens_for(engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    elif engine.dialect.name == 'postgresql':
+        timeouts = app.config['DB_STATEMENT_TIMEOUTS']
+
+        @event.listens_for(engine, 'begin')
+        def set_statement_timeout(connection):
+            if not has_request_context():
+                return  # CLI jobs and background work run without a limit
+            ms = timeouts.get(g.get('db_route_class', DEFAULT_ROUTE_CLASS), 0)
+            if ms:
+                connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(ms)}")
+
+
+def upgrade_database():
+    """
+    Brings the schema up to date (`flask init-db`). An empty database gets
+    every table from the models and is stamped at the latest migration. A
+    database created before migrations were added is stamped at the
+    baseline, then pending migrations run. Tables added to the models
+    without a migration of their own are created last.
+    """
+    from flask_migrate import stamp, upgrade
+
+    inspector = inspect(db.engine)
+    if not inspector.get_table_names():
+        db.create_all()
+        stamp()
+        return
+    if not inspector.has_table('alembic_version'):
+        stamp(revision=BASELINE_REVISION)
+    upgrade()
+    db.create_all()
+
+
+def upsert(table, rows, conflict_columns, update_columns):
+    """
+    One INSERT ... ON CONFLICT (conflict_columns) DO UPDATE statement for
+    `rows` (a dict or a list of dicts), on SQLite and PostgreSQL. Unlike
+    query-then-insert, concurrent writers for the same key cannot fail on
+    the unique constraint.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f"upsert is not supported on {dialect}")
+
+    table = getattr(table, '__table__', table)
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=conflict_columns,
+        set_={name: statement.excluded[name] for name in update_columns},
+    )
+    return db.session.execute(statement, rows)
@@ -0,0 +1,183 @@
+import csv
+import io
+import json
+import math
+import zlib
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import GeoFence, IncidentReport, LocationHistory, SafetyAlert, SOSAlert
+
+# --------------------------------------------------
+# STREAMING EXPORTS (authority API and `flask export`)
+# --------------------------------------------------
+# Investigations export LocationHistory, SafetyAlert, SOSAlert and
+# IncidentReport rows for a tourist, a zone and/or a time range. Rows are
+# fetched in yield_per chunks (a server-side cursor on PostgreSQL), encoded
+# one at a time to NDJSON or CSV, gathered into ~64 KiB pieces and, if
+# asked, gzip-compressed incrementally, so memory stays flat however many
+# rows match.
+#
+# A zone is a GeoFence id (a circle) or a bounding box. The database
+# filters on the enclosing box; the circle is checked per row.
+
+CHUNK_ROWS = 2000
+PIECE_BYTES = 64 * 1024
+METRES_PER_DEGREE = 111320
+
+# kind -> (model, time column, latitude column, longitude column)
+EXPORTS = {
+    'locations': (LocationHistory, 'timestamp', 'latitude', 'longitude'),
+    'safety_alerts': (SafetyAlert, 'timestamp', 'latitude', 'longitude'),
+    'sos_alerts': (SOSAlert, 'timestamp', 'location_lat', 'location_lng'),
+    'incidents': (IncidentReport, 'incident_datetime', 'incident_latitude', 'incident_longitude'),
+}
+FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+class ExportError(ValueError):
+    """Invalid export parameters."""
+
+
+class Zone:
+    """A bounding box, optionally with a circle inside it that rows must fall in."""
+
+    def __init__(self, min_lat, min_lng, max_lat, max_lng, centre=None, radius=None):
+        self.min_lat, self.min_lng, self.max_lat, self.max_lng = min_lat, min_lng, max_lat, max_lng
+        self.centre = centre
+        self.radius = radius
+
+    @classmethod
+    def from_geofence(cls, geofence):
+        lat, lng, radius = geofence.center_latitude, geofence.center_longitude, geofence.radius
+        dlat = radius / METRES_PER_DEGREE
+        dlng = radius / (METRES_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        return cls(lat - dlat, lng - dlng, lat + dlat, lng + dlng, centre=(lat, lng), radius=radius)
+
+    @classmethod
+    def from_bbox(cls, spec):
+        """'min_lat,min_lng,max_lat,max_lng'."""
+        try:
+            min_lat, min_lng, max_lat, max_lng = (float(v) for v in spec.split(','))
+        except ValueError:
+            raise ExportError("bbox must be 'min_lat,min_lng,max_lat,max_lng'")
+        return cls(min_lat, min_lng, max_lat, max_lng)
+
+    def contains(self, lat, lng):
+        if self.centre is None:
+            return True
+        from app.routes.safety import calculate_distance
+        return calculate_distance(self.centre[0], self.centre[1], lat, lng) <= self.radius
+
+
+def parse_time(value, name):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ExportError(f"{name} must be an ISO date or datetime, e.g. 2025-03-01T08:00")
+
+
+def resolve_zone(geofence_id=None, bbox=None):
+    if geofence_id:
+        geofence = db.session.get(GeoFence, int(geofence_id))
+        if geofence is None:
+            raise ExportError(f"No geofence {geofence_id}")
+        return Zone.from_geofence(geofence)
+    if bbox:
+        return Zone.from_bbox(bbox)
+    return None
+
+
+def export_query(kind, user_id=None, since=None, until=None, zone=None):
+    """(column names, select) for one export kind, in id order."""
+    if kind not in EXPORTS:
+        raise ExportError(f"Unknown export '{kind}'; choose from {', '.join(EXPORTS)}")
+    model, time_column, lat_column, lng_column = EXPORTS[kind]
+    table = model.__table__
+    query = select(table).order_by(table.c.id)
+    if user_id is not None:
+        query = query.where(table.c.user_id == user_id)
+    if since is not None:
+        query = query.where(table.c[time_column] >= since)
+    if until is not None:
+        query = query.where(table.c[time_column] < until)
+    if zone is not None:
+        query = query.where(table.c[lat_column].between(zone.min_lat, zone.max_lat),
+                            table.c[lng_column].between(zone.min_lng, zone.max_lng))
+    return [column.name for column in table.columns], query
+
+
+def iter_rows(kind, query, zone=None, chunk_rows=CHUNK_ROWS):
+    """Yields row tuples, fetching `chunk_rows` at a time."""
+    _, _, lat_column, lng_column = EXPORTS[kind]
+    result = db.session.execute(query.execution_options(yield_per=chunk_rows))
+    if zone is None or zone.centre is None:
+        yield from result
+        return
+    keys = list(result.keys())
+    lat_index, lng_index = keys.index(lat_column), keys.index(lng_column)
+    for row in result:
+        if zone.contains(row[lat_index], row[lng_index]):
+            yield row
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def encode_ndjson(columns, rows):
+    """Yields str pieces of one JSON object per line."""
+    encode = json.JSONEncoder(default=str, ensure_ascii=False).encode  # json.dumps(**kwargs) builds one per call
+    parts, size = [], 0
+    for row in rows:
+        line = encode(dict(zip(columns, map(_json_value, row)))) + '\n'
+        parts.append(line)
+        size += len(line)
+        if size >= PIECE_BYTES:
+            yield ''.join(parts)
+            parts, size = [], 0
+    if parts:
+        yield ''.join(parts)
+
+
+def encode_csv(columns, rows):
+    """Yields str pieces of a CSV file with a header row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(['' if value is None else _json_value(value) for value in row])
+        if buffer.tell() >= PIECE_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def gzip_pieces(pieces, level=6):
+    """Compresses bytes pieces into a gzip stream as they come."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip header and trailer
+    for piece in pieces:
+        data = compressor.compress(piece)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(kind, fmt='ndjson', compress=False, user_id=None, since=None, until=None, zone=None,
+                  chunk_rows=CHUNK_ROWS):
+    """Yields the encoded export as bytes pieces."""
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown format '{fmt}'; choose from {', '.join(FORMATS)}")
+    columns, query = export_query(kind, user_id=user_id, since=since, until=until, zone=zone)
+    encode = encode_ndjson if fmt == 'ndjson' else encode_csv
+    pieces = (piece.encode('utf-8') for piece in encode(columns, iter_rows(kind, query, zone, chunk_rows)))
+    return gzip_pieces(pieces) if compress else pieces
+
+
+def export_filename(kind, fmt, compress):
+    return f"{kind}-{datetime.utcnow():%Y%m%dT%H%M%S}.{fmt}{'.gz' if compress else ''}"
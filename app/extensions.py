@@ -1,11 +1,45 @@
+import click
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_mail import Mail
 
+
+class LazyMigrate:
+    """
+    Stand-in for flask_migrate.Migrate. Flask-Migrate pulls in alembic,
+    which costs about 100 ms at start-up but is only used by the `flask db`
+    commands, so the real extension is set up the first time they ask for it.
+    """
+
+    def init_app(self, app, db=None, **kwargs):
+        app.extensions['migrate'] = _PendingMigrate(app, db, kwargs)
+        app.cli.add_command(_LazyMigrateCommands('db', help='Perform database migrations.'))
+
+
+class _PendingMigrate:
+    def __init__(self, app, db, kwargs):
+        self._setup = (app, db, kwargs)
+
+    def __getattr__(self, name):
+        from flask_migrate import Migrate
+
+        app, db, kwargs = self._setup
+        Migrate(app, db, **kwargs)  # replaces app.extensions['migrate']
+        return getattr(app.extensions['migrate'], name)
+
+
+class _LazyMigrateCommands(click.Group):
+    """`flask db` placeholder that hands over to Flask-Migrate's command group when run."""
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        from flask_migrate.cli import db as db_cli_group
+
+        return db_cli_group.make_context(info_name, args, parent=parent, **extra)
+
+
 # Create extension instances
 db = SQLAlchemy()
-migrate = Migrate()
+migrate = LazyMigrate()
 login_manager = LoginManager()
 login_manager.login_view = 'main_bp.login'
 mail = Mail()
@@ -0,0 +1,152 @@
+import threading
+import time
+from types import MappingProxyType
+
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.extensions import db
+from app.models import User
+
+# --------------------------------------------------
+# IDENTITY CACHE FOR login_manager.user_loader
+# --------------------------------------------------
+# Flask-Login reloads the user on every authenticated request, including the
+# high-frequency location_update pings. The loader keeps a read-only snapshot
+# of the user's columns per process for a short TTL, and routes only hit the
+# database when they touch something outside the snapshot (relationships,
+# methods) or assign to the user. Any flushed change to a User row drops its
+# snapshot, so profile, role and password edits are visible immediately in
+# this process and within the TTL in other workers.
+
+SNAPSHOT_EXCLUDE = {'password_hash'}
+
+
+def snapshot_user(user):
+    """Copies the user's column values into an immutable mapping."""
+    return MappingProxyType({
+        column.key: getattr(user, column.key)
+        for column in User.__table__.columns
+        if column.key not in SNAPSHOT_EXCLUDE
+    })
+
+
+class CachedUser(UserMixin):
+    """
+    Per-request stand-in for User backed by a cached snapshot.
+    Reading a snapshot column needs no query. Anything else, including
+    assignments, loads the real User into the current session and is
+    delegated to it from then on.
+    """
+
+    def __init__(self, snapshot, user=None):
+        object.__setattr__(self, '_snapshot', snapshot)
+        object.__setattr__(self, '_user', user)
+
+    def get_id(self):
+        return str(self._snapshot['id'])
+
+    def _load(self):
+        user = object.__getattribute__(self, '_user')
+        if user is None:
+            user = db.session.get(User, self._snapshot['id'])
+            object.__setattr__(self, '_user', user)
+        return user
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        snapshot = object.__getattribute__(self, '_snapshot')
+        if object.__getattribute__(self, '_user') is None and name in snapshot:
+            return snapshot[name]
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __repr__(self):
+        return f'<CachedUser {self._snapshot["email"]}>'
+
+
+class IdentityCache:
+    """Thread-safe per-process map of user id → (snapshot, expiry)."""
+
+    def __init__(self, ttl=30, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+        self.max_size = app.config.get('USER_CACHE_MAX_SIZE', self.max_size)
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def put(self, user_id, snapshot):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                now = time.monotonic()
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+                if len(self._entries) >= self.max_size:
+                    self._entries.clear()
+            self._entries[user_id] = (snapshot, time.monotonic() + self.ttl)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def load(self, user_id):
+        """user_loader implementation: returns a CachedUser, or None if the user is gone."""
+        snapshot = self.get(user_id)
+        if snapshot is not None:
+            return CachedUser(snapshot)
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        snapshot = snapshot_user(user)
+        self.put(user_id, snapshot)
+        return CachedUser(snapshot, user)
+
+
+identity_cache = IdentityCache()
+
+
+# --------------------------------------------------
+# INVALIDATION
+# --------------------------------------------------
+def _pending(session):
+    return session.info.setdefault('identity_cache_invalidate', set())
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    identity_cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        _pending(session).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    # Drop again after commit in case another request re-cached the
+    # pre-commit row between our flush and commit.
+    for user_id in session.info.pop('identity_cache_invalidate', ()):
+        identity_cache.invalidate(user_id)
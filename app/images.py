@@ -0,0 +1,189 @@
+import hashlib
+import importlib.util
+import io
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, url_for
+
+from app.extensions import db
+
+log = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# PROFILE IMAGE VARIANTS
+# --------------------------------------------------
+# Uploaded profile pictures are kept as-is and resized in a background
+# worker into a few fixed sizes. Variant file names carry a content hash
+# (<stem>.<variant>.<hash>.jpg), so they can be cached by browsers forever;
+# a new upload produces new names. Until the variants exist (or when Pillow
+# is not installed) profile_image_url() falls back to the original.
+
+VARIANTS = {
+    'thumbnail': 64,
+    'card': 256,
+    'full': 1024,
+}
+JPEG_QUALITY = 85
+DEFAULT_PROFILE_IMAGE = 'default.jpg'
+
+_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='profile-images')
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def shutdown(wait=True):
+    """Stops the resize worker, finishing queued jobs when `wait` is set."""
+    _pool.shutdown(wait=wait)
+
+
+def pillow_available():
+    # Pillow is optional; without it the original image is served.
+    # It is only imported by the resize worker.
+    return importlib.util.find_spec('PIL') is not None
+
+
+def profile_image_dir():
+    return current_app.config['UPLOAD_FOLDER']
+
+
+def render_variant(source, size):
+    """Returns JPEG bytes of `source` scaled to fit in size×size (never upscaled)."""
+    from PIL import Image, ImageOps
+
+    image = ImageOps.exif_transpose(source)
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    image = image.copy()
+    image.thumbnail((size, size), Image.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def build_variants(folder, filename):
+    """Writes every variant of `filename` into `folder`; returns {variant: file name}."""
+    from PIL import Image
+
+    stem = os.path.splitext(filename)[0]
+    names = {}
+    with Image.open(os.path.join(folder, filename)) as source:
+        source.load()
+        for variant, size in VARIANTS.items():
+            data = render_variant(source, size)
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            name = f"{stem}.{variant}.{digest}.jpg"
+            path = os.path.join(folder, name)
+            if not os.path.exists(path):
+                tmp_path = path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            names[variant] = name
+    return names
+
+
+def _process(app, user_id, filename):
+    from app.models import User
+
+    with app.app_context():
+        try:
+            names = build_variants(app.config['UPLOAD_FOLDER'], filename)
+        except Exception:
+            log.exception("Profile image variants failed", extra={'user_id': user_id, 'image': filename})
+            return
+        finally:
+            with _pending_lock:
+                _pending.discard(filename)
+
+        user = db.session.get(User, user_id)
+        if user is None or user.profile_image != filename:
+            # Replaced or deleted while we were resizing
+            remove_files(app.config['UPLOAD_FOLDER'], names.values())
+            return
+        user.profile_image_variants = json.dumps({'source': filename, **names})
+        db.session.commit()
+
+
+def schedule_variants(user_id, filename):
+    """Queues resizing of a freshly uploaded profile image. No-op without Pillow."""
+    if not pillow_available() or not filename or filename == DEFAULT_PROFILE_IMAGE:
+        return False
+    with _pending_lock:
+        if filename in _pending:
+            return False
+        _pending.add(filename)
+    _pool.submit(_process, current_app._get_current_object(), user_id, filename)
+    return True
+
+
+def variant_names(user):
+    """{variant: file name} for the user's current image, or {} if not generated yet."""
+    raw = getattr(user, 'profile_image_variants', None)
+    if not raw:
+        return {}
+    try:
+        names = json.loads(raw)
+    except ValueError:
+        return {}
+    if names.pop('source', None) != user.profile_image:
+        return {}
+    return names
+
+
+def remove_files(folder, names):
+    for name in names:
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def remove_profile_image(user):
+    """Deletes the user's uploaded original and its variants from disk."""
+    folder = profile_image_dir()
+    names = list(variant_names(user).values())
+    if user.profile_image and user.profile_image != DEFAULT_PROFILE_IMAGE:
+        names.append(user.profile_image)
+    remove_files(folder, names)
+
+
+def profile_image_url(user, variant='full'):
+    """
+    URL of the user's profile image at the given size. Falls back to the
+    uploaded original while variants are pending, and to the static
+    default picture when nothing was uploaded.
+    """
+    filename = getattr(user, 'profile_image', None)
+    if not filename or filename == DEFAULT_PROFILE_IMAGE:
+        return url_for('static', filename='images/profiles/' + DEFAULT_PROFILE_IMAGE)
+    name = variant_names(user).get(variant, filename)
+    return url_for('dashboard.profile_media', filename=name)
+
+
+def is_fingerprinted(filename):
+    """True for generated variant names, which never change content."""
+    parts = filename.rsplit('.', 3)
+    return len(parts) == 4 and parts[1] in VARIANTS and len(parts[2]) == 12
+
+
+def is_profile_media(filename):
+    """
+    True if `filename` is someone's current profile picture or one of its
+    variants. UPLOAD_FOLDER holds other uploads too, which must not be
+    served as profile media.
+    """
+    from app.models import User
+
+    if is_fingerprinted(filename):
+        stem = filename.rsplit('.', 3)[0]
+        users = User.query.filter(User.profile_image.startswith(stem + '.', autoescape=True))
+        return any(filename in variant_names(user).values() for user in users)
+    if filename == DEFAULT_PROFILE_IMAGE:
+        return False
+    return db.session.query(User.id).filter_by(profile_image=filename).first() is not None
@@ -0,0 +1,190 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# --------------------------------------------------
+# LOGGING (queue handler + background writer)
+# --------------------------------------------------
+# Modules log through `logging.getLogger(__name__)`, i.e. under the 'app'
+# logger (which is also Flask's app.logger). A request thread only renders
+# the message and puts the record on a bounded queue; a listener thread
+# formats it (JSON lines by default) and writes it to stderr. When the
+# queue is full, records are dropped and counted rather than blocking the
+# request.
+#
+#   LOG_LEVEL=INFO                                   level of the 'app' logger
+#   LOG_LEVELS=app.routes.dashboard=DEBUG,app.utils=WARNING
+#   LOG_SAMPLING=app.routes.dashboard=0.1            keep 10% of its DEBUG/INFO records
+#   LOG_FORMAT=json | text
+#
+# DEBUG calls use %-style arguments (or isEnabledFor for costly payloads),
+# so a disabled level costs one integer comparison. WARNING and above are
+# never sampled out.
+
+ROOT_LOGGER = 'app'
+
+# LogRecord attributes; anything else on a record came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+_lock = threading.Lock()
+_state = {'handler': None, 'formatter': None, 'listener': None, 'pid': None}
+
+
+def parse_levels(spec):
+    """'app.utils=WARNING,app.routes=DEBUG' → {'app.utils': 30, 'app.routes': 10}."""
+    levels = {}
+    for part in (spec or '').split(','):
+        if '=' in part:
+            name, level = part.split('=', 1)
+            levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+def parse_sampling(spec):
+    """'app.routes.dashboard=0.1' → {'app.routes.dashboard': 0.1}."""
+    rates = {}
+    for part in (spec or '').split(','):
+        if '=' in part:
+            name, rate = part.split('=', 1)
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, extra fields, exc."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'pid': record.process,
+            'thread': record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        extra = {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS}
+        if extra:
+            line += ' ' + ' '.join(f'{k}={v}' for k, v in extra.items())
+        return line
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of DEBUG/INFO records for the longest matching logger prefix."""
+
+    def __init__(self, rates):
+        super().__init__()
+        # Longest prefix first so 'app.routes.dashboard' wins over 'app.routes'
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        for name, rate in self.rates:
+            if record.name == name or record.name.startswith(name + '.'):
+                return rate >= 1.0 or random.random() < rate
+        return True
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Renders the message on the calling thread (arguments may change after
+    the call returns) and drops the record if the writer has fallen behind.
+    """
+
+    def __init__(self, maxsize):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            from app.metrics import metrics
+            metrics.inc('log_records_dropped_total', {})
+
+
+def init_app(app):
+    """Installs the queue handler on the 'app' logger from the LOG_* settings."""
+    logger = logging.getLogger(ROOT_LOGGER)
+    with _lock:
+        _stop_listener()
+        if _state['handler'] is not None:
+            logger.removeHandler(_state['handler'])
+
+        handler = BoundedQueueHandler(app.config['LOG_QUEUE_SIZE'])
+        handler.addFilter(SamplingFilter(parse_sampling(app.config['LOG_SAMPLING'])))
+        logger.addHandler(handler)
+        logger.setLevel(app.config['LOG_LEVEL'].upper())
+        logger.propagate = False
+        for name, level in parse_levels(app.config['LOG_LEVELS']).items():
+            logging.getLogger(name).setLevel(level)
+
+        _state['handler'] = handler
+        _state['formatter'] = JsonFormatter() if app.config['LOG_FORMAT'] == 'json' else TextFormatter()
+        _start_listener()
+
+
+def _start_listener():
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(_state['formatter'])
+    listener = QueueListener(_state['handler'].queue, output, respect_handler_level=True)
+    listener.start()
+    _state['listener'] = listener
+    _state['pid'] = os.getpid()
+
+
+def _stop_listener():
+    listener = _state['listener']
+    if listener is not None and _state['pid'] == os.getpid():
+        listener.stop()  # writes out what is still queued
+    _state['listener'] = None
+
+
+def after_fork():
+    """The writer thread does not survive fork(); start one in this process."""
+    with _lock:
+        handler = _state['handler']
+        if handler is not None and _state['pid'] != os.getpid():
+            # Fresh queue too: the parent's may have been locked mid-put at fork time
+            handler.queue = queue.Queue(handler.queue.maxsize)
+            _state['listener'] = None
+            _start_listener()
+
+
+def flush():
+    """Writes out queued records and stops the writer (worker exit, end of a CLI command)."""
+    with _lock:
+        _stop_listener()
+
+
+atexit.register(flush)
@@ -0,0 +1,339 @@
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import Response, abort, g, has_request_context, request
+from sqlalchemy import event
+
+log = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# METRICS (Prometheus text format at /metrics)
+# --------------------------------------------------
+# A small in-process registry of counters, histograms and gauges. Requests
+# record their endpoint latency and status, SQLAlchemy cursor events add SQL
+# statement count and time to the endpoint that issued them, and the
+# upstream clients (LLM, weather, email) are timed via @observe_upstream.
+# Recording is a dict update under one lock.
+#
+# With several worker processes, set METRICS_DIR (gunicorn.conf.py does):
+# every process writes its snapshot to <dir>/metrics-<pid>.json at most
+# every METRICS_FLUSH_SECONDS, and /metrics adds up all snapshots in the
+# directory. Counters of exited workers keep counting; gauges are only
+# reported for live processes.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+UPSTREAM_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BACKGROUND = 'background'
+
+HELP = {
+    'http_requests_total': ('counter', 'HTTP requests by endpoint, method and status code.'),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint.'),
+    'http_request_exceptions_total': ('counter', 'Requests that raised an unhandled exception.'),
+    'db_statements_total': ('counter', 'SQL statements executed, by endpoint.'),
+    'db_statement_seconds_total': ('counter', 'Time spent executing SQL statements, by endpoint.'),
+    'upstream_call_duration_seconds': ('histogram', 'Time spent in calls to LLM, weather and email services.'),
+    'upstream_errors_total': ('counter', 'Failed calls to LLM, weather and email services.'),
+    'llm_circuit_breaker_state': ('gauge', 'LLM circuit breaker state (1 for the current state).'),
+    'llm_circuit_breaker_opened_total': ('counter', 'Times the LLM circuit breaker opened, per process.'),
+    'log_records_dropped_total': ('counter', 'Log records dropped because the log queue was full.'),
+    'location_fixes_received_total': ('counter', 'Location fixes received by location_update.'),
+    'location_fixes_stored_total': ('counter', 'Location fixes written to LocationHistory after compression.'),
+}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.directory = None
+        self.flush_seconds = 5.0
+        self.token = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}  # key -> [bucket counts..., +Inf count, sum]
+            self._buckets = {}
+            self._last_flush = 0.0
+
+    def init_app(self, app):
+        self.directory = app.config.get('METRICS_DIR') or None
+        self.flush_seconds = float(app.config.get('METRICS_FLUSH_SECONDS', 5))
+        self.token = app.config.get('METRICS_TOKEN') or None
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+        app.before_request(_start_timer)
+        app.after_request(_record_request)
+        app.teardown_request(_record_exception)
+        app.add_url_rule('/metrics', endpoint='metrics', view_func=metrics_view)
+        with app.app_context():
+            from app.extensions import db
+            instrument_engine(db.engine)
+
+    # --------------------------------------------------
+    # RECORDING
+    # --------------------------------------------------
+    def inc(self, name, labels, amount=1.0):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        key = _key(name, labels)
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+                self._buckets[name] = buckets
+            series[bisect.bisect_left(buckets, value)] += 1
+            series[-1] += value
+
+    # --------------------------------------------------
+    # MULTIPROCESS SNAPSHOTS
+    # --------------------------------------------------
+    def snapshot(self):
+        gauges = gauge_samples()
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'counters': [[name, labels, value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, labels, list(series)] for (name, labels), series in self._histograms.items()],
+                'buckets': {name: list(b) for name, b in self._buckets.items()},
+                'gauges': gauges,
+            }
+
+    def maybe_flush(self, force=False):
+        if not self.directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_seconds:
+            return
+        if not self._flush_lock.acquire(blocking=force):
+            return  # another thread is writing this process's snapshot
+        try:
+            self._last_flush = now
+            path = os.path.join(self.directory, f'metrics-{os.getpid()}.json')
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # Metrics must never fail a request
+            log.warning("Metrics snapshot not written: %s", e)
+        finally:
+            self._flush_lock.release()
+
+    def collect(self):
+        """Snapshots of this process and, in multiprocess mode, all others."""
+        own = self.snapshot()
+        if not self.directory:
+            return [own]
+        self.maybe_flush(force=True)
+        snapshots = [own]
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if snapshot['pid'] == own['pid']:
+                continue
+            if not _pid_alive(snapshot['pid']):
+                snapshot['gauges'] = []
+            snapshots.append(snapshot)
+        return snapshots
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        counters, histograms, gauges, buckets = {}, {}, {}, {}
+        for snapshot in self.collect():
+            buckets.update(snapshot['buckets'])
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0.0) + value
+            for name, labels, series in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                total = histograms.setdefault(key, [0] * len(series))
+                for i, value in enumerate(series):
+                    total[i] += value
+            for name, labels, value in snapshot['gauges']:
+                labels = tuple(map(tuple, labels)) + (('pid', str(snapshot['pid'])),)
+                gauges[(name, labels)] = value
+
+        lines = []
+        for name in sorted({k[0] for k in counters} | {k[0] for k in histograms} | {k[0] for k in gauges}):
+            kind, help_text = HELP.get(name, ('untyped', ''))
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+            for (metric, labels), value in sorted(gauges.items()):
+                if metric == name:
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+            for (metric, labels), series in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(buckets[name]) + ['+Inf'], series[:-1]):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else _number(bound)
+                    lines.append(f'{name}_bucket{_labels(labels + (("le", le),))} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labels)} {_number(series[-1])}')
+                lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in labels) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def gauge_samples():
+    """Point-in-time values reported per process."""
+    from app.utils import llm_breaker
+
+    snapshot = llm_breaker.snapshot()
+    samples = [
+        ['llm_circuit_breaker_state', [['state', state]], 1 if snapshot['state'] == state else 0]
+        for state in (llm_breaker.CLOSED, llm_breaker.OPEN, llm_breaker.HALF_OPEN)
+    ]
+    samples.append(['llm_circuit_breaker_opened_total', [], snapshot['times_opened']])
+    return samples
+
+
+def current_endpoint():
+    if not has_request_context():
+        return BACKGROUND
+    return request.endpoint or 'unmatched'
+
+
+# --------------------------------------------------
+# REQUEST AND SQL INSTRUMENTATION
+# --------------------------------------------------
+def _start_timer():
+    g.metrics_started = time.perf_counter()
+
+
+def _record_request(response):
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        endpoint = current_endpoint()
+        metrics.observe('http_request_duration_seconds', {'endpoint': endpoint}, time.perf_counter() - started)
+        metrics.inc('http_requests_total', {
+            'endpoint': endpoint, 'method': request.method, 'status': str(response.status_code)
+        })
+        metrics.maybe_flush()
+    return response
+
+
+def _record_exception(exc):
+    if exc is not None:
+        metrics.inc('http_request_exceptions_total', {'endpoint': current_endpoint()})
+
+
+def instrument_engine(engine):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['metrics_started'].pop()
+        labels = {'endpoint': current_endpoint()}
+        metrics.inc('db_statements_total', labels)
+        metrics.inc('db_statement_seconds_total', labels, time.perf_counter() - started)
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(context):
+        if context.connection is not None:
+            stack = context.connection.info.get('metrics_started')
+            if stack:
+                stack.pop()
+
+
+# --------------------------------------------------
+# UPSTREAM CALLS
+# --------------------------------------------------
+def observe_upstream(service, failed=None):
+    """
+    Times calls to an upstream service. Exceptions, and results for which
+    `failed(result)` is true, are counted in upstream_errors_total.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            labels = {'service': service}
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                metrics.inc('upstream_errors_total', labels)
+                raise
+            finally:
+                metrics.observe('upstream_call_duration_seconds', labels,
+                                time.perf_counter() - started, UPSTREAM_BUCKETS)
+            if failed is not None and failed(result):
+                metrics.inc('upstream_errors_total', labels)
+            return result
+        return wrapper
+    return decorator
+
+
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1')
+
+
+def internal_only(view):
+    """
+    Limits a view exposing internal state to scrapers: requires
+    `Authorization: Bearer <METRICS_TOKEN>` when a token is set; without one,
+    only direct requests from this host (not forwarded by a proxy) are answered.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if metrics.token:
+            if request.headers.get('Authorization') != f'Bearer {metrics.token}':
+                abort(401)
+        elif request.remote_addr not in LOOPBACK_ADDRESSES or 'X-Forwarded-For' in request.headers:
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@internal_only
+def metrics_view():
+    """Prometheus scrape endpoint."""
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8',
+                    headers={'Cache-Control': 'no-store'})
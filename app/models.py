@@ -1,4 +1,4 @@
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.passwords import password_hasher
 from flask_login import UserMixin
 from app.extensions import db
 from datetime import datetime # Import datetime for date fields
@@ -11,9 +11,10 @@ class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128))
+    password_hash = db.Column(db.String(256))
     username = db.Column(db.String(80), unique=True, nullable=True)
     profile_image = db.Column(db.String(150), nullable=False, default='default.jpg')
+    profile_image_variants = db.Column(db.Text, nullable=True)  # JSON {variant: file name}, see app/images.py
     phone_number = db.Column(db.String(20), nullable=True)
     # New fields for the Smart Tourist Safety system
     kyc_type = db.Column(db.String(50), nullable=True) 
@@ -38,11 +39,15 @@ class User(db.Model, UserMixin):
     
     def set_password(self, password):
         """Hashes the password and stores it."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
         """Checks if the provided password matches the hashed password."""
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """True if the stored hash uses outdated hashing parameters."""
+        return password_hasher.needs_rehash(self.password_hash)
     
     def __repr__(self):
         return f'<User {self.email}>'
@@ -83,6 +88,9 @@ class Trip(db.Model):
     itinerary_items = db.relationship('ItineraryItem', backref='trip', lazy=True)
     trip_note = db.relationship('TripNote', backref='trip', uselist=False, lazy=True)
     packing_items = db.relationship('PackingItem', backref='trip', lazy=True)
+    brief = db.relationship('TripBrief', backref='trip', uselist=False, lazy=True, cascade='all, delete-orphan')
+    documents = db.relationship('TripDocument', backref='trip', lazy=True, cascade='all, delete-orphan',
+                                order_by='TripDocument.uploaded_at')
     
     def __repr__(self):
         return f'<Trip {self.title}>'
@@ -124,6 +132,37 @@ class PackingItem(db.Model):
     def __repr__(self):
         return f'<PackingItem {self.item_name} for Trip {self.trip_id}>'
 
+class TripDocument(db.Model):
+    """
+    Document uploaded to a trip. The file itself lives in content-addressed
+    storage under its SHA-256, so identical uploads share one blob.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    trip_id = db.Column(db.Integer, db.ForeignKey('trip.id'), nullable=False, index=True)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    original_name = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(100), nullable=True)
+    size = db.Column(db.Integer, nullable=False)
+    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<TripDocument {self.original_name} for Trip {self.trip_id}>'
+
+class TripBrief(db.Model):
+    """
+    Cached AI trip brief (packing items, itinerary suggestions and safety tips)
+    generated by a single LLM call. The fingerprint ties it to the trip's
+    destination and dates so edits trigger a new brief.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    trip_id = db.Column(db.Integer, db.ForeignKey('trip.id'), unique=True, nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    content = db.Column(db.Text, nullable=False)  # Validated JSON brief
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<TripBrief for Trip {self.trip_id}>'
+
 # Enhanced Safety System Models
 class SafetyAlert(db.Model):
     """
@@ -155,6 +194,9 @@ class LocationHistory(db.Model):
     """
     Model for real-time tracking, used for AI anomaly detection and historical data.
     """
+    # Per-tourist time-window queries and the retention job walk this index
+    __table_args__ = (db.Index('ix_location_history_user_timestamp', 'user_id', 'timestamp'),)
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -205,7 +247,7 @@ class AuthorityUser(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128))
+    password_hash = db.Column(db.String(256))
     employee_id = db.Column(db.String(50), unique=True, nullable=False)
     
     # Authority-specific fields
@@ -223,11 +265,15 @@ class AuthorityUser(db.Model):
     
     def set_password(self, password):
         """Hashes the password and stores it."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
         """Checks if the provided password matches the hashed password."""
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """True if the stored hash uses outdated hashing parameters."""
+        return password_hasher.needs_rehash(self.password_hash)
     
     def __repr__(self):
         return f'<AuthorityUser {self.name} - {self.department}>'
@@ -1,8 +1,11 @@
+import logging
 from datetime import datetime
 
+log = logging.getLogger(__name__)
+
 def send_sos_email(send_email, user, latitude, longitude):
     if not user.emergency_contact_email:
-        print("❌ No emergency contact email found")
+        log.warning("SOS email not sent: no emergency contact email", extra={'user_id': user.id})
         return
 
     subject = "🚨 URGENT SOS ALERT – Immediate Assistance Required"
@@ -48,7 +51,7 @@ IMPORTANT ACTION REQUIRED
 """
 
     send_email(subject, [user.emergency_contact_email], body)
-    print("✅ SOS EMAIL SENT")
+    log.info("SOS email sent", extra={'user_id': user.id})
 
 
 def send_trip_created_email(send_email, user, trip):
@@ -81,7 +84,7 @@ We wish you a safe and memorable journey.
 """
 
     send_email(subject, [user.email], body)
-    print("✅ Trip Created Email Sent")
+    log.info("Trip created email sent", extra={'user_id': user.id, 'trip_id': trip.id})
 
 
 def send_trip_updated_email(send_email, user, trip):
@@ -107,7 +110,7 @@ Please review the changes in your dashboard.
 """
 
     send_email(subject, [user.email], body)
-    print("✅ Trip Updated Email Sent")
+    log.info("Trip updated email sent", extra={'user_id': user.id, 'trip_id': trip.id})
 
 
 def send_trip_deleted_email(send_email, user, trip):
@@ -130,7 +133,7 @@ If this was not intentional, please contact support immediately.
 """
 
     send_email(subject, [user.email], body)
-    print("✅ Trip Deleted Email Sent")
+    log.info("Trip deleted email sent", extra={'user_id': user.id, 'trip_id': trip.id})
 
 
 def send_trip_start_reminder(send_email, user, trip):
@@ -162,4 +165,20 @@ Have a safe journey!
 """
 
     send_email(subject, [user.email], body)
-    print("✅ Trip Reminder Email Sent")
+    log.info("Trip reminder email sent", extra={'user_id': user.id, 'trip_id': trip.id})
+
+
+def build_welcome_email(name, digital_id, email, destination_area, id_valid_until):
+    """Returns (subject, body) of the registration welcome email."""
+    subject = "✅ Welcome to SafeTrip - Registration Successful"
+    body = (
+        f"Hi {name},\n\n"
+        f"🎉 Your SafeTrip account is ready!\n\n"
+        f"Login ID: {digital_id}\n"
+        f"Email: {email}\n"
+        f"Destination: {destination_area}\n"
+        f"Valid until: {id_valid_until.strftime('%Y-%m-%d')}\n\n"
+        f"✅ SOS button, real-time tracking, and emergency alerts are active.\n"
+        f"Safe travels!"
+    )
+    return subject, body
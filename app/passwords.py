@@ -0,0 +1,87 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# --------------------------------------------------
+# PASSWORD HASHING
+# --------------------------------------------------
+# Hashing is CPU-bound and dominates login cost. Hashes are computed in a
+# bounded worker pool (hashlib's scrypt/pbkdf2 release the GIL, so the pool
+# uses several cores while capping how many hashes run at once), and the
+# method/cost comes from config so it can be raised over time. Hashes made
+# with other parameters are reported by needs_rehash() and upgraded on the
+# next successful login.
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+DEFAULT_SALT_LENGTH = 16
+
+
+class PasswordHasher:
+    def __init__(self, method=DEFAULT_METHOD, salt_length=DEFAULT_SALT_LENGTH, workers=None):
+        self._lock = threading.Lock()
+        self._pool = None
+        self.configure(method, salt_length, workers)
+
+    def init_app(self, app):
+        self.configure(
+            method=app.config.get('PASSWORD_HASH_METHOD') or DEFAULT_METHOD,
+            salt_length=app.config.get('PASSWORD_SALT_LENGTH') or DEFAULT_SALT_LENGTH,
+            workers=app.config.get('PASSWORD_HASH_WORKERS')
+        )
+
+    def configure(self, method=DEFAULT_METHOD, salt_length=DEFAULT_SALT_LENGTH, workers=None):
+        workers = int(workers or os.cpu_count() or 1)
+        with self._lock:
+            self.method = method
+            self._canonical_method = None
+            self.salt_length = int(salt_length)
+            if self._pool is None or workers != self.workers:
+                old_pool = self._pool
+                self.workers = workers
+                self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+                self._slots = threading.BoundedSemaphore(workers * 4)
+                if old_pool is not None:
+                    old_pool.shutdown(wait=False)
+
+    def _run(self, fn, *args):
+        # Bound the backlog so a login storm queues here instead of piling up work.
+        with self._slots:
+            return self._pool.submit(fn, *args).result()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def hash_many(self, passwords):
+        """Hashes a batch of passwords in parallel, preserving order."""
+        return list(self._pool.map(
+            lambda p: generate_password_hash(p, self.method, self.salt_length), passwords
+        ))
+
+    def verify(self, pwhash, password):
+        if not pwhash:
+            return False
+        return self._run(check_password_hash, pwhash, password)
+
+    @property
+    def canonical_method(self):
+        """
+        The method prefix stored hashes carry. Werkzeug fills in default
+        parameters ('scrypt' → 'scrypt:32768:8:1'), so hash once to learn it.
+        """
+        if self._canonical_method is None:
+            self._canonical_method = generate_password_hash('', self.method, 1).split('$', 1)[0]
+        return self._canonical_method
+
+    def needs_rehash(self, pwhash):
+        """True if the hash was made with different parameters than configured."""
+        if not pwhash:
+            return False
+        prefix = pwhash.split('$', 1)[0]
+        if prefix == self.method:
+            return False
+        return prefix != self.canonical_method
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,230 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, or_, select, update
+
+from app.extensions import db
+from app.models import TouristStatus
+
+log = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# LATEST-POSITION STORE
+# --------------------------------------------------
+# location_update used to read and rewrite the tourist's TouristStatus row
+# on every ping just to move last_seen_latitude/longitude. Instead, each
+# process keeps everyone's latest position in parallel arrays (one slot per
+# user id), answers "where is everyone now" from memory, and a background
+# thread writes the changed slots to TouristStatus every
+# POSITION_FLUSH_SECONDS in batched UPDATEs. As before, a ping only updates
+# an existing TouristStatus row; it never creates one. A stored position is
+# only replaced by a newer one, so workers flushing the same user cannot
+# move it back in time.
+#
+# The latest position is durable only once flushed: a worker killed without
+# a chance to shut down (SIGKILL, OOM) loses up to POSITION_FLUSH_SECONDS of
+# position updates. A clean shutdown flushes them. Stored LocationHistory
+# fixes are committed by the request itself and are not affected.
+#
+# The arrays are loaded from TouristStatus by the first flush (or the first
+# query, if that comes sooner). After each flush, rows other workers have
+# written since the last look are merged in, so every process converges
+# within about two flush intervals. "Since the last look" goes by updated_at
+# (when a row was flushed), not by the fix's own time, since a fix can reach
+# the table after newer fixes of other tourists. Rows are re-read from
+# MERGE_OVERLAP_FLUSHES flush intervals before the newest updated_at seen,
+# to cover a row stamped before, but committed after, a newer one, and
+# clock differences between hosts.
+
+EPOCH = datetime(1970, 1, 1)
+MERGE_OVERLAP_FLUSHES = 2
+
+
+def _seconds(when):
+    return (when - EPOCH).total_seconds()
+
+
+def _update_statement():
+    """UPDATE of one user's position, skipped when the stored one is newer (executemany-friendly)."""
+    table = TouristStatus.__table__
+    current = table.c.last_location_update
+    return (update(table)
+            .where(table.c.user_id == bindparam('b_user_id'),
+                   or_(current.is_(None), current < bindparam('b_when')))
+            .values(last_seen_latitude=bindparam('b_latitude'),
+                    last_seen_longitude=bindparam('b_longitude'),
+                    last_location_update=bindparam('b_when'),
+                    updated_at=bindparam('b_now')))
+
+
+class LatestPositions:
+    """Thread-safe per-process map of user id → latest (latitude, longitude, time)."""
+
+    def __init__(self, flush_seconds=2.0, batch_size=500):
+        self.flush_seconds = flush_seconds
+        self.batch_size = batch_size
+        self._app = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher_pid = None
+        self._reset()
+
+    def _reset(self):
+        self._slots = {}            # user id -> index into the arrays
+        self._user_ids = array('q')
+        self._latitudes = array('d')
+        self._longitudes = array('d')
+        self._times = array('d')    # seconds since EPOCH (naive UTC)
+        self._dirty = set()         # slots not yet written to TouristStatus
+        self._loaded = False
+        self._watermark = None      # newest updated_at seen in the table
+
+    def init_app(self, app):
+        if self._app is None:
+            atexit.register(self.flush_in_app_context, merge=False)
+        self._app = app
+        self.flush_seconds = float(app.config.get('POSITION_FLUSH_SECONDS', self.flush_seconds))
+        self.batch_size = int(app.config.get('POSITION_FLUSH_BATCH', self.batch_size))
+
+    # --------------------------------------------------
+    # UPDATES AND QUERIES
+    # --------------------------------------------------
+    def update(self, user_id, latitude, longitude, when):
+        """Records a position unless a newer one is already known for the user."""
+        # No need to wait for the table to be loaded: loading only takes newer positions
+        with self._lock:
+            if self._set(user_id, latitude, longitude, _seconds(when)):
+                self._dirty.add(self._slots[user_id])
+        self._ensure_flusher()
+
+    def _set(self, user_id, latitude, longitude, seconds):
+        slot = self._slots.get(user_id)
+        if slot is None:
+            self._slots[user_id] = len(self._user_ids)
+            self._user_ids.append(user_id)
+            self._latitudes.append(latitude)
+            self._longitudes.append(longitude)
+            self._times.append(seconds)
+            return True
+        if seconds < self._times[slot]:
+            return False
+        self._latitudes[slot] = latitude
+        self._longitudes[slot] = longitude
+        self._times[slot] = seconds
+        return True
+
+    def get(self, user_id):
+        """(latitude, longitude, datetime) or None."""
+        self._ensure_loaded()
+        with self._lock:
+            slot = self._slots.get(user_id)
+            if slot is None:
+                return None
+            return self._latitudes[slot], self._longitudes[slot], EPOCH + timedelta(seconds=self._times[slot])
+
+    def recent(self, since):
+        """[(user_id, latitude, longitude, datetime)] of everyone seen since `since`."""
+        self._ensure_loaded()
+        cutoff = _seconds(since)
+        with self._lock:
+            return [(self._user_ids[slot], self._latitudes[slot], self._longitudes[slot],
+                     EPOCH + timedelta(seconds=self._times[slot]))
+                    for slot in range(len(self._user_ids)) if self._times[slot] >= cutoff]
+
+    def __len__(self):
+        return len(self._user_ids)
+
+    # --------------------------------------------------
+    # LOADING, FLUSHING AND MERGING
+    # --------------------------------------------------
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._flush_lock:
+            if not self._loaded:
+                self._merge_from_table()
+
+    def _merge_from_table(self):
+        """Takes positions written to TouristStatus (at startup, or by other workers) that are newer."""
+        query = select(TouristStatus.user_id, TouristStatus.last_seen_latitude,
+                       TouristStatus.last_seen_longitude, TouristStatus.last_location_update,
+                       TouristStatus.updated_at).where(
+            TouristStatus.last_location_update.isnot(None),
+            TouristStatus.last_seen_latitude.isnot(None),
+            TouristStatus.last_seen_longitude.isnot(None))
+        if self._watermark is not None:
+            overlap = timedelta(seconds=self.flush_seconds * MERGE_OVERLAP_FLUSHES)
+            query = query.where(TouristStatus.updated_at >= self._watermark - overlap)
+        rows = db.session.execute(query).all()
+        db.session.commit()
+        with self._lock:
+            for user_id, latitude, longitude, when, updated_at in rows:
+                self._set(user_id, latitude, longitude, _seconds(when))
+                if updated_at is not None and (self._watermark is None or updated_at > self._watermark):
+                    self._watermark = updated_at
+            self._loaded = True
+        return len(rows)
+
+    def flush(self, merge=True):
+        """Writes changed positions to TouristStatus, then merges in other workers' updates."""
+        with self._flush_lock:
+            with self._lock:
+                slots, self._dirty = self._dirty, set()
+                rows = [{'b_user_id': self._user_ids[slot], 'b_latitude': self._latitudes[slot],
+                         'b_longitude': self._longitudes[slot],
+                         'b_when': EPOCH + timedelta(seconds=self._times[slot])} for slot in slots]
+            written = 0
+            try:
+                statement = _update_statement()
+                for start in range(0, len(rows), self.batch_size):
+                    batch = rows[start:start + self.batch_size]
+                    now = datetime.utcnow()  # per batch: keeps the stamp close to the commit
+                    for row in batch:
+                        row['b_now'] = now
+                    db.session.execute(statement, batch)
+                    db.session.commit()
+                    written += len(batch)
+                if merge:
+                    self._merge_from_table()
+            except Exception:
+                db.session.rollback()
+                with self._lock:
+                    self._dirty.update(slots)  # try again next time
+                raise
+            return written
+
+    def _ensure_flusher(self):
+        if self._flusher_pid == os.getpid() or self._app is None:
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()  # a thread does not survive fork(); one per process
+        threading.Thread(target=self._flush_forever, name='position-flusher', daemon=True).start()
+
+    def _flush_forever(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            self.flush_in_app_context()
+
+    def flush_in_app_context(self, merge=True):
+        """flush() for background threads and shutdown hooks; errors are logged, not raised."""
+        if self._app is None:
+            return
+        try:
+            with self._app.app_context():
+                self.flush(merge)
+        except Exception:
+            log.exception("Latest positions not flushed to TouristStatus")
+
+    def clear(self):
+        with self._flush_lock, self._lock:
+            self._reset()
+
+
+positions = LatestPositions()
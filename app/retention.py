@@ -0,0 +1,202 @@
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, tuple_
+
+from app.columnar import ColumnarWriter, column
+from app.extensions import db
+from app.models import LocationHistory
+
+log = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# LOCATION HISTORY RETENTION (`flask location-retention`)
+# --------------------------------------------------
+# LocationHistory gets one row per fix. Older data is thinned out in tiers:
+#
+#   newer than LOCATION_FULL_RESOLUTION_DAYS    kept as is
+#   up to LOCATION_ARCHIVE_AFTER_DAYS           one fix per user per LOCATION_DOWNSAMPLE_MINUTES
+#                                               (the first in each bucket; manual check-ins always kept)
+#   older                                       written to columnar files in LOCATION_ARCHIVE_DIR,
+#                                               then deleted
+#
+# Every step reads or deletes at most LOCATION_RETENTION_BATCH rows per
+# transaction and commits, so ingest is never blocked for long. Downsampling
+# walks the (user_id, timestamp) index with a keyset cursor and is idempotent.
+# An archive file is closed (and synced) before its rows are deleted: a crash
+# in between leaves the rows in place to be archived again on the next run,
+# never lost.
+
+EPOCH = datetime(1970, 1, 1)
+
+ARCHIVE_SCHEMA = [
+    column('id', 'q', 'delta'),
+    column('user_id', 'q'),
+    column('timestamp_ms', 'q', 'delta'),
+    column('latitude', 'q', 'delta', scale=1e7),
+    column('longitude', 'q', 'delta', scale=1e7),
+    column('accuracy', 'd'),
+    column('altitude', 'd'),
+    column('speed', 'd'),
+    column('battery_level', 'f'),
+    column('is_manual_checkin', 'B'),
+]
+
+
+class RetentionReport:
+    def __init__(self):
+        self.tiers = {}
+        self.archive_files = []
+
+    def tier(self, name):
+        return self.tiers.setdefault(name, {'scanned': 0, 'deleted': 0, 'archived': 0,
+                                            'batches': 0, 'elapsed_seconds': 0.0})
+
+    def as_dict(self):
+        tiers = {}
+        for name, counts in self.tiers.items():
+            moved = counts['deleted'] + counts['archived']
+            elapsed = counts['elapsed_seconds']
+            tiers[name] = dict(counts, elapsed_seconds=round(elapsed, 3),
+                               rows_per_second=round(moved / elapsed, 1) if elapsed else 0.0)
+        return {'tiers': tiers, 'archive_files': self.archive_files}
+
+
+def _timestamp_ms(ts):
+    return (ts - EPOCH) // timedelta(milliseconds=1)
+
+
+def _delete_ids(ids, batch_size):
+    for start in range(0, len(ids), batch_size):
+        db.session.execute(delete(LocationHistory).where(LocationHistory.id.in_(ids[start:start + batch_size])))
+        db.session.commit()
+
+
+def downsample(since, until, minutes, batch_size=5000, pause=0.0, dry_run=False, report=None):
+    """Keeps the first fix per user per `minutes` bucket in [since, until)."""
+    report = report or RetentionReport()
+    counts = report.tier('downsample')
+    bucket = timedelta(minutes=minutes)
+    cursor_key = tuple_(LocationHistory.user_id, LocationHistory.timestamp, LocationHistory.id)
+    query = (select(LocationHistory.user_id, LocationHistory.timestamp, LocationHistory.id,
+                    LocationHistory.is_manual_checkin)
+             .where(LocationHistory.timestamp >= since, LocationHistory.timestamp < until)
+             .order_by(LocationHistory.user_id, LocationHistory.timestamp, LocationHistory.id)
+             .limit(batch_size))
+
+    started = time.perf_counter()
+    cursor, kept = None, None  # kept: (user_id, bucket) of the last fix kept
+    while True:
+        batch_query = query if cursor is None else query.where(cursor_key > tuple_(*cursor))
+        rows = db.session.execute(batch_query).all()
+        if not rows:
+            break
+        doomed = []
+        for user_id, timestamp, row_id, is_manual_checkin in rows:
+            key = (user_id, (timestamp - EPOCH) // bucket)
+            if is_manual_checkin:
+                continue
+            if key == kept:
+                doomed.append(row_id)
+            else:
+                kept = key
+        if doomed and not dry_run:
+            db.session.execute(delete(LocationHistory).where(LocationHistory.id.in_(doomed)))
+        db.session.commit()
+
+        counts['scanned'] += len(rows)
+        counts['deleted'] += len(doomed)
+        counts['batches'] += 1
+        cursor = rows[-1][:3]
+        if len(rows) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    counts['elapsed_seconds'] += time.perf_counter() - started
+    return report
+
+
+def archive(before, archive_dir, batch_size=5000, file_rows=200000, pause=0.0, dry_run=False, report=None):
+    """Moves fixes older than `before` into columnar files of up to `file_rows` rows each."""
+    report = report or RetentionReport()
+    counts = report.tier('archive')
+    # Same order as ARCHIVE_SCHEMA
+    query = (select(LocationHistory.id, LocationHistory.user_id, LocationHistory.timestamp,
+                    LocationHistory.latitude, LocationHistory.longitude, LocationHistory.accuracy,
+                    LocationHistory.altitude, LocationHistory.speed, LocationHistory.battery_level,
+                    LocationHistory.is_manual_checkin)
+             .where(LocationHistory.timestamp < before)
+             .order_by(LocationHistory.id)
+             .limit(batch_size))
+    if not dry_run:
+        os.makedirs(archive_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    last_id = 0
+    while True:
+        ids, writer, first_ts, last_ts = [], None, None, None
+        try:
+            while len(ids) < file_rows:
+                rows = db.session.execute(query.where(LocationHistory.id > last_id)).all()
+                db.session.commit()  # end the read transaction between batches
+                if not rows:
+                    break
+                counts['scanned'] += len(rows)
+                counts['batches'] += 1
+                last_id = rows[-1][0]
+                batch_ids = [row[0] for row in rows]
+                ids.extend(batch_ids)
+                timestamps = [row[2] for row in rows]
+                first_ts = min(timestamps + ([first_ts] if first_ts else []))
+                last_ts = max(timestamps + ([last_ts] if last_ts else []))
+                if dry_run:
+                    continue
+                if writer is None:
+                    name = f'location_history-{batch_ids[0]:012d}-{datetime.utcnow():%Y%m%d%H%M%S}.tbcol'
+                    writer = ColumnarWriter(os.path.join(archive_dir, name), ARCHIVE_SCHEMA,
+                                            meta={'table': 'location_history', 'before': before.isoformat()})
+                values = list(zip(*rows))
+                values[2] = [_timestamp_ms(ts) for ts in values[2]]
+                values[-1] = [1 if v else 0 for v in values[-1]]
+                writer.write({spec['name']: column_values for spec, column_values in zip(ARCHIVE_SCHEMA, values)})
+                if pause:
+                    time.sleep(pause)
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
+        if not ids:
+            break
+
+        if not dry_run:
+            writer.close()
+            _delete_ids(ids, batch_size)
+            report.archive_files.append({'path': writer.path, 'rows': len(ids),
+                                         'from': first_ts.isoformat(), 'to': last_ts.isoformat(),
+                                         'bytes': os.path.getsize(writer.path)})
+            log.info("Archived %d location fixes to %s", len(ids), writer.path)
+        counts['archived'] += len(ids)
+        if len(ids) < file_rows:
+            break
+    counts['elapsed_seconds'] += time.perf_counter() - started
+    return report
+
+
+def run_retention(full_days, downsample_minutes, archive_days, archive_dir,
+                  batch_size=5000, pause=0.0, dry_run=False, now=None):
+    """Archives, then downsamples, per the tiers above; archive_days=0 keeps everything in the table."""
+    if archive_days and archive_days <= full_days:
+        raise ValueError("archive_days must be greater than full_days")
+    now = now or datetime.utcnow()
+    full_cutoff = now - timedelta(days=full_days)
+    archive_cutoff = now - timedelta(days=archive_days) if archive_days else EPOCH
+
+    report = RetentionReport()
+    if archive_days:
+        archive(archive_cutoff, archive_dir, batch_size=batch_size, pause=pause, dry_run=dry_run, report=report)
+    if downsample_minutes:
+        downsample(archive_cutoff, full_cutoff, downsample_minutes,
+                   batch_size=batch_size, pause=pause, dry_run=dry_run, report=report)
+    return report
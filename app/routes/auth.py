@@ -1,16 +1,15 @@
 from flask import Blueprint, render_template, redirect, url_for, request, flash
 from flask_login import login_user, logout_user, login_required
 from app.models import User, TouristStatus, EmergencyContact
-from app.extensions import db, login_manager
+from app.extensions import db
 import hashlib
+import logging
 from datetime import datetime, timedelta
 from app.utils import send_email
+from app.notifications import build_welcome_email
 
 auth_bp = Blueprint('auth', __name__)
-
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
+log = logging.getLogger(__name__)
 
 @auth_bp.route('/register', methods=['GET', 'POST'])
 def register():
@@ -105,22 +104,11 @@ def register():
             db.session.commit()
             
             # ✅ SEND SINGLE REGISTRATION EMAIL (FIXED)
-            subject = "✅ Welcome to SafeTrip - Registration Successful"
-            body = (
-                f"Hi {name},\n\n"
-                f"🎉 Your SafeTrip account is ready!\n\n"
-                f"Login ID: {digital_id}\n"
-                f"Email: {email}\n"
-                f"Destination: {destination_area}\n"
-                f"Valid until: {id_valid_until.strftime('%Y-%m-%d')}\n\n"
-                f"✅ SOS button, real-time tracking, and emergency alerts are active.\n"
-                f"Safe travels!"
-            )
+            subject, body = build_welcome_email(name, digital_id, email, destination_area, id_valid_until)
             try:
                 send_email(subject, [email], body)
-                print(f"✅ Registration email sent to {email}")
-            except Exception as e:
-                print(f"❌ Registration email failed: {e}")
+            except Exception:
+                log.exception("Registration email failed")
             
             # Success message based on registration type
             if kyc_type and kyc_id:
@@ -138,10 +126,10 @@ def register():
             
             return redirect(url_for('auth.login'))
             
-        except Exception as e:
+        except Exception:
             db.session.rollback()
             flash('Registration failed. Please try again.', 'danger')
-            print(f"Registration error: {e}")  # For debugging
+            log.exception("Registration failed")
             
     return render_template('register.html')
 
@@ -171,6 +159,11 @@ def login():
                 flash('Please use Admin login for administrator accounts.', 'warning')
                 return render_template('login.html')
             
+            # Transparently upgrade hashes made with older hashing parameters
+            if user.password_needs_rehash():
+                user.set_password(password)
+                db.session.commit()
+
             login_user(user, remember=bool(remember_me))
             
             # Redirect based on role
@@ -1,10 +1,19 @@
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, Response, render_template, request, jsonify, flash, redirect, url_for, stream_with_context
 from flask_login import login_required, current_user
 from app.models import SafetyAlert, TouristStatus, User, LocationHistory
+from app.database import db_route_class
+from app.positions import positions
+from app.exports import FORMATS, ExportError, export_filename, parse_time, resolve_zone, stream_export
 from datetime import datetime, timedelta
 
+# Page views for officials. Not registered yet: authority_dashboard.html and
+# tourist_details.html do not exist.
 authority_bp = Blueprint('authority', __name__)
 
+# JSON and download API for officials, mounted at /authority/api; every view
+# checks for the authority or admin role.
+authority_api_bp = Blueprint('authority_api', __name__)
+
 @authority_bp.route('/authority_dashboard')
 @login_required
 def authority_dashboard():
@@ -51,18 +60,74 @@ def tourist_details(user_id):
                          status=status,
                          alerts=alerts)
 
-@authority_bp.route('/api/heat_map')
+@authority_api_bp.route('/heat_map')
+@db_route_class('report')
 @login_required
 def heat_map_data():
     """API for tourist location heat map"""
+    if current_user.role not in ('authority', 'admin'):
+        return jsonify({'error': 'Authority access required'}), 403
+
     recent_locations = LocationHistory.query.filter(
         LocationHistory.timestamp >= datetime.utcnow() - timedelta(hours=6)
     ).all()
     
-    data = [{
+    return jsonify(heat_map_points(recent_locations))
+
+
+@authority_api_bp.route('/live_positions')
+@login_required
+def live_positions():
+    """Where everyone seen in the last `minutes` (default 15) is now, from the in-memory store"""
+    if current_user.role not in ('authority', 'admin'):
+        return jsonify({'error': 'Authority access required'}), 403
+
+    minutes = request.args.get('minutes', 15, type=int)
+    since = datetime.utcnow() - timedelta(minutes=minutes)
+    return jsonify([{
+        'user_id': user_id,
+        'lat': latitude,
+        'lng': longitude,
+        'last_seen': last_seen.isoformat()
+    } for user_id, latitude, longitude, last_seen in positions.recent(since)])
+
+
+@authority_api_bp.route('/export/<kind>')
+@db_route_class('report')
+@login_required
+def export(kind):
+    """
+    Streams locations, safety_alerts, sos_alerts or incidents as a download.
+    Query: format=ndjson|csv, gzip=1, user_id, since, until (ISO), and a
+    zone as geofence=<id> or bbox=min_lat,min_lng,max_lat,max_lng.
+    """
+    if current_user.role not in ('authority', 'admin'):
+        return jsonify({'error': 'Authority access required'}), 403
+
+    fmt = request.args.get('format', 'ndjson')
+    compress = request.args.get('gzip', '0') not in ('0', 'false', '')
+    try:
+        pieces = stream_export(
+            kind, fmt, compress,
+            user_id=request.args.get('user_id', type=int),
+            since=parse_time(request.args.get('since'), 'since'),
+            until=parse_time(request.args.get('until'), 'until'),
+            zone=resolve_zone(request.args.get('geofence', type=int), request.args.get('bbox')),
+        )
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
+
+    response = Response(stream_with_context(pieces),
+                        mimetype='application/gzip' if compress else FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{export_filename(kind, fmt, compress)}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def heat_map_points(locations):
+    """Heat map JSON payload: one {'lat', 'lng', 'intensity'} point per location."""
+    return [{
         'lat': loc.latitude,
         'lng': loc.longitude,
         'intensity': 1
-    } for loc in recent_locations]
-    
-    return jsonify(data)
+    } for loc in locations]
@@ -1,13 +1,18 @@
-from flask import Blueprint, render_template, flash, redirect, url_for, request, current_app
+from flask import Blueprint, render_template, flash, redirect, url_for, request, current_app, send_file, send_from_directory, abort
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
+import logging
 import os
 from app.extensions import db
 from datetime import datetime
 from app.utils import call_llm_api
-from app.models import Trip, ItineraryItem, TripNote, PackingItem,User, SOSAlert
+from app.models import Trip, ItineraryItem, TripNote, PackingItem,User, SOSAlert, TripDocument
+from app.storage import store_upload, blob_path, UnsupportedDocument
+from app.images import schedule_variants, remove_profile_image, is_fingerprinted, is_profile_media
 from datetime import datetime
-from app.utils import call_llm_api, send_email  # ADD send_email
+from app.utils import call_llm_api, send_email, llm_budget  # ADD send_email
+from app.trip_brief import get_trip_brief
+from app.database import db_route_class
 
 
 # Safe import with a fallback stub to avoid runtime errors if app.utils is not available
@@ -19,6 +24,7 @@ except Exception:
         return "AI functionality is disabled: call_llm_api not available."
 
 dash_bp = Blueprint('dashboard', __name__)
+log = logging.getLogger(__name__)
 from datetime import datetime
 from app.models import Trip  # Adjust import according to your project structure
 
@@ -51,7 +57,7 @@ def show_dashboard():
                 next_trip = future_trips[0]
 
         except Exception as e:
-            print(f"Error parsing dates in trips: {e}")
+            log.warning("Error parsing dates in trips: %s", e, extra={'user_id': current_user.id})
             # fallback: choose first trip, but no formatting possible
             next_trip = trips[0]
 
@@ -90,10 +96,10 @@ def send_sos():
 
         # ---------------- EMAIL TARGET ----------------
         emergency_email = current_user.emergency_contact_email
-        print("🚨 SOS EMAIL TARGET:", emergency_email)
+        log.warning("SOS alert raised", extra={'user_id': current_user.id, 'sos_alert_id': sos_alert.id})
 
         if not emergency_email:
-            print("❌ No emergency email configured for user")
+            log.error("SOS email not sent: no emergency contact email", extra={'user_id': current_user.id})
             return {'success': False, 'error': 'No emergency contact email'}, 400
 
         # ---------------- EMAIL CONTENT ----------------
@@ -137,16 +143,17 @@ Please do NOT ignore this email.
             body=email_body
         )
 
-        print("✅ SOS EMAIL SENT SUCCESSFULLY")
+        log.info("SOS email sent", extra={'user_id': current_user.id})
 
         return {'success': True}
 
     except Exception as e:
         db.session.rollback()
-        print(f"❌ SOS ERROR: {e}")
+        log.exception("SOS failed", extra={'user_id': current_user.id})
         return {'success': False, 'error': str(e)}, 500
 
 @dash_bp.route('/admin/dashboard')
+@db_route_class('report')
 @login_required
 def admin_dashboard():
     """Admin dashboard showing customers and SOS alerts"""
@@ -199,6 +206,7 @@ def create_trip():
 
 @dash_bp.route('/packing_list', methods=['GET', 'POST'])
 @login_required
+@llm_budget(6)
 def packing_list():
     """
     Displays and allows managing a packing list.
@@ -226,7 +234,7 @@ def packing_list():
                 reverse=True
             )[0]
         except Exception as e:
-            print(f"Date sorting error: {e}")
+            log.warning("Date sorting error: %s", e, extra={'user_id': current_user.id})
             selected_trip = user_trips[0]
 
     current_packing_list = []
@@ -249,20 +257,9 @@ def packing_list():
 
     generated_ai_suggestions = []
     if selected_trip:
-        # AI Prompt Logic
-        llm_prompt = (
-            f"Generate a comprehensive packing list with 8-12 essential items for a trip to {selected_trip.destination} "
-            f"considering general weather and duration. "
-            f"Provide comma-separated items ONLY (e.g., 'socks, jacket, toothbrush'). No other text."
-        )
-        
-        ai_response = call_llm_api(llm_prompt)
-        
-        if ai_response and "AI functionality is disabled" not in ai_response and "Error" not in ai_response:
-            generated_items = [item.strip().replace('.', '') for item in ai_response.split(',') if item.strip()]
-            generated_ai_suggestions = generated_items
-        else:
-            generated_ai_suggestions = [] # Fail silently or show generic list
+        # Served from the cached trip brief shared with the summary and itinerary pages
+        brief, _ = get_trip_brief(selected_trip)
+        generated_ai_suggestions = brief['packing'] if brief else [] # Fail silently or show generic list
     else:
         generated_ai_suggestions = ["Select a trip to see suggestions."]
 
@@ -295,6 +292,7 @@ def delete_packing_item(item_id):
 
 @dash_bp.route('/budget_estimator', methods=['GET', 'POST'])
 @login_required
+@llm_budget(8)
 def budget_estimator():
     """
     Calculates and displays an estimated budget based on user inputs.
@@ -335,69 +333,77 @@ def budget_estimator():
                 f"Total estimated budget: ₹{total:,.2f}\n\n"
                 f"Please provide a brief budget summary and 2-3 actionable tips to potentially save money or optimize spending in a concise paragraph. Focus on the areas with highest costs or where savings are most likely. Ensure the response is a complete, well-formed paragraph."
             )
-            print(f"DEBUG: Budget AI Prompt: {budget_prompt}")
+            log.debug("Budget AI prompt: %s", budget_prompt)
             ai_response = call_llm_api(budget_prompt)
 
             if ai_response and "AI functionality is disabled" not in ai_response and "Error from AI" not in ai_response:
                 ai_budget_summary = ai_response
-                print(f"DEBUG: Budget AI Summary for template: {ai_budget_summary}")
+                log.debug("Budget AI summary: %s", ai_budget_summary)
             else:
                 ai_budget_summary = "AI budget tips not available: " + ai_response
-                print(f"DEBUG: Budget AI Summary set to error message: {ai_budget_summary}")
+                log.debug("Budget AI summary set to error message: %s", ai_budget_summary)
 
         except ValueError:
             flash('Please enter valid numerical values for all costs.', 'danger')
 
-    print(f"DEBUG: Final breakdown object sent to template: {breakdown}")
+    log.debug("Budget breakdown: %s", breakdown)
     return render_template('budget_estimator.html', total=total, breakdown=breakdown, ai_budget_summary=ai_budget_summary)
 
 
+# --------------------------------------------------
+# ITINERARY HELPERS
+# --------------------------------------------------
+def group_itinerary_by_day(items):
+    """[{'date': 'YYYY-MM-DD', 'activities_list': [ItineraryItem, ...]}, ...] in date order."""
+    itinerary_by_day = {}
+    for item in items:
+        date_str = item.date.strftime('%Y-%m-%d')
+        if date_str not in itinerary_by_day:
+            itinerary_by_day[date_str] = []
+        itinerary_by_day[date_str].append(item)
+
+    return [{'date': date_str, 'activities_list': itinerary_by_day[date_str]}
+            for date_str in sorted(itinerary_by_day.keys())]
+
+
+def itinerary_summary_by_day(items):
+    """[{'date': 'YYYY-MM-DD', 'activities': ['HH:MM - description', ...]}, ...] in date order."""
+    itinerary_summary_data = {}
+    for item in items:
+        date_key = item.date.strftime('%Y-%m-%d')
+        if date_key not in itinerary_summary_data:
+            itinerary_summary_data[date_key] = []
+        time_str = f"{item.time} - " if item.time else ""
+        itinerary_summary_data[date_key].append(f"{time_str}{item.description}")
+
+    return [{'date': date_str, 'activities': itinerary_summary_data[date_str]}
+            for date_str in sorted(itinerary_summary_data.keys())]
+
+
 @dash_bp.route('/itinerary_builder/<int:trip_id>', methods=['GET', 'POST'])
 @login_required
+@llm_budget(10)
 def itinerary_builder(trip_id):
     """
     Manages the itinerary for a specific trip, allowing adding and deleting activities.
     """
-    print(f"DEBUG: Itinerary Builder route accessed for trip_id: {trip_id}")
     trip = Trip.query.get_or_404(trip_id)
     if trip.user_id != current_user.id:
         flash("Unauthorized access. You can only manage itineraries for your own trips.", "danger")
         return redirect(url_for('dashboard.show_dashboard'))
-    print(f"DEBUG: Trip found for itinerary builder: {trip.title}")
 
     all_itinerary_items = ItineraryItem.query.filter_by(trip_id=trip_id).order_by(ItineraryItem.date, ItineraryItem.time).all()
-
-    itinerary_by_day = {}
-    for item in all_itinerary_items:
-        date_str = item.date.strftime('%Y-%m-%d')
-        if date_str not in itinerary_by_day:
-            itinerary_by_day[date_str] = []
-        itinerary_by_day[date_str].append(item)
-    
-    itinerary_for_template = []
-    for date_str in sorted(itinerary_by_day.keys()):
-        itinerary_for_template.append({
-            'date': date_str,
-            'activities_list': itinerary_by_day[date_str]
-        })
-    print(f"DEBUG: Itinerary data for template: {itinerary_for_template}")
+    itinerary_for_template = group_itinerary_by_day(all_itinerary_items)
+    log.debug("Itinerary for trip %s: %s", trip_id, itinerary_for_template)
 
     ai_itinerary_suggestions = None
     if request.method == 'GET': 
-        # PROMPT REFINEMENT for LLM to ensure more robust itinerary suggestions
-        ai_prompt = (
-            f"Suggest 3-5 daily activities for a trip to {trip.destination} "
-            f"from {trip.start_date} to {trip.end_date}. "
-            f"Consider typical tourist attractions, local experiences, and the trip duration. "
-            f"Format as 'Day X: Activity 1, Activity 2, Activity 3'. Each day on a new line. "
-            f"e.g., 'Day 1: Explore Eiffel Tower, Visit Louvre, Dinner at a local bistro\nDay 2: Take a Seine River cruise, See the Arc de Triomphe, Shop on Champs-Élysées'. "
-            f"Do NOT include any other text or introductory phrases. Ensure the response is complete for all suggested days."
-        )
-        ai_response = call_llm_api(ai_prompt)
-        if ai_response and "AI functionality is disabled" not in ai_response and "Error from AI" not in ai_response:
-            ai_itinerary_suggestions = ai_response.split('\n')
+        # Day-by-day suggestions come from the cached trip brief (one LLM call per trip)
+        brief, brief_error = get_trip_brief(trip)
+        if brief:
+            ai_itinerary_suggestions = brief['itinerary']
         else:
-            ai_itinerary_suggestions = ["AI suggestions not available for this trip: " + ai_response]
+            ai_itinerary_suggestions = ["AI suggestions not available for this trip: " + brief_error]
 
     return render_template('itinerary_builder.html', 
                            trip=trip, 
@@ -457,25 +463,26 @@ def delete_activity(activity_id):
 
 @dash_bp.route('/trip_summary/<int:trip_id>')
 @login_required
+@llm_budget(10)
 def trip_summary(trip_id):
     """
     Displays a summary of a specific trip, including its details,
     itinerary, packing list, budget, and notes.
     """
-    print(f"DEBUG: trip_summary route received trip_id: {trip_id}")
     trip = Trip.query.get_or_404(trip_id)
 
     if trip.user_id != current_user.id:
         flash("Unauthorized access. You can only view summaries for your own trips.", "danger")
         return redirect(url_for('dashboard.show_dashboard'))
     
-    print(f"DEBUG: Fetched trip object: {trip.title}, {trip.destination}, {trip.start_date}, {trip.end_date}, {trip.budget}")
+    log.debug("Trip summary for trip %s: %s, %s, %s to %s, budget %s",
+              trip.id, trip.title, trip.destination, trip.start_date, trip.end_date, trip.budget)
 
     try:
         trip.start_date_obj = datetime.strptime(trip.start_date, '%Y-%m-%d').date()
         trip.end_date_obj = datetime.strptime(trip.end_date, '%Y-%m-%d').date()
     except ValueError as e:
-        print(f"ERROR: Date parsing error in trip_summary for trip {trip.id}: {e}")
+        log.warning("Date parsing error in trip_summary: %s", e, extra={'trip_id': trip.id})
         trip.start_date_obj = None
         trip.end_date_obj = None
 
@@ -485,49 +492,34 @@ def trip_summary(trip_id):
     packing_items_for_template = PackingItem.query.filter_by(trip_id=trip.id, is_ai_generated=False).all()
     # Ensure robust attribute access: models may use 'item_name' or 'name'
     packing_item_names = [getattr(item, 'item_name', None) or getattr(item, 'name', None) or 'Unknown' for item in packing_items_for_template]
-    print(f"DEBUG: Custom Packing items for trip {trip.id}: {packing_item_names}")
+    log.debug("Custom packing items for trip %s: %s", trip.id, packing_item_names)
 
 
     ai_packing_list_for_summary = []
+    ai_safety_tips = []
     if trip.start_date_obj and trip.end_date_obj:
-        # PROMPT REFINEMENT for LLM to ensure more complete packing list
-        ai_prompt = (
-            f"Generate a comprehensive packing list with 8-12 essential items for a trip to {trip.destination} from {trip.start_date_obj.strftime('%Y-%m-%d')} to {trip.end_date_obj.strftime('%Y-%m-%d')}. Consider general weather and typical travel needs. Provide the list as comma-separated items ONLY, e.g., 'socks, underwear, t-shirts, jacket, toiletries, phone charger, swimsuit, hat, sunglasses, comfortable shoes, small backpack'. Do NOT include any other text or introductory phrases. Ensure the list is complete and not cut off."
-        )
-        ai_response_content = call_llm_api(ai_prompt)
-        
-        if isinstance(ai_response_content, str) and "AI functionality is disabled" not in ai_response_content and "Error from AI" not in ai_response_content:
-            ai_packing_list_for_summary = [item.strip().replace('.', '') for item in ai_response_content.split(',') if item.strip()]
+        # Packing items and safety tips come from the cached trip brief (one LLM call per trip)
+        brief, brief_error = get_trip_brief(trip)
+        if brief:
+            ai_packing_list_for_summary = brief['packing']
+            ai_safety_tips = brief['safety_tips']
         else:
-            ai_packing_list_for_summary = ["AI suggestions not available for this trip: " + str(ai_response_content)]
+            ai_packing_list_for_summary = ["AI suggestions not available for this trip: " + brief_error]
         
     else:
         ai_packing_list_for_summary = ["AI suggestions not available due to date format issues for this trip."]
 
-    print(f"DEBUG: AI Packing items for trip {trip.id} (summary): {ai_packing_list_for_summary}")
+    log.debug("AI packing items for trip %s: %s", trip.id, ai_packing_list_for_summary)
 
 
     itinerary_items_db = ItineraryItem.query.filter_by(trip_id=trip_id).order_by(ItineraryItem.date, ItineraryItem.time).all()
-    itinerary_summary_data = {}
-    for item in itinerary_items_db:
-        date_key = item.date.strftime('%Y-%m-%d')
-        if date_key not in itinerary_summary_data:
-            itinerary_summary_data[date_key] = []
-        time_str = f"{item.time} - " if item.time else ""
-        itinerary_summary_data[date_key].append(f"{time_str}{item.description}")
-    
-    itinerary_for_template = []
-    for date_str in sorted(itinerary_summary_data.keys()):
-        itinerary_for_template.append({
-            'date': date_str,
-            'activities': itinerary_summary_data[date_str]
-        })
-    print(f"DEBUG: Itinerary for summary: {itinerary_for_template}")
+    itinerary_for_template = itinerary_summary_by_day(itinerary_items_db)
+    log.debug("Itinerary summary for trip %s: %s", trip.id, itinerary_for_template)
 
 
     trip_note_obj = TripNote.query.filter_by(trip_id=trip_id).first()
     notes_content = trip_note_obj.content if trip_note_obj and trip_note_obj.content else "No specific notes for this trip yet."
-    print(f"DEBUG: Notes content for summary: {notes_content[:50]}...")
+    log.debug("Notes for trip %s: %.50s...", trip.id, notes_content)
 
 
     share_link = url_for('dashboard.trip_summary', trip_id=trip.id, _external=True)
@@ -539,6 +531,7 @@ def trip_summary(trip_id):
         itinerary=itinerary_for_template,
         packing_items=packing_items_for_template,
         ai_packing_list=ai_packing_list_for_summary,
+        ai_safety_tips=ai_safety_tips,
         notes=notes_content,
         share_link=share_link
     )
@@ -549,12 +542,10 @@ def trip_notes(trip_id):
     """
     Allows users to save and view trip notes and upload documents for a specific trip.
     """
-    print(f"DEBUG: Trip Notes route accessed for trip_id: {trip_id}")
     trip = Trip.query.get_or_404(trip_id)
     if trip.user_id != current_user.id:
         flash("Unauthorized access. You can only view/edit notes for your own trips.", "danger")
         return redirect(url_for('dashboard.show_dashboard'))
-    print(f"DEBUG: Trip found for notes: {trip.title}")
 
     trip_note_obj = TripNote.query.filter_by(trip_id=trip_id).first()
     current_notes_content = trip_note_obj.content if trip_note_obj else ""
@@ -585,23 +576,58 @@ def save_notes_docs(trip_id):
     flash("Trip notes saved successfully.", "success")
 
     if file and file.filename != '':
-        if 'UPLOAD_FOLDER' not in current_app.config:
-            flash("UPLOAD_FOLDER is not configured. File upload disabled.", "danger")
-        else:
-            filename = secure_filename(file.filename)
-            upload_folder = current_app.config['UPLOAD_FOLDER']
-            os.makedirs(upload_folder, exist_ok=True)
-            filepath = os.path.join(upload_folder, filename)
-            try:
-                file.save(filepath)
-                flash(f"Document '{filename}' uploaded successfully.", "success")
-            except Exception as e:
-                flash(f"Error saving file: {e}", "danger")
+        filename = secure_filename(file.filename) or 'document'
+        try:
+            sha256, size, content_type, _ = store_upload(file)
+            db.session.add(TripDocument(
+                trip_id=trip_id,
+                sha256=sha256,
+                original_name=filename,
+                content_type=content_type,
+                size=size
+            ))
+            db.session.commit()
+            flash(f"Document '{filename}' uploaded successfully.", "success")
+        except UnsupportedDocument:
+            flash(f"'{filename}' is not a supported document type (PDF, PNG, JPEG, GIF or WebP).", "danger")
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Error saving file: {e}", "danger")
     else:
         if not notes_text: 
             flash("No document selected for upload and no notes provided.", "info")
 
     return redirect(url_for('dashboard.trip_notes', trip_id=trip_id))
+
+@dash_bp.route('/trip_notes/<int:trip_id>/documents/<int:document_id>')
+@login_required
+def download_document(trip_id, document_id):
+    """
+    Serves an uploaded trip document as a download, with Range support and
+    conditional GET (the content hash doubles as a strong ETag).
+    """
+    document = TripDocument.query.filter_by(id=document_id, trip_id=trip_id).first_or_404()
+    if document.trip.user_id != current_user.id:
+        flash("Unauthorized access.", "danger")
+        return redirect(url_for('dashboard.show_dashboard'))
+
+    path = blob_path(document.sha256)
+    if not os.path.exists(path):
+        abort(404)
+    response = send_file(
+        path,
+        mimetype=document.content_type,
+        as_attachment=True,
+        download_name=document.original_name,
+        conditional=True,
+        etag=document.sha256,
+        last_modified=document.uploaded_at,
+        max_age=3600
+    )
+    response.cache_control.public = False
+    response.cache_control.private = True
+    return response
+
 # Add these imports to the top of dashboard.py
 import os
 import uuid
@@ -616,6 +642,7 @@ def profile():
     if request.method == 'POST':
         # --- Handle Profile Image Upload ---
         profile_pic = request.files.get('profile_image')
+        new_profile_image = None
         if profile_pic and profile_pic.filename != '':
             # Create a secure and unique filename
             filename = secure_filename(profile_pic.filename)
@@ -625,17 +652,16 @@ def profile():
             upload_folder = current_app.config['UPLOAD_FOLDER']
             os.makedirs(upload_folder, exist_ok=True)
             
-            # Delete old picture if it's not the default
-            if current_user.profile_image and current_user.profile_image != 'default.jpg':
-                old_pic_path = os.path.join(upload_folder, current_user.profile_image)
-                if os.path.exists(old_pic_path):
-                    os.remove(old_pic_path)
-            print(f"Saving profile image to: {os.path.join(upload_folder, pic_name)}")
+            # Delete old picture (and its resized variants) if it's not the default
+            remove_profile_image(current_user)
+            log.debug("Saving profile image to %s", os.path.join(upload_folder, pic_name))
             # Save the new picture
             profile_pic.save(os.path.join(upload_folder, pic_name))
             
-            # Update the database record
+            # Update the database record; variants are resized after the commit
             current_user.profile_image = pic_name
+            current_user.profile_image_variants = None
+            new_profile_image = pic_name
             flash('Profile picture updated!', 'success')
 
         # --- Update Basic Information ---
@@ -665,6 +691,8 @@ def profile():
         # --- Commit All Changes to Database ---
         try:
             db.session.commit()
+            if new_profile_image:
+                schedule_variants(current_user.id, new_profile_image)
             flash('Profile details updated successfully!', 'success')
         except Exception as e:
             db.session.rollback()
@@ -675,6 +703,27 @@ def profile():
     # For GET requests, just render the page
     return render_template('profile.html', user=current_user)
 
+
+@dash_bp.route('/media/profiles/<path:filename>')
+@login_required
+def profile_media(filename):
+    """
+    Serves uploaded profile pictures. Resized variants have content-hashed
+    names and are cached for a year; originals only briefly, since their
+    variants replace them in pages once ready. Only names recorded on a
+    user are served: trip documents live in the same upload folder.
+    """
+    if not is_profile_media(filename):
+        abort(404)
+    immutable = is_fingerprinted(filename)
+    response = send_from_directory(
+        current_app.config['UPLOAD_FOLDER'], filename, max_age=31536000 if immutable else 300
+    )
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.immutable = immutable or None
+    return response
+
 from app.models import SafetyAlert,LocationHistory # Make sure these are imported
 from datetime import datetime
 
@@ -710,6 +759,7 @@ def report_safety_alert():
             
     return render_template('report_safety_alert.html')
 @dash_bp.route('/safety_map')
+@db_route_class('report')
 @login_required
 def safety_map():
     # 1. Fetch alerts (which have lat/lng data)
@@ -769,11 +819,11 @@ def delete_trip(trip_id):
         db.session.commit()
 
         flash(f"Trip '{trip_title}' deleted successfully.", "success")
-        print(f"✅ Trip deleted: {trip_title}")
+        log.info("Trip deleted", extra={'user_id': current_user.id, 'trip_id': trip_id})
 
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"❌ ERROR deleting trip: {e}")
+        log.exception("Error deleting trip", extra={'trip_id': trip_id})
         flash("Failed to delete trip.", "danger")
 
     return redirect(url_for('dashboard.show_dashboard'))
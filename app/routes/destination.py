@@ -1,12 +1,13 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for
 from flask_login import login_required
-from app.utils import call_llm_api, get_weather
+from app.utils import call_llm_api, get_weather, llm_budget, weather_query
 from datetime import datetime
 
 destination_bp = Blueprint('destination', __name__)
 
 @destination_bp.route('/destination_search', methods=['GET', 'POST'])
 @login_required
+@llm_budget(8)
 def destination_search():
     destination_info = None
     weather_info = None
@@ -37,7 +38,7 @@ def destination_search():
             )
             destination_info = call_llm_api(llm_prompt)
             
-            weather_info = get_weather(f"{destination_name},IN", start_date, end_date)
+            weather_info = get_weather(weather_query(destination_name), start_date, end_date)
 
             
             flash(f"Information for {destination_name} retrieved.", "success")
@@ -1,7 +1,10 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
 from app.models import User
 from app.extensions import db
+from app.metrics import internal_only
+from app.utils import llm_breaker
+from app.weather_cache import weather_cache
 
 main_bp = Blueprint('main_bp', __name__)
 
@@ -43,6 +46,11 @@ def login():
 
         # Authenticate user
         if user and user.check_password(password):
+            # Transparently upgrade hashes made with older hashing parameters
+            if user.password_needs_rehash():
+                user.set_password(password)
+                db.session.commit()
+
             login_user(user) # Log the user in with Flask-Login
             flash('Login successful.', 'success')
             # Redirect to the dashboard after successful login
@@ -60,3 +68,15 @@ def logout():
     logout_user() # Log the user out with Flask-Login
     flash('You have been logged out.', 'info')
     return render_template('logout.html') # Redirect to the logout confirmation page, which will have a link back to home
+
+@main_bp.route('/status/llm')
+@internal_only
+def llm_status():
+    """Reports the LLM circuit breaker state and counters as JSON."""
+    return jsonify(llm_breaker.snapshot())
+
+@main_bp.route('/status/weather')
+@internal_only
+def weather_cache_status():
+    """Reports weather cache hit/miss counters for this process as JSON."""
+    return jsonify(weather_cache.snapshot())
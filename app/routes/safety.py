@@ -3,10 +3,17 @@ from flask_login import login_required, current_user
 from app.models import SafetyAlert, LocationHistory, GeoFence, TouristStatus
 from app.extensions import db
 from datetime import datetime, timedelta
+import logging
 import math
 from app.utils import send_email
+from app.compression import no_compress
+from app.database import db_route_class, upsert
+from app.metrics import metrics
+from app.positions import positions
+from app.trajectory import trajectory
 
 safety_bp = Blueprint('safety', __name__)
+log = logging.getLogger(__name__)
 
 # --------------------------------------------------
 # SAFETY DASHBOARD
@@ -58,24 +65,13 @@ def panic_button():
         )
         db.session.add(alert)
 
-        status = TouristStatus.query.filter_by(user_id=current_user.id).first()
-        if status:
-            status.current_status = 'emergency'
-            status.priority_level = 'critical'
-            status.last_seen_latitude = latitude
-            status.last_seen_longitude = longitude
-            status.status_changed_at = datetime.utcnow()
-        else:
-            status = TouristStatus(
-                user_id=current_user.id,
-                current_status='emergency',
-                priority_level='critical',
-                last_seen_latitude=latitude,
-                last_seen_longitude=longitude
-            )
-            db.session.add(status)
+        now = datetime.utcnow()
+        mark_emergency(current_user.id, latitude, longitude, now)
 
         db.session.commit()
+        log.warning("Panic button pressed", extra={'user_id': current_user.id, 'safety_alert_id': alert.id})
+        if not no_location:
+            positions.update(current_user.id, latitude, longitude, now)
 
         nearest_station = find_nearest_police_station(latitude, longitude)
 
@@ -113,17 +109,17 @@ PLEASE RESPOND IMMEDIATELY.
                 body=sos_body
             )
 
-            print(f"✅ SOS email sent to {current_user.emergency_contact_email}")
+            log.info("SOS email sent", extra={'user_id': current_user.id})
         else:
-            print("❌ No emergency contact email found")
+            log.error("SOS email not sent: no emergency contact email", extra={'user_id': current_user.id})
 
         return jsonify({
             'success': True,
             'message': 'SOS alert triggered successfully'
         })
 
-    except Exception as e:
-        print(f"❌ SOS ERROR: {e}")
+    except Exception:
+        log.exception("SOS failed", extra={'user_id': current_user.id})
         return jsonify({'success': False, 'message': 'SOS failed'}), 500
 
 
@@ -131,7 +127,9 @@ PLEASE RESPOND IMMEDIATELY.
 # LOCATION UPDATE
 # --------------------------------------------------
 @safety_bp.route('/api/location_update', methods=['POST'])
+@db_route_class('ingest')
 @login_required
+@no_compress  # high-frequency ping with a tiny JSON reply
 def location_update():
     if not current_user.is_real_time_tracking_enabled:
         return jsonify({'error': 'Tracking disabled'}), 403
@@ -140,33 +138,82 @@ def location_update():
         data = request.get_json()
         latitude = float(data.get('latitude'))
         longitude = float(data.get('longitude'))
+        now = datetime.utcnow()
+        try:
+            is_manual_checkin = _optional_bool(data, 'is_manual_checkin')
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
 
-        location = LocationHistory(
+        fix = dict(
             user_id=current_user.id,
             latitude=latitude,
             longitude=longitude,
-            timestamp=datetime.utcnow()
+            timestamp=now,
+            # Optional device readings
+            accuracy=_optional_float(data, 'accuracy'),
+            altitude=_optional_float(data, 'altitude'),
+            speed=_optional_float(data, 'speed'),
+            battery_level=int(data['battery_level']) if data.get('battery_level') is not None else None,
+            is_manual_checkin=is_manual_checkin
         )
-        db.session.add(location)
-
-        status = TouristStatus.query.filter_by(user_id=current_user.id).first()
-        if status:
-            status.last_location_update = datetime.utcnow()
-            status.last_seen_latitude = latitude
-            status.last_seen_longitude = longitude
-
-        db.session.commit()
+        # The newest fix always updates the latest position, stored or not;
+        # it reaches TouristStatus in the next batched flush (see app/positions.py)
+        positions.update(current_user.id, latitude, longitude, now)
+
+        # Redundant fixes are dropped (see app/trajectory.py); manual check-ins are always kept
+        stored = trajectory.add(current_user.id, fix)
+        db.session.add_all([LocationHistory(**row) for row in stored])
+        metrics.inc('location_fixes_received_total', {})
+        metrics.inc('location_fixes_stored_total', {}, len(stored))
+        if stored:
+            db.session.commit()
 
         return jsonify({'success': True})
 
     except Exception as e:
-        print(f"❌ Location error: {e}")
+        log.warning("Location update failed: %s", e, extra={'user_id': current_user.id})
         return jsonify({'success': False}), 500
 
 
 # --------------------------------------------------
 # HELPERS
 # --------------------------------------------------
+def mark_emergency(user_id, latitude, longitude, now):
+    """
+    Puts the tourist's TouristStatus in 'emergency', creating the row if
+    missing. One statement, so concurrent SOS requests cannot race each
+    other to the unique user_id (see benchmarks/upsert_stress.py).
+    """
+    upsert(TouristStatus, {
+        'user_id': user_id,
+        'current_status': 'emergency',
+        'priority_level': 'critical',
+        'last_seen_latitude': latitude,
+        'last_seen_longitude': longitude,
+        'status_changed_at': now,
+        'updated_at': now
+    }, ['user_id'], ['current_status', 'priority_level', 'last_seen_latitude', 'last_seen_longitude',
+                     'status_changed_at', 'updated_at'])
+
+
+def _optional_float(data, key):
+    value = data.get(key)
+    return float(value) if value is not None else None
+
+
+def _optional_bool(data, key):
+    """JSON true/false, or "true"/"1"/"false"/"0" as sent by some devices; anything else is rejected."""
+    value = data.get(key)
+    if value is None or isinstance(value, bool):
+        return bool(value)
+    text = str(value).strip().lower()
+    if text in ('true', '1'):
+        return True
+    if text in ('false', '0'):
+        return False
+    raise ValueError(f"'{key}' must be true or false")
+
+
 def calculate_distance(lat1, lon1, lat2, lon2):
     R = 6371000
     φ1, φ2 = math.radians(lat1), math.radians(lat2)
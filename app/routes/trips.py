@@ -1,11 +1,13 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from datetime import datetime, timedelta
+import logging
 
 from app.models import db, Trip
 from app.utils import send_email
 
 trips_bp = Blueprint('trips', __name__)
+log = logging.getLogger(__name__)
 
 # --------------------------------------------------
 # DASHBOARD
@@ -82,9 +84,9 @@ Have a safe and happy journey 🌍
             flash("Trip created successfully! Email sent.", "success")
             return redirect(url_for('trips.dashboard'))
 
-        except Exception as e:
+        except Exception:
             db.session.rollback()
-            print("❌ CREATE TRIP ERROR:", e)
+            log.exception("Create trip failed", extra={'user_id': current_user.id})
             flash("Failed to create trip.", "danger")
 
     return render_template('create_trip.html')
@@ -138,9 +140,9 @@ Please review your updated itinerary before departure.
             flash("Trip updated successfully. Email sent.", "success")
             return redirect(url_for('trips.dashboard'))
 
-        except Exception as e:
+        except Exception:
             db.session.rollback()
-            print("❌ UPDATE TRIP ERROR:", e)
+            log.exception("Update trip failed", extra={'user_id': current_user.id})
             flash("Failed to update trip.", "danger")
 
     return render_template('edit_trip.html', trip=trip)
@@ -186,9 +188,9 @@ If this was a mistake, you can create a new trip anytime.
 
         flash("Trip deleted successfully. Email sent.", "success")
 
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print("❌ DELETE TRIP ERROR:", e)
+        log.exception("Delete trip failed", extra={'user_id': current_user.id})
         flash("Failed to delete trip.", "danger")
 
     return redirect(url_for('trips.dashboard'))
@@ -0,0 +1,33 @@
+from app.extensions import db
+
+# --------------------------------------------------
+# PRODUCTION SERVER HOOKS (see gunicorn.conf.py)
+# --------------------------------------------------
+# The app is created once in the gunicorn master (preload_app) and the
+# workers are forked from it. Anything holding a socket or file handle that
+# was opened before the fork must be reopened per worker, and background
+# work still queued when a worker is told to stop is finished before it
+# exits.
+
+
+def after_fork(app):
+    """Drops connections a worker inherited from the preloaded master and restarts the log writer."""
+    from app import logs
+    from app.weather_cache import weather_cache
+
+    logs.after_fork()
+    with app.app_context():
+        db.engine.dispose(close=False)
+    weather_cache.reset_connections()
+
+
+def drain():
+    """Finishes queued background jobs before a worker exits."""
+    from app import images, logs
+    from app.metrics import metrics
+    from app.positions import positions
+
+    images.shutdown(wait=True)
+    positions.flush_in_app_context(merge=False)
+    metrics.maybe_flush(force=True)
+    logs.flush()
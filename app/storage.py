@@ -0,0 +1,224 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+
+# --------------------------------------------------
+# CONTENT-ADDRESSED DOCUMENT STORAGE
+# --------------------------------------------------
+# Uploaded files are streamed to a temp file inside the storage root in
+# fixed-size chunks while their SHA-256 is computed, then moved to
+# <root>/<ab>/<cd>/<sha256>. Identical uploads share one blob, names never
+# collide, and the upload is written to disk exactly once: UploadRequest
+# makes Werkzeug's multipart parser write straight into the hashing file
+# instead of spooling to memory or a separate temp file first. It does so
+# only for the endpoints in SPOOL_ENDPOINTS; other forms with file fields
+# (e.g. profile pictures) keep Werkzeug's default handling.
+
+CHUNK_SIZE = 64 * 1024
+SPOOL_ENDPOINTS = frozenset({'dashboard.save_notes_docs'})
+
+# A document's type is read from its leading bytes, never taken from the
+# client's Content-Type. Anything unrecognised, SVG included, is refused.
+SIGNATURES = (
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+SNIFF_BYTES = 16
+BLOB_NAME_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UnsupportedDocument(ValueError):
+    """Raised when an upload's bytes are not one of the allowed document types."""
+
+
+def storage_root():
+    return current_app.config['DOCUMENT_STORAGE_ROOT']
+
+
+def sniff_content_type(head):
+    """Content type recognised from the first SNIFF_BYTES of a file, or None."""
+    for signature, content_type in SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def blob_path(sha256, root=None):
+    """Sharded location of a blob: <root>/ab/cd/abcd…"""
+    return os.path.join(root or storage_root(), sha256[:2], sha256[2:4], sha256)
+
+
+class HashingSpoolFile:
+    """
+    Write-once temp file that hashes and counts bytes as they are written
+    and refuses to grow past `max_size`. commit() moves it into the store;
+    otherwise close() deletes it.
+    """
+
+    def __init__(self, root, max_size=None):
+        tmp_dir = os.path.join(root, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, self.name = tempfile.mkstemp(dir=tmp_dir, prefix='upload-')
+        self._file = os.fdopen(fd, 'w+b')
+        self._hash = hashlib.sha256()
+        self.root = root
+        self.max_size = max_size
+        self.size = 0
+        self.committed = False
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            raise RequestEntityTooLarge()
+        self._hash.update(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def head(self, size=SNIFF_BYTES):
+        """The first `size` bytes written so far."""
+        position = self._file.tell()
+        self._file.seek(0)
+        data = self._file.read(size)
+        self._file.seek(position)
+        return data
+
+    def commit(self):
+        """Moves the file to its content address; returns (sha256, size, path, is_new)."""
+        self._file.flush()
+        sha256 = self.hexdigest()
+        target = blob_path(sha256, self.root)
+        is_new = not os.path.exists(target)
+        if is_new:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(self.name, target)
+        else:
+            os.utime(target)  # about to be referenced again: keep collect_garbage off it
+        self.committed = True
+        self.close()
+        return sha256, self.size, target, is_new
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+        # Left behind when the upload was abandoned or its content already stored
+        if os.path.exists(self.name):
+            os.remove(self.name)
+
+    def __getattr__(self, name):
+        # read/seek/tell/flush etc. for code that consumes the parsed upload
+        if name == '_file':
+            raise AttributeError(name)
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class UploadRequest(Request):
+    """Request class whose multipart file parts stream into HashingSpoolFile on SPOOL_ENDPOINTS."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        root = current_app.config.get('DOCUMENT_STORAGE_ROOT')
+        if not root or self.endpoint not in SPOOL_ENDPOINTS:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return HashingSpoolFile(root, current_app.config.get('MAX_CONTENT_LENGTH'))
+
+
+def store_upload(file_storage, allowed_types=None):
+    """
+    Stores an uploaded FileStorage by content. Returns (sha256, size,
+    content_type, is_new), the content type being sniffed from the bytes.
+    Raises UnsupportedDocument, storing nothing, if that type is not in
+    `allowed_types` (default: DOCUMENT_ALLOWED_TYPES). Uses the
+    already-hashed spool file when the request streamed into one,
+    otherwise copies the stream in CHUNK_SIZE pieces.
+    """
+    if allowed_types is None:
+        allowed_types = current_app.config['DOCUMENT_ALLOWED_TYPES']
+    stream = file_storage.stream
+    if not isinstance(stream, HashingSpoolFile) or stream.committed:
+        spool = HashingSpoolFile(storage_root(), current_app.config.get('MAX_CONTENT_LENGTH'))
+        try:
+            stream.seek(0)
+        except (AttributeError, OSError):
+            pass
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            spool.write(chunk)
+        stream = spool
+    content_type = sniff_content_type(stream.head())
+    if content_type not in allowed_types:
+        stream.close()
+        raise UnsupportedDocument(content_type or 'unrecognised content')
+    sha256, size, _, is_new = stream.commit()
+    return sha256, size, content_type, is_new
+
+
+# --------------------------------------------------
+# GARBAGE COLLECTION (`flask gc-documents`)
+# --------------------------------------------------
+# Deleting a TripDocument (or its trip) leaves the blob behind, since other
+# documents may share it. collect_garbage removes blobs no row references
+# and temp files of abandoned uploads, once untouched for a grace period.
+# Storing an upload whose blob already exists refreshes the blob's mtime,
+# so the grace period also covers the gap between storing a blob and
+# committing the row that references it.
+
+def collect_garbage(referenced, root=None, grace_seconds=24 * 3600, dry_run=False):
+    """
+    Deletes blobs whose sha256 is not in `referenced`, and leftover temp
+    files, that were not modified in the last `grace_seconds`. Returns a
+    report dict; with `dry_run` nothing is deleted.
+    """
+    root = root or storage_root()
+    cutoff = time.time() - grace_seconds
+    tmp_dir = os.path.join(root, 'tmp')
+    report = {'blobs': 0, 'referenced': 0, 'deleted': 0, 'temp_files_deleted': 0, 'bytes_freed': 0}
+    for dirpath, _, filenames in os.walk(root):
+        is_tmp = dirpath == tmp_dir
+        for name in filenames:
+            if not is_tmp:
+                if not BLOB_NAME_RE.match(name):
+                    continue  # not ours
+                report['blobs'] += 1
+                if name in referenced:
+                    report['referenced'] += 1
+                    continue
+            path = os.path.join(dirpath, name)
+            try:
+                stat = os.stat(path)
+                if stat.st_mtime > cutoff:
+                    continue
+                if not dry_run:
+                    os.remove(path)
+            except FileNotFoundError:
+                continue
+            report['temp_files_deleted' if is_tmp else 'deleted'] += 1
+            report['bytes_freed'] += stat.st_size
+    return report
@@ -0,0 +1,251 @@
+import csv
+import json
+import logging
+import re
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.extensions import db
+from app.models import User, EmergencyContact, TouristStatus
+from app.notifications import build_welcome_email
+from app.passwords import password_hasher
+from app.routes.auth import generate_digital_tourist_id
+
+log = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# BULK TOURIST IMPORT (`flask import-tourists`)
+# --------------------------------------------------
+# Tour operators register whole groups at once. Rows are streamed from a
+# CSV or JSONL file, validated, and written in chunks: one multi-row INSERT
+# per table per chunk, with passwords hashed in parallel. Welcome emails are
+# collected and sent in one batch over a single SMTP connection at the end.
+
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on'}
+
+
+class RowError(ValueError):
+    """A row that cannot be imported."""
+
+
+def read_rows(path):
+    """Yields (line_number, row_dict) from a .csv or .jsonl file without loading it whole."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith(('.jsonl', '.ndjson')):
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield line_number, json.loads(line)
+                    except ValueError as e:
+                        yield line_number, RowError(f"invalid JSON: {e}")
+        else:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+
+
+def _text(row, key, max_length, required=False):
+    value = row.get(key)
+    value = str(value).strip() if value is not None else ''
+    if required and not value:
+        raise RowError(f"'{key}' is required")
+    if len(value) > max_length:
+        raise RowError(f"'{key}' is longer than {max_length} characters")
+    return value or None
+
+
+def validate_row(row):
+    """Returns a cleaned row dict, or raises RowError."""
+    if isinstance(row, RowError):
+        raise row
+    if not isinstance(row, dict):
+        raise RowError("row is not an object")
+
+    cleaned = {
+        'name': _text(row, 'name', 100, required=True),
+        'email': _text(row, 'email', 120, required=True).lower(),
+        'password': _text(row, 'password', 256, required=True),
+        'username': _text(row, 'username', 80),
+        'phone_number': _text(row, 'phone_number', 20),
+        'kyc_type': _text(row, 'kyc_type', 50),
+        'kyc_id': _text(row, 'kyc_id', 100),
+        'preferred_language': _text(row, 'preferred_language', 10) or 'en',
+        'destination_area': _text(row, 'destination_area', 200),
+        'emergency_contact_name': _text(row, 'emergency_contact_name', 100),
+        'emergency_contact_number': _text(row, 'emergency_contact_number', 20),
+        'emergency_contact_email': _text(row, 'emergency_contact_email', 120),
+        'emergency_relationship': _text(row, 'emergency_relationship', 50),
+        'agree_tracking': str(row.get('agree_tracking', '')).strip().lower() in TRUE_VALUES,
+    }
+    if not EMAIL_RE.match(cleaned['email']):
+        raise RowError(f"invalid email '{cleaned['email']}'")
+    if len(cleaned['password']) < 8:
+        raise RowError("password must be at least 8 characters")
+    try:
+        cleaned['visit_duration'] = int(row.get('visit_duration') or 7)
+    except (TypeError, ValueError):
+        raise RowError("'visit_duration' must be a whole number of days")
+    if not 1 <= cleaned['visit_duration'] <= 365:
+        raise RowError("'visit_duration' must be between 1 and 365 days")
+    if not cleaned['username'] and not (cleaned['kyc_type'] and cleaned['kyc_id']):
+        raise RowError("either 'username' or 'kyc_type' and 'kyc_id' are required")
+    return cleaned
+
+
+class ImportReport:
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.rejected = []  # (line, reason)
+        self.emails_sent = 0
+        self.started = time.perf_counter()
+
+    def as_dict(self, max_errors=20):
+        elapsed = time.perf_counter() - self.started
+        return {
+            'rows_read': self.read,
+            'imported': self.imported,
+            'rejected': len(self.rejected),
+            'emails_sent': self.emails_sent,
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(self.read / elapsed, 1) if elapsed else 0.0,
+            'errors': [f"line {line}: {reason}" for line, reason in self.rejected[:max_errors]],
+        }
+
+
+def _existing(column, values):
+    values = [v for v in values if v]
+    if not values:
+        return set()
+    return {v for (v,) in db.session.query(column).filter(column.in_(values))}
+
+
+def _insert_chunk(rows, report, seen, welcome_emails):
+    """Validates uniqueness for a chunk of cleaned rows and inserts them."""
+    now = datetime.utcnow()
+    for _, row in rows:
+        # Same rule as auth.register: KYC holders get a Digital Tourist ID as login
+        if row['kyc_type'] and row['kyc_id']:
+            row['username'] = generate_digital_tourist_id(row['kyc_id'], row['name'])
+
+    taken_emails = _existing(User.email, [r['email'] for _, r in rows])
+    taken_usernames = _existing(User.username, [r['username'] for _, r in rows])
+    taken_kyc = _existing(User.kyc_id, [r['kyc_id'] for _, r in rows])
+
+    # Keys claimed by this chunk join `seen` only once the chunk is committed,
+    # so rows of a failed chunk do not block later rows with the same values
+    accepted, claimed = [], set()
+    for line, row in rows:
+        for field, taken in (('email', taken_emails), ('username', taken_usernames), ('kyc_id', taken_kyc)):
+            value = row[field]
+            if value and (value in taken or (field, value) in seen or (field, value) in claimed):
+                report.rejected.append((line, f"{field} '{value}' already registered"))
+                break
+        else:
+            for field in ('email', 'username', 'kyc_id'):
+                if row[field]:
+                    claimed.add((field, row[field]))
+            accepted.append((line, row))
+
+    if not accepted:
+        return
+
+    hashes = password_hasher.hash_many([row['password'] for _, row in accepted])
+    user_rows = []
+    for (_, row), pwhash in zip(accepted, hashes):
+        valid_until = now + timedelta(days=row['visit_duration'])
+        row['id_valid_until'] = valid_until
+        user_rows.append({
+            'name': row['name'],
+            'email': row['email'],
+            'password_hash': pwhash,
+            'username': row['username'],
+            'phone_number': row['phone_number'],
+            'kyc_type': row['kyc_type'],
+            'kyc_id': row['kyc_id'],
+            'emergency_contact_name': row['emergency_contact_name'],
+            'emergency_contact_number': row['emergency_contact_number'],
+            'emergency_contact_email': row['emergency_contact_email'],
+            'id_valid_until': valid_until,
+            'preferred_language': row['preferred_language'],
+            'role': 'tourist',
+            'safety_score': 100.0,
+            'is_real_time_tracking_enabled': row['agree_tracking'],
+            'check_in_location': row['destination_area'],
+            'expected_checkout_date': valid_until,
+        })
+
+    try:
+        ids = db.session.execute(
+            insert(User).returning(User.id, sort_by_parameter_order=True), user_rows
+        ).scalars().all()
+
+        contacts = [{
+            'user_id': user_id,
+            'name': row['emergency_contact_name'],
+            'relationship': row['emergency_relationship'] or 'emergency',
+            'phone_number': row['emergency_contact_number'],
+            'email': row['emergency_contact_email'],
+            'priority_level': 1,
+            'is_active': True,
+            'notification_preferences': 'both',
+        } for user_id, (_, row) in zip(ids, accepted)
+            if row['emergency_contact_name'] and row['emergency_contact_number']]
+        if contacts:
+            db.session.execute(insert(EmergencyContact), contacts)
+
+        db.session.execute(insert(TouristStatus), [{
+            'user_id': user_id,
+            'current_status': 'active',
+            'priority_level': 'normal',
+            'expected_checkin_time': now + timedelta(hours=24),
+            'created_at': now,
+        } for user_id in ids])
+
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        for line, row in accepted:
+            report.rejected.append((line, f"{row['email']}: chunk insert failed ({e.__class__.__name__})"))
+        log.exception("Import chunk failed", extra={'rows': len(accepted)})
+        return
+
+    seen.update(claimed)
+    report.imported += len(accepted)
+    for _, row in accepted:
+        subject, body = build_welcome_email(
+            row['name'], row['username'], row['email'], row['destination_area'], row['id_valid_until']
+        )
+        welcome_emails.append((subject, [row['email']], body))
+
+
+def import_tourists(rows, chunk_size=200, send_emails=True):
+    """
+    Imports (line_number, row) pairs in chunks of `chunk_size`.
+    Returns an ImportReport.
+    """
+    from app.utils import send_bulk_email
+
+    report = ImportReport()
+    seen = set()
+    welcome_emails = []
+    chunk = []
+    for line, raw in rows:
+        report.read += 1
+        try:
+            chunk.append((line, validate_row(raw)))
+        except RowError as e:
+            report.rejected.append((line, str(e)))
+            continue
+        if len(chunk) >= chunk_size:
+            _insert_chunk(chunk, report, seen, welcome_emails)
+            chunk = []
+    if chunk:
+        _insert_chunk(chunk, report, seen, welcome_emails)
+
+    if send_emails and welcome_emails:
+        report.emails_sent = send_bulk_email(welcome_emails)
+    return report
@@ -0,0 +1,145 @@
+import math
+import threading
+import time
+
+# --------------------------------------------------
+# TRAJECTORY COMPRESSION AT INGEST
+# --------------------------------------------------
+# Phones send a fix every few seconds, even while the tourist sits still.
+# location_update passes each fix through an online "opening window"
+# simplifier with a dead band, per user, and stores only the fixes needed to
+# redraw the path within LOCATION_MAX_ERROR_M metres:
+#
+#   anchor   the last stored fix
+#   floater  the newest fix, held back until we know whether it is needed
+#   window   held-back fixes further than the error bound from the anchor
+#            (fixes inside this dead band are within the bound of any segment
+#            starting at the anchor, so they never need checking)
+#
+# When a new fix would put a window fix more than LOCATION_MAX_ERROR_M from
+# the segment anchor → new fix, the floater is stored and becomes the
+# anchor. A fix is always stored when it is a manual check-in, when
+# LOCATION_MAX_GAP_SECONDS have passed since the anchor, or when the window
+# is full, so no stored gap is longer than that while the phone reports.
+# TouristStatus is updated from every fix by the caller, stored or not.
+#
+# State is per process: under several workers each one simplifies the fixes
+# it receives. A held-back floater is lost if the process exits, which
+# costs at most LOCATION_MAX_GAP_SECONDS of detail; idle users' floaters
+# are returned for storing when they are evicted.
+
+EARTH_RADIUS_M = 6371000
+
+
+def _offset_m(origin, fix):
+    """(x, y) metres of `fix` from `origin` (equirectangular; fine at trajectory scale)."""
+    lat0 = math.radians(origin['latitude'])
+    x = math.radians(fix['longitude'] - origin['longitude']) * math.cos(lat0) * EARTH_RADIUS_M
+    y = math.radians(fix['latitude'] - origin['latitude']) * EARTH_RADIUS_M
+    return x, y
+
+
+def segment_distance_m(point, start, end):
+    """Distance in metres from `point` to the segment start → end."""
+    px, py = _offset_m(start, point)
+    ex, ey = _offset_m(start, end)
+    length_sq = ex * ex + ey * ey
+    t = 0.0 if length_sq == 0 else max(0.0, min(1.0, (px * ex + py * ey) / length_sq))
+    return math.hypot(px - t * ex, py - t * ey)
+
+
+class _Track:
+    __slots__ = ('anchor', 'floater', 'window', 'last_seen')
+
+    def __init__(self, fix):
+        self.anchor = fix
+        self.floater = None
+        self.window = []
+        self.last_seen = time.monotonic()
+
+
+class TrajectoryCompressor:
+    """Thread-safe per-process map of user id → track state."""
+
+    def __init__(self, max_error_m=25.0, max_gap_seconds=300, max_window=100, idle_seconds=3600):
+        self.max_error_m = max_error_m
+        self.max_gap_seconds = max_gap_seconds
+        self.max_window = max_window
+        self.idle_seconds = idle_seconds
+        self._tracks = {}
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+        self.received = 0
+        self.stored = 0
+
+    def init_app(self, app):
+        self.max_error_m = app.config.get('LOCATION_MAX_ERROR_M', self.max_error_m)
+        self.max_gap_seconds = app.config.get('LOCATION_MAX_GAP_SECONDS', self.max_gap_seconds)
+
+    @property
+    def enabled(self):
+        return self.max_error_m > 0
+
+    def add(self, user_id, fix):
+        """
+        Takes one fix (a dict of LocationHistory columns, including user_id,
+        latitude, longitude and timestamp) and returns the fixes to store
+        now, oldest first: possibly the held-back fix before it, this one,
+        and the floaters of evicted idle users.
+        """
+        if not self.enabled:
+            return [fix]
+
+        now = time.monotonic()
+        with self._lock:
+            self.received += 1
+            track = self._tracks.get(user_id)
+            if track is None:
+                self._tracks[user_id] = _Track(fix)
+                store = [fix]
+            else:
+                track.last_seen = now
+                store = self._step(track, fix)
+            if now >= self._next_sweep:
+                store.extend(self._evict_idle(now))
+            self.stored += len(store)
+        return store
+
+    def _step(self, track, fix):
+        if fix['timestamp'] < track.anchor['timestamp']:
+            return [fix]  # out of order: store as is, leave the track alone
+
+        store = []
+        if track.window and any(segment_distance_m(held, track.anchor, fix) > self.max_error_m
+                                for held in track.window):
+            store.append(track.floater)
+            track.anchor, track.floater, track.window = track.floater, None, []
+
+        if (fix.get('is_manual_checkin')
+                or (fix['timestamp'] - track.anchor['timestamp']).total_seconds() >= self.max_gap_seconds
+                or len(track.window) >= self.max_window):
+            store.append(fix)
+            track.anchor, track.floater, track.window = fix, None, []
+        else:
+            track.floater = fix
+            x, y = _offset_m(track.anchor, fix)
+            if math.hypot(x, y) > self.max_error_m:
+                track.window.append(fix)
+        return store
+
+    def _evict_idle(self, now):
+        self._next_sweep = now + 60
+        idle = [user_id for user_id, track in self._tracks.items() if now - track.last_seen > self.idle_seconds]
+        floaters = []
+        for user_id in idle:
+            track = self._tracks.pop(user_id)
+            if track.floater is not None:
+                floaters.append(track.floater)
+        return floaters
+
+    def clear(self):
+        with self._lock:
+            self._tracks.clear()
+
+
+trajectory = TrajectoryCompressor()
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import TripBrief
+from app.utils import call_llm_api
+
+log = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# TRIP BRIEF (ONE LLM CALL PER TRIP)
+# --------------------------------------------------
+# A brief bundles packing items, day-by-day itinerary suggestions and safety
+# tips for a trip. It is generated by a single JSON-formatted completion and
+# stored in TripBrief, so trip_summary, itinerary_builder and packing_list
+# are all served from the same cached result.
+#
+# Generation is single-flight per (trip, fingerprint) within a process:
+# concurrent views of a trip wait for the request already asking the LLM
+# and then read its result. The brief is written on its own connection so
+# the page's session is never committed by a render.
+
+BRIEF_FIELDS = {
+    'packing': (3, 20),
+    'itinerary': (1, 14),
+    'safety_tips': (1, 8),
+}
+MAX_ITEM_LENGTH = 300
+
+_generating = {}  # (trip_id, fingerprint) -> [lock, waiters]
+_generating_lock = threading.Lock()
+
+
+class TripBriefError(ValueError):
+    """Raised when an LLM reply cannot be parsed into a valid trip brief."""
+
+
+def _date_str(value):
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d')
+    return str(value or '')[:10]
+
+
+def trip_fingerprint(trip):
+    """Identifies the trip details a brief depends on."""
+    key = f"{trip.destination.strip().lower()}|{_date_str(trip.start_date)}|{_date_str(trip.end_date)}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def build_trip_brief_prompt(trip):
+    return (
+        f"Prepare a travel brief for a trip to {trip.destination} "
+        f"from {_date_str(trip.start_date)} to {_date_str(trip.end_date)}. "
+        "Respond with a single JSON object and nothing else, using exactly these keys:\n"
+        '"packing": a list of 8-12 essential packing items considering the weather and duration,\n'
+        '"itinerary": a list with one string per day formatted as '
+        '"Day X: Activity 1, Activity 2, Activity 3" (3-5 activities per day),\n'
+        '"safety_tips": a list of 3-5 short safety tips specific to the destination.\n'
+        'Example: {"packing": ["passport", "rain jacket"], '
+        '"itinerary": ["Day 1: Explore the old town, Visit the museum, Dinner at a local restaurant"], '
+        '"safety_tips": ["Keep copies of your ID"]}\n'
+        "Do NOT wrap the JSON in markdown and ensure the response is complete."
+    )
+
+
+def _extract_json_object(text):
+    text = text.strip()
+    fenced = re.match(r'^```(?:json)?\s*(.*?)\s*```$', text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    start, end = text.find('{'), text.rfind('}')
+    if start == -1 or end <= start:
+        raise TripBriefError("no JSON object in AI response")
+    try:
+        return json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise TripBriefError(f"malformed JSON in AI response: {e.msg}")
+
+
+def parse_trip_brief(text):
+    """
+    Parses and validates an LLM reply into a brief dict with the keys
+    'packing', 'itinerary' and 'safety_tips', each a list of strings.
+    """
+    if not isinstance(text, str) or not text.strip():
+        raise TripBriefError("empty AI response")
+
+    data = _extract_json_object(text)
+    if not isinstance(data, dict):
+        raise TripBriefError("AI response is not a JSON object")
+
+    brief = {}
+    for field, (min_items, max_items) in BRIEF_FIELDS.items():
+        values = data.get(field)
+        if not isinstance(values, list):
+            raise TripBriefError(f"'{field}' is missing or not a list")
+        items = []
+        for value in values:
+            if not isinstance(value, str):
+                continue
+            value = ' '.join(value.split())[:MAX_ITEM_LENGTH]
+            if field == 'packing':
+                value = value.rstrip('.')
+            if value:
+                items.append(value)
+        if len(items) < min_items:
+            raise TripBriefError(f"'{field}' needs at least {min_items} items, got {len(items)}")
+        brief[field] = items[:max_items]
+    return brief
+
+
+@contextmanager
+def _single_flight(key):
+    """Holds the lock for `key`; one thread at a time generates that brief."""
+    with _generating_lock:
+        entry = _generating.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _generating_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _generating[key]
+
+
+def _cached_brief(trip_id, fingerprint):
+    """The stored brief for this fingerprint, or None."""
+    row = db.session.execute(
+        select(TripBrief.fingerprint, TripBrief.content).where(TripBrief.trip_id == trip_id)
+    ).first()
+    if row is None or row.fingerprint != fingerprint:
+        return None
+    try:
+        return json.loads(row.content)
+    except ValueError:
+        return None  # corrupt row, regenerate
+
+
+def _store_brief(trip_id, fingerprint, content):
+    table = TripBrief.__table__
+    try:
+        with db.engine.begin() as connection:
+            updated = connection.execute(
+                update(table).where(table.c.trip_id == trip_id).values(fingerprint=fingerprint, content=content)
+            ).rowcount
+            if not updated:
+                connection.execute(insert(table).values(trip_id=trip_id, fingerprint=fingerprint, content=content))
+    except IntegrityError as e:
+        # Another worker inserted the brief for this trip first; ours is equivalent.
+        log.warning("Trip brief not cached: %s", e.orig, extra={'trip_id': trip_id})
+
+
+def get_trip_brief(trip):
+    """
+    Returns (brief, error) for a trip. The cached brief is reused while the
+    trip's destination and dates are unchanged; otherwise a new one is
+    requested from the LLM and stored. On failure brief is None and error
+    describes why.
+    """
+    fingerprint = trip_fingerprint(trip)
+    brief = _cached_brief(trip.id, fingerprint)
+    if brief is not None:
+        return brief, None
+
+    with _single_flight((trip.id, fingerprint)):
+        # A request that held the lock before us may have stored it meanwhile
+        brief = _cached_brief(trip.id, fingerprint)
+        if brief is not None:
+            return brief, None
+
+        ai_response = call_llm_api(build_trip_brief_prompt(trip))
+        try:
+            brief = parse_trip_brief(ai_response)
+        except TripBriefError as e:
+            if isinstance(ai_response, str) and ai_response.startswith(('AI unavailable', 'AI error')):
+                return None, ai_response
+            return None, f"AI returned an unusable brief ({e})"
+
+        _store_brief(trip.id, fingerprint, json.dumps(brief))
+    return brief, None
@@ -1,16 +1,24 @@
 import os
-import requests
+import time
 import json
+import logging
 from datetime import datetime
-from flask import current_app
-from flask_mail import Message
+from functools import wraps
+from flask import current_app, g, has_app_context
 from app.extensions import mail
+from app.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.metrics import observe_upstream
+from app.weather_cache import weather_cache, weather_cache_key, STATUS_OK, STATUS_NOT_FOUND
 
+log = logging.getLogger(__name__)
 
 # --------------------------------------------------
 # EMAIL FUNCTION (GMAIL + FLASK-MAIL)
 # --------------------------------------------------
+@observe_upstream('email', failed=lambda sent: not sent)
 def send_email(subject, recipients, body):
+    from flask_mail import Message
+
     try:
         msg = Message(
             subject=subject,
@@ -18,22 +26,96 @@ def send_email(subject, recipients, body):
             body=body
         )
         mail.send(msg)
-        print("✅ EMAIL SENT TO:", recipients)
+        log.info("Email sent", extra={'subject': subject, 'recipient_count': len(recipients)})
         return True
     except Exception as e:
-        print("❌ EMAIL FAILED:", e)
+        # Only the error type: SMTP errors quote the recipient addresses
+        log.error("Email failed: %s", e.__class__.__name__,
+                  extra={'subject': subject, 'recipient_count': len(recipients)})
         return False
 
 
+@observe_upstream('email', failed=lambda sent: sent == 0)
+def send_bulk_email(messages):
+    """
+    Sends many (subject, recipients, body) messages over a single SMTP
+    connection. Returns the number of messages sent.
+    """
+    from flask_mail import Message
+
+    sent = 0
+    try:
+        with mail.connect() as conn:
+            for subject, recipients, body in messages:
+                try:
+                    conn.send(Message(subject=subject, recipients=recipients, body=body))
+                    sent += 1
+                except Exception as e:
+                    log.error("Email failed: %s", e.__class__.__name__,
+                              extra={'subject': subject, 'recipient_count': len(recipients)})
+    except Exception as e:
+        log.error("Bulk email failed: %s", e.__class__.__name__)
+    log.info("Bulk email: %d/%d sent", sent, len(messages))
+    return sent
+
+
 # --------------------------------------------------
 # AI (OPENROUTER)
 # --------------------------------------------------
-def call_llm_api(prompt_text):
-    openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
+llm_breaker = CircuitBreaker('openrouter')
+
+DEFAULT_LLM_TIMEOUT = 30
+LLM_CONNECT_TIMEOUT = 3.05
+DEFAULT_OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+
+def _setting(key, default=None):
+    """Reads a setting from the app config when available, else from the environment."""
+    if has_app_context() and current_app.config.get(key):
+        return current_app.config[key]
+    return os.getenv(key) or default
+
+
+def llm_budget(seconds):
+    """
+    Declares the latency budget (in seconds) that a route allows for each
+    call_llm_api call it makes. Calls slower than the budget are aborted
+    and counted as timeouts by the circuit breaker.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g.llm_budget = seconds
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _llm_timeout(timeout):
+    if timeout is not None:
+        return float(timeout)
+    if has_app_context():
+        if 'llm_budget' in g:
+            return float(g.llm_budget)
+        return float(current_app.config.get('LLM_DEFAULT_TIMEOUT', DEFAULT_LLM_TIMEOUT))
+    return float(DEFAULT_LLM_TIMEOUT)
+
+
+@observe_upstream('llm', failed=lambda reply: reply.startswith(("AI error", "AI unavailable")))
+def call_llm_api(prompt_text, timeout=None):
+    openrouter_api_key = _setting("OPENROUTER_API_KEY")
 
     if not openrouter_api_key:
         return "AI unavailable: OPENROUTER_API_KEY not set"
 
+    budget = _llm_timeout(timeout)
+
+    try:
+        llm_breaker.before_call()
+    except CircuitOpenError as e:
+        log.warning("AI call skipped: %s", e)
+        return "AI unavailable: service is temporarily degraded, please try again shortly"
+
     headers = {
         "Authorization": f"Bearer {openrouter_api_key}",
         "Content-Type": "application/json"
@@ -46,16 +128,27 @@ def call_llm_api(prompt_text):
         "max_tokens": 800
     }
 
+    import requests  # imported on first use to keep process start-up fast
+
+    started = time.monotonic()
     try:
+        base_url = _setting("OPENROUTER_BASE_URL", DEFAULT_OPENROUTER_BASE_URL).rstrip("/")
         response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
+            f"{base_url}/chat/completions",
             headers=headers,
             json=payload,
-            timeout=30
+            timeout=(min(LLM_CONNECT_TIMEOUT, budget), budget)
         )
 
-        print("AI STATUS:", response.status_code)
-        print("AI RAW RESPONSE:", response.text)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("AI response", extra={'status': response.status_code, 'body': response.text})
+
+        if response.status_code == 429 or response.status_code >= 500:
+            llm_breaker.record_failure()
+        elif time.monotonic() - started > budget:
+            llm_breaker.record_failure(timeout=True)
+        else:
+            llm_breaker.record_success()
 
         response.raise_for_status()
         data = response.json()
@@ -65,37 +158,81 @@ def call_llm_api(prompt_text):
 
         return data["choices"][0]["message"]["content"].strip()
 
+    except requests.exceptions.Timeout as e:
+        llm_breaker.record_failure(timeout=True)
+        log.warning("AI timeout after %gs: %s", budget, e)
+        return f"AI unavailable: no response within {budget:g}s"
+
+    except requests.exceptions.ConnectionError as e:
+        llm_breaker.record_failure()
+        log.error("AI connection error: %s", e)
+        return f"AI error: {e}"
+
     except Exception as e:
-        print("❌ AI ERROR:", e)
+        llm_breaker.release()
+        log.exception("AI error")
         return f"AI error: {e}"
 
 
 # --------------------------------------------------
 # WEATHER (OPENWEATHER)
 # --------------------------------------------------
-def get_weather(destination, start_date=None, end_date=None):
+DEFAULT_OPENWEATHER_BASE_URL = "https://api.openweathermap.org/data/2.5"
+WEATHER_TIMEOUT = 5
+
+
+@observe_upstream('openweather')
+def fetch_weather(destination, api_key, base_url, units="metric"):
+    """
+    Queries OpenWeather for current conditions. Returns (status, payload)
+    where status is 'ok' or 'not_found'; raises on transient failures.
+    """
+    import requests
+
+    response = requests.get(
+        f"{base_url.rstrip('/')}/weather",
+        params={"q": destination, "appid": api_key, "units": units},
+        timeout=WEATHER_TIMEOUT
+    )
+    if response.status_code == 404:
+        return STATUS_NOT_FOUND, None
+    response.raise_for_status()
+    data = response.json()
+
+    return STATUS_OK, {
+        "temp": round(data["main"]["temp"]),
+        "feels_like": round(data["main"]["feels_like"]),
+        "condition": data["weather"][0]["description"].title(),
+        "humidity": data["main"]["humidity"],
+        "wind": round(data["wind"]["speed"] * 3.6)  # m/s → km/h
+    }
+
+
+def weather_fetcher(destination, units="metric"):
+    """
+    Binds the current app's OpenWeather settings into a zero-argument fetch
+    callable, so refreshes can run outside the request context.
+    Returns None when no API key is configured.
+    """
     api_key = current_app.config.get("OPENWEATHER_API_KEY")
     if not api_key:
         return None
+    base_url = _setting("OPENWEATHER_BASE_URL", DEFAULT_OPENWEATHER_BASE_URL)
+    return lambda: fetch_weather(destination, api_key, base_url, units)
 
-    url = (
-        f"https://api.openweathermap.org/data/2.5/weather"
-        f"?q={destination}&appid={api_key}&units=metric"
-    )
 
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+def weather_query(destination, country_code="IN"):
+    """Builds the OpenWeather query for a destination name, e.g. 'Shillong' → 'Shillong,IN'."""
+    destination = destination.strip()
+    if "," in destination:
+        return destination
+    return f"{destination},{country_code}"
 
-        return {
-            "temp": round(data["main"]["temp"]),
-            "feels_like": round(data["main"]["feels_like"]),
-            "condition": data["weather"][0]["description"].title(),
-            "humidity": data["main"]["humidity"],
-            "wind": round(data["wind"]["speed"] * 3.6)  # m/s → km/h
-        }
 
-    except Exception as e:
-        print("❌ WEATHER ERROR:", e)
+@observe_upstream('weather', failed=lambda weather: weather is None)
+def get_weather(destination, start_date=None, end_date=None, units="metric"):
+    fetch = weather_fetcher(destination, units)
+    if fetch is None:
         return None
+
+    return weather_cache.get_or_fetch(weather_cache_key(destination, units), fetch)
@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+log = logging.getLogger(__name__)
+# --------------------------------------------------
+# WEATHER CACHE
+# --------------------------------------------------
+# Current conditions per city change slowly, so get_weather caches them in a
+# small SQLite file shared by every worker process on the host. Entries are
+# fresh for `ttl` seconds, then served stale for up to `stale_ttl` more while
+# a background thread refreshes them. Unknown cities are cached as negative
+# entries for `negative_ttl` seconds.
+
+STATUS_OK = 'ok'
+STATUS_NOT_FOUND = 'not_found'
+
+
+def weather_cache_key(destination, units='metric'):
+    """Normalizes a destination query ('  Shillong , IN') into a cache key ('shillong,in|metric')."""
+    parts = [' '.join(part.split()) for part in (destination or '').lower().split(',')]
+    return f"{','.join(p for p in parts if p)}|{units}"
+
+
+class CacheEntry:
+    __slots__ = ('status', 'payload', 'fetched_at')
+
+    def __init__(self, status, payload, fetched_at):
+        self.status = status
+        self.payload = payload
+        self.fetched_at = fetched_at
+
+    def age(self, now=None):
+        return (now or time.time()) - self.fetched_at
+
+
+class WeatherCache:
+    """SQLite-backed weather cache with TTL, stale-while-revalidate and negative caching."""
+
+    def __init__(self, path=None, ttl=600, stale_ttl=3600, negative_ttl=3600):
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.reset_stats()
+
+    def init_app(self, app):
+        self.path = app.config.get('WEATHER_CACHE_PATH') or os.path.join(app.instance_path, 'weather_cache.sqlite')
+        self.ttl = app.config.get('WEATHER_CACHE_TTL', self.ttl)
+        self.stale_ttl = app.config.get('WEATHER_CACHE_STALE_TTL', self.stale_ttl)
+        self.negative_ttl = app.config.get('WEATHER_CACHE_NEGATIVE_TTL', self.negative_ttl)
+        self.reset_connections()
+
+    def reset_connections(self):
+        """Forgets per-thread SQLite connections (e.g. ones inherited across fork)."""
+        self._local = threading.local()
+
+    # --------------------------------------------------
+    # STORE
+    # --------------------------------------------------
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'path', None) != self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS weather_cache ('
+                ' key TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT, fetched_at REAL NOT NULL)'
+            )
+            self._local.conn = conn
+            self._local.path = self.path
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT status, payload, fetched_at FROM weather_cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, payload, fetched_at = row
+        return CacheEntry(status, json.loads(payload) if payload else None, fetched_at)
+
+    def set(self, key, status, payload=None, fetched_at=None):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO weather_cache (key, status, payload, fetched_at) VALUES (?, ?, ?, ?)',
+            (key, status, json.dumps(payload) if payload is not None else None, fetched_at or time.time())
+        )
+
+    def clear(self):
+        self._connection().execute('DELETE FROM weather_cache')
+
+    # --------------------------------------------------
+    # LOOKUP
+    # --------------------------------------------------
+    def get_or_fetch(self, key, fetch):
+        """
+        Returns the weather payload for `key`, or None for unknown cities and
+        failed lookups. `fetch()` must return (status, payload) and raise on
+        transient errors; it is called synchronously on a miss and from a
+        background thread when serving a stale entry. Errors reading or
+        writing the cache file are counted and logged; the lookup then goes
+        to `fetch()` as on a miss.
+        """
+        now = time.time()
+        try:
+            entry = self.get(key)
+        except (sqlite3.Error, OSError, ValueError) as e:
+            # An unreadable cache file is a miss, not a failed lookup
+            self._count('errors')
+            log.warning("Weather cache read failed for %s: %s", key, e)
+            entry = None
+        if entry is not None:
+            age = entry.age(now)
+            if entry.status == STATUS_NOT_FOUND and age < self.negative_ttl:
+                self._count('negative_hits')
+                return None
+            if entry.status == STATUS_OK and age < self.ttl:
+                self._count('hits')
+                return entry.payload
+            if entry.status == STATUS_OK and age < self.ttl + self.stale_ttl:
+                self._count('stale_hits')
+                self.refresh_in_background(key, fetch)
+                return entry.payload
+
+        self._count('misses')
+        try:
+            return self.refresh(key, fetch)
+        except Exception as e:
+            self._count('errors')
+            log.warning("Weather fetch failed for %s: %s", key, e)
+            if entry is not None and entry.status == STATUS_OK:
+                return entry.payload  # Expired, but better than nothing
+            return None
+
+    def refresh(self, key, fetch):
+        """Fetches and stores `key` synchronously; returns the new payload."""
+        status, payload = fetch()
+        try:
+            self.set(key, status, payload)
+        except (sqlite3.Error, OSError) as e:
+            # The fetched payload is still good; only caching it failed
+            self._count('errors')
+            log.warning("Weather cache write failed for %s: %s", key, e)
+        return payload if status == STATUS_OK else None
+
+    def refresh_in_background(self, key, fetch):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.refresh(key, fetch)
+                self._count('refreshes')
+            except Exception as e:
+                self._count('errors')
+                log.warning("Weather refresh failed for %s: %s", key, e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f'weather-refresh-{key}', daemon=True).start()
+
+    def is_fresh(self, key):
+        entry = self.get(key)
+        if entry is None:
+            return False
+        limit = self.ttl if entry.status == STATUS_OK else self.negative_ttl
+        return entry.age() < limit
+
+    # --------------------------------------------------
+    # STATS
+    # --------------------------------------------------
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = dict.fromkeys(
+                ('hits', 'stale_hits', 'negative_hits', 'misses', 'refreshes', 'errors'), 0
+            )
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['stale_hits'] + stats['negative_hits'] + stats['misses']
+        stats['hit_rate'] = round((lookups - stats['misses']) / lookups, 4) if lookups else 0.0
+        stats['ttl'] = self.ttl
+        stats['stale_ttl'] = self.stale_ttl
+        stats['negative_ttl'] = self.negative_ttl
+        return stats
+
+
+weather_cache = WeatherCache()
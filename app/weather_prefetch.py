@@ -0,0 +1,105 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from app.models import Trip
+from app.utils import weather_fetcher, weather_query
+from app.weather_cache import weather_cache, weather_cache_key
+
+log = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# WEATHER PREFETCH (CALL FROM CRON / `flask prefetch-weather`)
+# --------------------------------------------------
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` acquisitions per second across threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def upcoming_trip_destinations(days):
+    """Returns the distinct weather queries for trips starting within `days` days."""
+    today = datetime.utcnow().date()
+    trips = Trip.query.with_entities(Trip.destination).filter(
+        Trip.start_date >= today.strftime('%Y-%m-%d'),
+        Trip.start_date < (today + timedelta(days=days + 1)).strftime('%Y-%m-%d')
+    ).all()
+
+    queries = {}
+    for (destination,) in trips:
+        if destination and destination.strip():
+            query = weather_query(destination)
+            queries.setdefault(weather_cache_key(query), query)
+    return len(trips), queries
+
+
+def prefetch_upcoming_trip_weather(days=3, workers=4, rate=5.0):
+    """
+    Warms the weather cache for every destination with a trip starting in
+    the next `days` days. Destinations are deduplicated and fetched in
+    parallel, at most `rate` OpenWeather calls per second.
+
+    Returns a report with coverage (share of destinations fresh in the
+    cache afterwards) and hit rate (share already fresh before the run).
+    """
+    started = time.monotonic()
+    trip_count, queries = upcoming_trip_destinations(days)
+    report = {
+        'trips': trip_count,
+        'destinations': len(queries),
+        'already_fresh': 0,
+        'warmed': 0,
+        'not_found': 0,
+        'failed': 0,
+    }
+
+    pending = []
+    for key, query in queries.items():
+        if weather_cache.is_fresh(key):
+            report['already_fresh'] += 1
+            continue
+        fetch = weather_fetcher(query)
+        if fetch is None:
+            report['failed'] += 1
+            continue
+        pending.append((key, fetch))
+
+    limiter = RateLimiter(rate)
+
+    def warm(item):
+        key, fetch = item
+        limiter.acquire()
+        try:
+            return 'warmed' if weather_cache.refresh(key, fetch) is not None else 'not_found'
+        except Exception as e:
+            log.warning("Weather prefetch failed for %s: %s", key, e)
+            return 'failed'
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for outcome in pool.map(warm, pending):
+                report[outcome] += 1
+
+    total = report['destinations']
+    fresh_after = report['already_fresh'] + report['warmed'] + report['not_found']
+    report['coverage'] = round(fresh_after / total, 4) if total else 1.0
+    report['hit_rate'] = round(report['already_fresh'] / total, 4) if total else 1.0
+    report['elapsed_seconds'] = round(time.monotonic() - started, 3)
+    return report
@@ -0,0 +1,165 @@
+# bench_ai_routes.py
+"""
+End-to-end latency benchmark for the AI and weather routes.
+
+Starts the local LLM and weather stubs (or uses the ones given with
+--llm-url / --weather-url), seeds a scratch database with one tourist and
+one trip, then drives the Flask app through the AI routes with a fixed
+number of concurrent clients. Prints throughput and latency percentiles
+per route.
+
+    python benchmarks/bench_ai_routes.py --concurrency 8 --requests 200 --llm-latency lognormal:600,0.5
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from common import use_scratch_database, summarize, print_table
+from stub_servers import StubBehaviour, start_stub_server
+
+BENCH_EMAIL = 'bench@travelbuddy.local'
+BENCH_PASSWORD = 'bench-password'
+
+
+def seed(app):
+    from app.extensions import db
+    from app.models import User, Trip
+
+    with app.app_context():
+        db.create_all()
+        user = User(name='Bench Tourist', email=BENCH_EMAIL, username='BENCH001',
+                    role='tourist', is_real_time_tracking_enabled=True)
+        user.set_password(BENCH_PASSWORD)
+        db.session.add(user)
+        db.session.flush()
+        start = date.today() + timedelta(days=7)
+        trip = Trip(title='Bench Trip', destination='Shillong',
+                    start_date=start.strftime('%Y-%m-%d'),
+                    end_date=(start + timedelta(days=3)).strftime('%Y-%m-%d'),
+                    budget=25000.0, user_id=user.id)
+        db.session.add(trip)
+        db.session.commit()
+        return trip.id
+
+
+def build_scenarios(trip_id):
+    """Each scenario is (name, method, path, form_data)."""
+    return [
+        ('destination_search', 'POST', '/destination/destination_search',
+         {'destination': 'Shillong', 'start_date': '', 'end_date': ''}),
+        ('budget_estimator', 'POST', '/budget_estimator',
+         {'transport': '4000', 'lodging': '12000', 'food': '5000', 'activities': '3000'}),
+        ('packing_list', 'GET', f'/packing_list?trip_id={trip_id}', None),
+        ('itinerary_builder', 'GET', f'/itinerary_builder/{trip_id}', None),
+        ('trip_summary', 'GET', f'/trip_summary/{trip_id}', None),
+    ]
+
+
+def make_client(app):
+    client = app.test_client()
+    response = client.post('/auth/login', data={
+        'email': BENCH_EMAIL, 'password': BENCH_PASSWORD, 'login_type': 'tourist'
+    })
+    if response.status_code not in (200, 302):
+        raise RuntimeError(f"Benchmark login failed with HTTP {response.status_code}")
+    return client
+
+
+def run(app, scenarios, concurrency, total_requests):
+    local = threading.local()
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    def one_request(i):
+        if not hasattr(local, 'client'):
+            local.client = make_client(app)
+        name, method, path, data = scenarios[i % len(scenarios)]
+        started = time.perf_counter()
+        response = local.client.open(path, method=method, data=data)
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies[name].append(elapsed)
+            if response.status_code >= 400:
+                errors[name] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_request, range(total_requests)))
+    wall = time.perf_counter() - started
+
+    rows = []
+    for name, _, _, _ in scenarios:
+        row = {'route': name}
+        row.update(summarize(latencies[name], errors[name], wall))
+        rows.append(row)
+    overall = {'route': 'ALL'}
+    overall.update(summarize([l for v in latencies.values() for l in v], sum(errors.values()), wall))
+    rows.append(overall)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=100, help='total requests across all routes')
+    parser.add_argument('--llm-url', help='use an already running LLM stub instead of spawning one')
+    parser.add_argument('--weather-url', help='use an already running weather stub instead of spawning one')
+    parser.add_argument('--llm-latency', default='fixed:300', help='latency spec for the spawned LLM stub (ms)')
+    parser.add_argument('--llm-error-rate', type=float, default=0.0)
+    parser.add_argument('--weather-latency', default='fixed:80', help='latency spec for the spawned weather stub (ms)')
+    parser.add_argument('--weather-error-rate', type=float, default=0.0)
+    parser.add_argument('--database', help='SQLite file to use (default: a temporary file)')
+    parser.add_argument('--json', help='write the results to this file as JSON')
+    parser.add_argument('--verbose', action='store_true', help='keep application output on stdout')
+    args = parser.parse_args()
+
+    servers = []
+    llm_url, weather_url = args.llm_url, args.weather_url
+    if not llm_url:
+        server, llm_url = start_stub_server('llm', behaviour=StubBehaviour(args.llm_latency, args.llm_error_rate))
+        servers.append(server)
+    if not weather_url:
+        server, weather_url = start_stub_server('weather', behaviour=StubBehaviour(args.weather_latency, args.weather_error_rate))
+        servers.append(server)
+
+    db_path = use_scratch_database(args.database)
+    os.environ.update({
+        'OPENROUTER_API_KEY': os.environ.get('OPENROUTER_API_KEY') or 'stub-key',
+        'OPENWEATHER_API_KEY': os.environ.get('OPENWEATHER_API_KEY') or 'stub-key',
+        'OPENROUTER_BASE_URL': llm_url,
+        'OPENWEATHER_BASE_URL': weather_url,
+    })
+
+    from app import create_app
+    app = create_app()
+    trip_id = seed(app)
+    scenarios = build_scenarios(trip_id)
+
+    sink = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with sink:
+        rows = run(app, scenarios, args.concurrency, args.requests)
+
+    print(f"AI routes: {args.requests} requests, concurrency {args.concurrency}, "
+          f"LLM {llm_url}, weather {weather_url}")
+    print_table(rows, ['route', 'requests', 'errors', 'throughput_rps', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'])
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'concurrency': args.concurrency, 'results': rows}, f, indent=2)
+
+    for server in servers:
+        server.shutdown()
+    if not args.database:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
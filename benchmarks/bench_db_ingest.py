@@ -0,0 +1,137 @@
+# bench_db_ingest.py
+"""
+Location-ping ingest throughput per database profile.
+
+Replays the write path of /safety/api/location_update against a scratch
+database for each SQLite profile (SQLITE_PROFILE=default is the stock
+rollback journal; fast adds WAL, synchronous=NORMAL, a larger cache and
+busy_timeout). Each concurrent writer inserts a LocationHistory row,
+updates the tourist's TouristStatus and commits, as the route does. Reports
+commits/sec, commit latency percentiles and lock errors.
+
+    python benchmarks/bench_db_ingest.py --writers 8 --duration 10
+    python benchmarks/bench_db_ingest.py --database-url postgresql://localhost/travelbuddy_bench
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime
+
+from common import use_scratch_database, summarize, print_table
+
+PROFILES = ['default', 'fast']
+
+
+def seed_tourists(app, count):
+    from app.extensions import db
+    from app.models import User, TouristStatus
+
+    with app.app_context():
+        db.create_all()
+        users = [User(name=f'Ingest Tourist {i}', email=f'ingest{i}@travelbuddy.local',
+                      username=f'INGEST{i:05d}', is_real_time_tracking_enabled=True)
+                 for i in range(count)]
+        db.session.add_all(users)
+        db.session.flush()
+        db.session.add_all(TouristStatus(user_id=u.id, current_status='active') for u in users)
+        db.session.commit()
+        return [u.id for u in users]
+
+
+def ping(user_id, rng):
+    """Same statements as safety.location_update."""
+    from app.extensions import db
+    from app.models import LocationHistory, TouristStatus
+
+    latitude = 25.57 + rng.uniform(-0.05, 0.05)
+    longitude = 91.88 + rng.uniform(-0.05, 0.05)
+    db.session.add(LocationHistory(user_id=user_id, latitude=latitude, longitude=longitude,
+                                   timestamp=datetime.utcnow()))
+    status = TouristStatus.query.filter_by(user_id=user_id).first()
+    if status:
+        status.last_location_update = datetime.utcnow()
+        status.last_seen_latitude = latitude
+        status.last_seen_longitude = longitude
+    db.session.commit()
+
+
+def run(app, user_ids, writers, duration):
+    from app.extensions import db
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def writer(n):
+        rng = random.Random(n)
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    ping(rng.choice(user_ids), rng)
+                    failed = False
+                except Exception:
+                    db.session.rollback()
+                    failed = True
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    errors[0] += failed
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=PROFILES)
+    parser.add_argument('--writers', type=int, default=8, help='concurrent writer threads')
+    parser.add_argument('--tourists', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per profile')
+    parser.add_argument('--database-url', help='benchmark this database instead of scratch SQLite files '
+                                               '(tables are created; use an empty database)')
+    parser.add_argument('--json', help='write the results to this file as JSON')
+    args = parser.parse_args()
+
+    from app import create_app
+
+    targets = [('url', args.database_url)] if args.database_url else [(p, None) for p in args.profiles]
+    rows = []
+    for profile, url in targets:
+        path = None
+        if url:
+            os.environ['DATABASE_URL'] = url
+        else:
+            path = use_scratch_database()
+            os.environ['SQLITE_PROFILE'] = profile
+        app = create_app()
+        user_ids = seed_tourists(app, args.tourists)
+        row = {'profile': profile}
+        row.update(run(app, user_ids, args.writers, args.duration))
+        rows.append(row)
+        with app.app_context():
+            from app.extensions import db
+            db.engine.dispose()
+        if path:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+    print(f"Location ingest: {args.writers} writers, {args.tourists} tourists, {args.duration}s per profile")
+    print_table(rows, ['profile', 'requests', 'errors', 'throughput_rps', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'])
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'writers': args.writers, 'results': rows}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# bench_password_hashing.py
+"""
+Login throughput per hashing setting.
+
+For each hash method, verifies passwords through the app's bounded
+hashing pool with 1 and N concurrent callers, and reports logins/sec and
+logins/sec per core. Use it to pick PASSWORD_HASH_METHOD and
+PASSWORD_HASH_WORKERS for the hardware you deploy on.
+
+    python benchmarks/bench_password_hashing.py --duration 3
+    python benchmarks/bench_password_hashing.py --methods pbkdf2:sha256:600000 scrypt:16384:8:1
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import common  # noqa: F401  (puts the project root on sys.path)
+from common import print_table
+from app.passwords import PasswordHasher
+
+DEFAULT_METHODS = [
+    'pbkdf2:sha256:260000',
+    'pbkdf2:sha256:600000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+]
+
+
+def measure(hasher, pwhash, concurrency, duration):
+    deadline = time.perf_counter() + duration
+    counts = []
+    lock = threading.Lock()
+
+    def caller():
+        done = 0
+        while time.perf_counter() < deadline:
+            if not hasher.verify(pwhash, 'correct horse battery staple'):
+                raise RuntimeError('verification failed')
+            done += 1
+        with lock:
+            counts.append(done)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(caller)
+    elapsed = time.perf_counter() - started
+    return sum(counts) / elapsed
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--methods', nargs='+', default=DEFAULT_METHODS)
+    parser.add_argument('--workers', type=int, default=cores, help='hashing pool size (PASSWORD_HASH_WORKERS)')
+    parser.add_argument('--concurrency', type=int, default=cores * 2, help='concurrent login attempts')
+    parser.add_argument('--duration', type=float, default=3.0, help='seconds per measurement')
+    parser.add_argument('--json', help='write the results to this file as JSON')
+    args = parser.parse_args()
+
+    rows = []
+    for method in args.methods:
+        hasher = PasswordHasher(method=method, workers=args.workers)
+        pwhash = hasher.hash('correct horse battery staple')
+        single = measure(hasher, pwhash, 1, args.duration)
+        parallel = measure(hasher, pwhash, args.concurrency, args.duration)
+        busy_cores = min(args.workers, args.concurrency, cores)
+        rows.append({
+            'method': method,
+            'hash_ms': round(1000 / single, 1),
+            'logins_per_sec_1': round(single, 1),
+            f'logins_per_sec_{args.concurrency}': round(parallel, 1),
+            'per_core': round(parallel / busy_cores, 1),
+        })
+
+    print(f"{cores} CPU cores, pool of {args.workers} hashing workers")
+    print_table(rows, list(rows[0].keys()))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'cores': cores, 'workers': args.workers, 'results': rows}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
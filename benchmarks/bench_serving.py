@@ -0,0 +1,172 @@
+# bench_serving.py
+"""
+Throughput of each gunicorn serving profile (see gunicorn.conf.py).
+
+For every profile, starts `gunicorn -c gunicorn.conf.py wsgi:app` on a
+local port against a seeded scratch database and the local LLM/weather
+stubs, then drives it over HTTP for a fixed time with concurrent logged-in
+clients. The traffic mixes I/O-bound AI routes (which wait on the LLM
+stub) with quick dashboard page loads. It reports requests/sec and latency
+percentiles per profile, then sends SIGTERM and times the graceful drain.
+
+    python benchmarks/bench_serving.py --duration 15 --concurrency 32
+    python benchmarks/bench_serving.py --profiles threads io --llm-latency fixed:800
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+import common
+from common import use_scratch_database, summarize, print_table
+from stub_servers import StubBehaviour, start_stub_server
+from bench_ai_routes import BENCH_EMAIL, BENCH_PASSWORD, seed, build_scenarios
+
+PROFILES = ['cpu', 'threads', 'io']
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(profile, port, env, workers=None):
+    env = dict(env, SERVE_PROFILE=profile, BIND=f'127.0.0.1:{port}', ACCESS_LOG='')
+    if workers:
+        env['WEB_CONCURRENCY'] = str(workers)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=common.PROJECT_ROOT, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn ({profile}) exited with code {process.returncode}")
+        try:
+            requests.get(base_url + '/auth/login', timeout=1)
+            return process, base_url
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"gunicorn ({profile}) did not start listening on port {port}")
+
+
+def login(base_url):
+    session = requests.Session()
+    response = session.post(base_url + '/auth/login', data={
+        'email': BENCH_EMAIL, 'password': BENCH_PASSWORD, 'login_type': 'tourist'
+    }, allow_redirects=False, timeout=30)
+    if response.status_code not in (200, 302):
+        raise RuntimeError(f"Benchmark login failed with HTTP {response.status_code}")
+    return session
+
+
+def drive(base_url, scenarios, concurrency, duration):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(offset):
+        session = login(base_url)
+        i = offset
+        while time.perf_counter() < deadline:
+            _, method, path, data = scenarios[i % len(scenarios)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                response = session.request(method, base_url + path, data=data, timeout=60)
+                failed = response.status_code >= 400
+            except requests.RequestException:
+                failed = True
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+
+def stop_gracefully(process):
+    """SIGTERM and time until the master has drained its workers and exited."""
+    started = time.perf_counter()
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    return round(time.perf_counter() - started, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=PROFILES)
+    parser.add_argument('--concurrency', type=int, default=32, help='concurrent HTTP clients')
+    parser.add_argument('--duration', type=float, default=15.0, help='seconds of load per profile')
+    parser.add_argument('--workers', type=int, help='override WEB_CONCURRENCY for every profile')
+    parser.add_argument('--llm-latency', default='fixed:400', help='latency spec for the LLM stub (ms)')
+    parser.add_argument('--weather-latency', default='fixed:80', help='latency spec for the weather stub (ms)')
+    parser.add_argument('--json', help='write the results to this file as JSON')
+    args = parser.parse_args()
+
+    llm_server, llm_url = start_stub_server('llm', behaviour=StubBehaviour(args.llm_latency))
+    weather_server, weather_url = start_stub_server('weather', behaviour=StubBehaviour(args.weather_latency))
+    db_path = use_scratch_database()
+    os.environ.update({
+        'OPENROUTER_API_KEY': 'stub-key',
+        'OPENWEATHER_API_KEY': 'stub-key',
+        'OPENROUTER_BASE_URL': llm_url,
+        'OPENWEATHER_BASE_URL': weather_url,
+        'WEATHER_CACHE_PATH': db_path + '.weather',
+    })
+
+    from app import create_app
+    trip_id = seed(create_app())
+    # The AI routes wait on the LLM stub; the dashboard is a quick local page
+    scenarios = build_scenarios(trip_id) + [('dashboard', 'GET', '/dashboard', None)] * 5
+
+    rows = []
+    for profile in args.profiles:
+        process, base_url = start_gunicorn(profile, free_port(), os.environ, args.workers)
+        try:
+            result = drive(base_url, scenarios, args.concurrency, args.duration)
+        finally:
+            drain_seconds = stop_gracefully(process)
+        row = {'profile': profile}
+        row.update(result)
+        row['drain_s'] = drain_seconds
+        rows.append(row)
+
+    print(f"{os.cpu_count()} CPU cores, {args.concurrency} clients, {args.duration}s per profile, "
+          f"LLM latency {args.llm_latency}")
+    print_table(rows, ['profile', 'requests', 'errors', 'throughput_rps', 'p50_ms', 'p90_ms', 'p99_ms', 'drain_s'])
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'concurrency': args.concurrency, 'results': rows}, f, indent=2)
+
+    llm_server.shutdown()
+    weather_server.shutdown()
+    for path in (db_path, db_path + '.weather'):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
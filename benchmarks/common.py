@@ -0,0 +1,57 @@
+# common.py
+"""Shared helpers for the benchmark scripts in this directory."""
+import math
+import os
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def use_scratch_database(path=None):
+    """
+    Points DATABASE_URL at a throwaway SQLite file unless one is given.
+    Must run before create_app() is called.
+    """
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix='travelbuddy-bench-', suffix='.db')
+        os.close(fd)
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.abspath(path)}"
+    return path
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies, errors=0, elapsed=None):
+    """Summarizes a list of latencies (seconds) into throughput and percentiles in ms."""
+    values = sorted(latencies)
+    count = len(values)
+    summary = {
+        'requests': count,
+        'errors': errors,
+        'error_rate': round(errors / count, 4) if count else 0.0,
+        'p50_ms': round(percentile(values, 50) * 1000, 2),
+        'p90_ms': round(percentile(values, 90) * 1000, 2),
+        'p99_ms': round(percentile(values, 99) * 1000, 2),
+        'max_ms': round(values[-1] * 1000, 2) if values else 0.0,
+    }
+    if elapsed:
+        summary['throughput_rps'] = round(count / elapsed, 2)
+    return summary
+
+
+def print_table(rows, columns):
+    """Prints a list of dicts as a fixed-width table."""
+    widths = {c: max(len(c), *(len(str(r.get(c, ''))) for r in rows)) for c in columns}
+    print('  '.join(c.ljust(widths[c]) for c in columns))
+    print('  '.join('-' * widths[c] for c in columns))
+    for row in rows:
+        print('  '.join(str(row.get(c, '')).ljust(widths[c]) for c in columns))
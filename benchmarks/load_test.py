@@ -0,0 +1,377 @@
+# load_test.py
+"""
+Capacity load test: synthetic tourists driving the safety endpoints.
+
+Seeds a scratch database with N tourists (with tracking on, a TouristStatus
+row and an emergency contact) plus a few authority users, then replays a
+seeded, reproducible traffic schedule against the app:
+
+  ping        POST /safety/api/location_update  every --ping-interval s per tourist
+  dashboard   GET  /dashboard                   on average every --dashboard-interval s
+  panic       POST /safety/api/panic_button     --panic-per-hour per tourist
+  send_sos    POST /send-sos                    --sos-bursts bursts of --burst-size tourists within 1 s
+  heat_map    GET  /authority/api/heat_map      every --heatmap-interval s per authority user
+
+The schedule is open-loop: requests are issued at their planned time by
+--concurrency workers, so when the app cannot keep up the start lag grows
+instead of the offered load quietly dropping. Give several --tourists
+values to step the load up and find where latency or lag breaks down.
+
+Per endpoint it reports throughput, latency percentiles and error rate, and
+saves everything (with the git commit) as JSON for comparison across
+commits. Emails are built but not sent (MAIL_SUPPRESS_SEND).
+
+    python benchmarks/load_test.py --tourists 50 100 200 --duration 30
+    python benchmarks/load_test.py --server gunicorn --profile threads --tourists 200
+    python benchmarks/load_test.py --tourists 100 --compare benchmarks/results/load_test-abc1234.json
+"""
+import argparse
+import json
+import os
+import queue
+import random
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import common
+from common import use_scratch_database, summarize, print_table, percentile
+
+PASSWORD = 'load-test-password'
+CENTRE = (25.5788, 91.8933)  # Shillong
+ENDPOINTS = ['ping', 'dashboard', 'panic', 'send_sos', 'heat_map']
+RESULTS_DIR = os.path.join(common.PROJECT_ROOT, 'benchmarks', 'results')
+
+
+# --------------------------------------------------
+# SEEDING
+# --------------------------------------------------
+def seed(app, tourists, authorities):
+    """Creates the synthetic users through the models; returns (tourist emails, authority emails)."""
+    from app.extensions import db
+    from app.models import User, TouristStatus
+    from app.passwords import password_hasher
+
+    password_hash = password_hasher.hash(PASSWORD)  # one hash shared by every synthetic user
+    with app.app_context():
+        db.create_all()
+        users = [User(name=f'Load Tourist {i}', email=f'tourist{i}@load.travelbuddy.local',
+                      username=f'LOAD{i:06d}', role='tourist', password_hash=password_hash,
+                      is_real_time_tracking_enabled=True, phone_number='+910000000000',
+                      emergency_contact_name='Load Contact',
+                      emergency_contact_email=f'contact{i}@load.travelbuddy.local')
+                 for i in range(tourists)]
+        officers = [User(name=f'Load Officer {i}', email=f'officer{i}@load.travelbuddy.local',
+                         username=f'LOADAUTH{i:03d}', role='authority', password_hash=password_hash)
+                    for i in range(authorities)]
+        db.session.add_all(users + officers)
+        db.session.flush()
+        db.session.add_all(TouristStatus(user_id=u.id, current_status='active',
+                                         last_seen_latitude=CENTRE[0], last_seen_longitude=CENTRE[1])
+                           for u in users)
+        db.session.commit()
+        return [u.email for u in users], [o.email for o in officers]
+
+
+# --------------------------------------------------
+# CLIENTS
+# --------------------------------------------------
+class InProcessClient:
+    """Flask test client: measures the app and database without an HTTP server."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, json=None, form=None):
+        return self.client.open(path, method=method, json=json, data=form).status_code
+
+
+class HttpClient:
+    """requests session against a running server."""
+
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url
+        self.session = requests.Session()
+
+    def request(self, method, path, json=None, form=None):
+        return self.session.request(method, self.base_url + path, json=json, data=form,
+                                    allow_redirects=False, timeout=60).status_code
+
+
+def login(client, email):
+    status = client.request('POST', '/auth/login', form={
+        'email': email, 'password': PASSWORD, 'login_type': 'tourist'
+    })
+    if status not in (200, 302):
+        raise RuntimeError(f"Login failed for {email} with HTTP {status}")
+    return client
+
+
+# --------------------------------------------------
+# TRAFFIC SCHEDULE
+# --------------------------------------------------
+def build_schedule(args, tourists, authorities, rng):
+    """Sorted list of (due_seconds, seq, endpoint, user_index). Same seed → same schedule."""
+    events = []
+
+    def add(due, endpoint, user):
+        if 0 <= due < args.duration:
+            events.append((due, len(events), endpoint, user))
+
+    for user in range(tourists):
+        due = rng.uniform(0, args.ping_interval)
+        while due < args.duration:
+            add(due, 'ping', user)
+            due += args.ping_interval * rng.uniform(0.8, 1.2)
+
+        due = rng.expovariate(1.0 / args.dashboard_interval)
+        while due < args.duration:
+            add(due, 'dashboard', user)
+            due += rng.expovariate(1.0 / args.dashboard_interval)
+
+        if args.panic_per_hour > 0:
+            due = rng.expovariate(args.panic_per_hour / 3600.0)
+            while due < args.duration:
+                add(due, 'panic', user)
+                due += rng.expovariate(args.panic_per_hour / 3600.0)
+
+    for _ in range(args.sos_bursts):
+        start = rng.uniform(0, args.duration)
+        for user in rng.sample(range(tourists), min(args.burst_size, tourists)):
+            add(start + rng.uniform(0, 1.0), 'send_sos', user)
+
+    for officer in range(authorities):
+        due = rng.uniform(0, args.heatmap_interval)
+        while due < args.duration:
+            add(due, 'heat_map', officer)
+            due += args.heatmap_interval
+
+    events.sort()
+    return events
+
+
+def request_for(endpoint, rng, position):
+    """(method, path, json body) for one event; `position` is the tourist's [lat, lng], moved in place."""
+    if endpoint == 'ping':
+        position[0] += rng.gauss(0, 0.0005)
+        position[1] += rng.gauss(0, 0.0005)
+        return 'POST', '/safety/api/location_update', {'latitude': position[0], 'longitude': position[1]}
+    if endpoint == 'dashboard':
+        return 'GET', '/dashboard', None
+    if endpoint == 'panic':
+        return 'POST', '/safety/api/panic_button', {'latitude': position[0], 'longitude': position[1]}
+    if endpoint == 'send_sos':
+        return 'POST', '/send-sos', {'latitude': position[0], 'longitude': position[1],
+                                     'message': 'Load test SOS'}
+    return 'GET', '/authority/api/heat_map', None
+
+
+# --------------------------------------------------
+# RUNNER
+# --------------------------------------------------
+def run_level(args, make_client, tourist_emails, officer_emails):
+    rng = random.Random(args.seed)
+    schedule = build_schedule(args, len(tourist_emails), len(officer_emails), rng)
+
+    tourist_clients = [login(make_client(), email) for email in tourist_emails]
+    officer_clients = [login(make_client(), email) for email in officer_emails]
+    # A device sends one request at a time; its events queue behind each other
+    tourist_locks = [threading.Lock() for _ in tourist_emails]
+    officer_locks = [threading.Lock() for _ in officer_emails]
+    positions = [[CENTRE[0] + rng.uniform(-0.02, 0.02), CENTRE[1] + rng.uniform(-0.02, 0.02)]
+                 for _ in tourist_emails]
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    error_statuses = defaultdict(lambda: defaultdict(int))  # endpoint -> HTTP status (or exception) -> count
+    lags = []
+    lock = threading.Lock()
+    work = queue.Queue()
+
+    def worker(n):
+        local_rng = random.Random(args.seed * 1000 + n)
+        while True:
+            item = work.get()
+            if item is None:
+                return
+            due_at, endpoint, user = item
+            if endpoint == 'heat_map':
+                client, device_lock = officer_clients[user], officer_locks[user]
+            else:
+                client, device_lock = tourist_clients[user], tourist_locks[user]
+            with device_lock:
+                method, path, body = request_for(endpoint, local_rng, positions[user])
+                started = time.perf_counter()
+                try:
+                    status = client.request(method, path, json=body)
+                except Exception as e:
+                    status = e.__class__.__name__
+                elapsed = time.perf_counter() - started
+            failed = not isinstance(status, int) or status >= 400
+            with lock:
+                latencies[endpoint].append(elapsed)
+                errors[endpoint] += failed
+                if failed:
+                    error_statuses[endpoint][str(status)] += 1
+                lags.append(max(0.0, started - due_at))
+
+    workers = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(args.concurrency)]
+    for thread in workers:
+        thread.start()
+
+    started = time.perf_counter()
+    for due, _, endpoint, user in schedule:
+        due_at = started + due
+        delay = due_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        work.put((due_at, endpoint, user))
+    for _ in workers:
+        work.put(None)
+    for thread in workers:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    rows = []
+    for endpoint in ENDPOINTS:
+        if latencies[endpoint]:
+            row = {'endpoint': endpoint}
+            row.update(summarize(latencies[endpoint], errors[endpoint], wall))
+            row['error_statuses'] = dict(error_statuses[endpoint])
+            rows.append(row)
+    overall = {'endpoint': 'ALL'}
+    overall.update(summarize([l for v in latencies.values() for l in v], sum(errors.values()), wall))
+    rows.append(overall)
+
+    lags.sort()
+    return {
+        'tourists': len(tourist_emails),
+        'offered_rps': round(len(schedule) / args.duration, 2),
+        'achieved_rps': overall['throughput_rps'],
+        'start_lag_p50_ms': round(percentile(lags, 50) * 1000, 2),
+        'start_lag_p99_ms': round(percentile(lags, 99) * 1000, 2),
+        'endpoints': rows,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=common.PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(levels, baseline_path):
+    """Prints throughput and p99 change per endpoint against a previous results file."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(level['tourists'], row['endpoint']): row
+                for level in baseline['levels'] for row in level['endpoints']}
+    rows = []
+    for level in levels:
+        for row in level['endpoints']:
+            before = previous.get((level['tourists'], row['endpoint']))
+            if not before:
+                continue
+            rows.append({
+                'tourists': level['tourists'], 'endpoint': row['endpoint'],
+                'rps_before': before['throughput_rps'], 'rps_after': row['throughput_rps'],
+                'p99_before': before['p99_ms'], 'p99_after': row['p99_ms'],
+                'p99_change': f"{(row['p99_ms'] - before['p99_ms']) / before['p99_ms'] * 100:+.1f}%"
+                              if before['p99_ms'] else 'n/a',
+                'err_before': before['error_rate'], 'err_after': row['error_rate'],
+            })
+    print(f"\nCompared with {baseline_path} ({baseline.get('revision', '?')})")
+    if not rows:
+        print("No load level (tourist count) in common with the baseline.")
+        return
+    print_table(rows, ['tourists', 'endpoint', 'rps_before', 'rps_after', 'p99_before', 'p99_after',
+                       'p99_change', 'err_before', 'err_after'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tourists', type=int, nargs='+', default=[100], help='one load level per value')
+    parser.add_argument('--authorities', type=int, default=2, help='authority users polling the heat map')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds per load level')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent request workers')
+    parser.add_argument('--ping-interval', type=float, default=10.0)
+    parser.add_argument('--dashboard-interval', type=float, default=60.0)
+    parser.add_argument('--panic-per-hour', type=float, default=2.0)
+    parser.add_argument('--sos-bursts', type=int, default=2)
+    parser.add_argument('--burst-size', type=int, default=10)
+    parser.add_argument('--heatmap-interval', type=float, default=5.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--server', choices=['inprocess', 'gunicorn'], default='inprocess',
+                        help='drive the app in-process or over HTTP through gunicorn.conf.py')
+    parser.add_argument('--profile', default='threads', help='SERVE_PROFILE for --server gunicorn')
+    parser.add_argument('--workers', type=int, help='WEB_CONCURRENCY for --server gunicorn')
+    parser.add_argument('--json', help='results file (default: benchmarks/results/load_test-<commit>.json)')
+    parser.add_argument('--compare', help='previous results file to compare against')
+    args = parser.parse_args()
+
+    os.environ.update({'MAIL_SUPPRESS_SEND': '1', 'MAIL_USERNAME': 'loadtest@travelbuddy.local'})
+    # Logins are setup, not measured traffic: keep them cheap
+    os.environ.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    from app import create_app
+
+    levels = []
+    for tourists in args.tourists:
+        db_path = use_scratch_database()
+        app = create_app()
+        tourist_emails, officer_emails = seed(app, tourists, args.authorities)
+        process = None
+        try:
+            if args.server == 'gunicorn':
+                from bench_serving import free_port, start_gunicorn, stop_gracefully
+                process, base_url = start_gunicorn(args.profile, free_port(), os.environ, args.workers)
+                make_client = lambda: HttpClient(base_url)
+            else:
+                make_client = lambda: InProcessClient(app)
+            levels.append(run_level(args, make_client, tourist_emails, officer_emails))
+        finally:
+            if process:
+                stop_gracefully(process)
+            from app.positions import positions
+            # Flush now, while the database still exists, rather than from the atexit hook
+            positions.flush_in_app_context(merge=False)
+            positions.clear()
+            with app.app_context():
+                from app.extensions import db
+                db.engine.dispose()
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+
+    for level in levels:
+        print(f"\n{level['tourists']} tourists, {args.authorities} authorities, {args.duration}s "
+              f"({args.server}): offered {level['offered_rps']} req/s, achieved {level['achieved_rps']} req/s, "
+              f"start lag p50 {level['start_lag_p50_ms']} ms / p99 {level['start_lag_p99_ms']} ms")
+        print_table(level['endpoints'], ['endpoint', 'requests', 'errors', 'error_rate', 'throughput_rps',
+                                         'p50_ms', 'p90_ms', 'p99_ms', 'max_ms', 'error_statuses'])
+
+    revision = git_revision()
+    path = args.json or os.path.join(RESULTS_DIR, f'load_test-{revision}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({
+            'revision': revision,
+            'recorded_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'cpu_count': os.cpu_count(),
+            'settings': vars(args),
+            'levels': levels,
+        }, f, indent=2)
+    print(f"\nResults written to {path}")
+
+    if args.compare:
+        compare(levels, args.compare)
+
+
+if __name__ == '__main__':
+    main()
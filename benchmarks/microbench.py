@@ -0,0 +1,332 @@
+# microbench.py
+"""
+Micro-benchmarks for the hot pure-Python helpers.
+
+Each benchmark builds a fixed-size synthetic input once, then times its
+callable in rounds (with the garbage collector off, as timeit does). Each
+round repeats the call until it lasts at least --min-round-ms. It reports
+the per-call min / median / mean / stddev and calls per second.
+
+--save writes the results as JSON. --compare checks them against a saved
+run: a benchmark more than --threshold slower (comparing --stat, the median
+by default; the min is steadier on a noisy machine) is flagged as a
+regression and the exit status is 1, so the check can gate a change.
+
+    python benchmarks/microbench.py --save benchmarks/results/micro-base.json
+    python benchmarks/microbench.py --compare benchmarks/results/micro-base.json --threshold 0.10
+    python benchmarks/microbench.py --filter itinerary --rounds 30
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from common import print_table
+
+BENCHMARKS = []
+
+
+def benchmark(name):
+    """Registers `setup()`, which builds the input and returns the callable to time."""
+    def decorator(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return decorator
+
+
+# --------------------------------------------------
+# SYNTHETIC INPUTS (fixed seed, fixed sizes)
+# --------------------------------------------------
+def _points(count, rng):
+    return [(25.57 + rng.uniform(-0.1, 0.1), 91.88 + rng.uniform(-0.1, 0.1)) for _ in range(count)]
+
+
+def _itinerary_items(count, rng):
+    from app.models import ItineraryItem
+
+    start = date(2025, 3, 1)
+    items = [ItineraryItem(trip_id=1, date=start + timedelta(days=rng.randrange(14)),
+                           time=rng.choice([None, '09:00', '11:30', '14:00', '18:45']),
+                           description=f'Activity {i} at the old town market')
+             for i in range(count)]
+    items.sort(key=lambda item: (item.date, item.time or ''))
+    return items
+
+
+def _tourist():
+    from app.models import User, Trip
+
+    user = User(id=1, name='Asha Lyngdoh', email='asha@example.com', phone_number='+91 98765 43210',
+                emergency_contact_name='Rina Lyngdoh', emergency_contact_email='rina@example.com')
+    trip = Trip(id=7, title='Monsoon in Meghalaya', destination='Shillong, Meghalaya',
+                start_date='2025-07-01', end_date='2025-07-08', budget=42000.0, user_id=1)
+    return user, trip
+
+
+# --------------------------------------------------
+# GEO
+# --------------------------------------------------
+@benchmark('calculate_distance[10k pairs]')
+def bench_calculate_distance():
+    from app.routes.safety import calculate_distance
+
+    rng = random.Random(1)
+    pairs = [a + b for a, b in zip(_points(10000, rng), _points(10000, rng))]
+
+    def run():
+        for lat1, lon1, lat2, lon2 in pairs:
+            calculate_distance(lat1, lon1, lat2, lon2)
+    return run
+
+
+@benchmark('find_nearest_police_station[1k points]')
+def bench_nearest_station():
+    from app.routes.safety import find_nearest_police_station
+
+    points = _points(1000, random.Random(2))
+
+    def run():
+        for lat, lon in points:
+            find_nearest_police_station(lat, lon)
+    return run
+
+
+@benchmark('trajectory.add[5k fixes, 50 tourists]')
+def bench_trajectory():
+    from app.trajectory import TrajectoryCompressor
+
+    rng = random.Random(6)
+    start = datetime(2025, 3, 1, 12, 0)
+    positions = dict(enumerate(_points(50, rng)))
+    fixes = []
+    for i in range(5000):
+        user_id = i % 50
+        lat, lng = positions[user_id]
+        positions[user_id] = lat, lng = lat + rng.gauss(0, 0.0001), lng + rng.gauss(0, 0.0001)
+        fixes.append({'user_id': user_id, 'latitude': lat, 'longitude': lng,
+                      'timestamp': start + timedelta(seconds=i // 50 * 5), 'is_manual_checkin': False})
+
+    def run():
+        compressor = TrajectoryCompressor()
+        for fix in fixes:
+            compressor.add(fix['user_id'], fix)
+    return run
+
+
+# --------------------------------------------------
+# HEAT MAP
+# --------------------------------------------------
+@benchmark('heat_map_points+json[20k locations]')
+def bench_heat_map():
+    from app.models import LocationHistory
+    from app.routes.authority import heat_map_points
+
+    now = datetime(2025, 3, 1, 12, 0)
+    locations = [LocationHistory(user_id=i % 500, latitude=lat, longitude=lon, timestamp=now)
+                 for i, (lat, lon) in enumerate(_points(20000, random.Random(3)))]
+
+    def run():
+        json.dumps(heat_map_points(locations))
+    return run
+
+
+# --------------------------------------------------
+# ITINERARY GROUPING
+# --------------------------------------------------
+@benchmark('group_itinerary_by_day[500 items]')
+def bench_itinerary_builder():
+    from app.routes.dashboard import group_itinerary_by_day
+
+    items = _itinerary_items(500, random.Random(4))
+    return lambda: group_itinerary_by_day(items)
+
+
+@benchmark('itinerary_summary_by_day[500 items]')
+def bench_itinerary_summary():
+    from app.routes.dashboard import itinerary_summary_by_day
+
+    items = _itinerary_items(500, random.Random(5))
+    return lambda: itinerary_summary_by_day(items)
+
+
+# --------------------------------------------------
+# LLM REPLY PARSING
+# --------------------------------------------------
+@benchmark('parse_trip_brief[fenced reply]')
+def bench_parse_trip_brief():
+    from app.trip_brief import parse_trip_brief
+    from stub_servers import LLM_RESPONSES
+
+    reply = f"Here is your brief:\n```json\n{LLM_RESPONSES['travel brief']}\n```"
+    return lambda: parse_trip_brief(reply)
+
+
+@benchmark('weather_cache_key[1k destinations]')
+def bench_weather_cache_key():
+    from app.weather_cache import weather_cache_key
+
+    destinations = [f'  Shillong ,  Meghalaya, India {i % 50}' for i in range(1000)]
+
+    def run():
+        for destination in destinations:
+            weather_cache_key(destination)
+    return run
+
+
+# --------------------------------------------------
+# NOTIFICATION BODIES
+# --------------------------------------------------
+@benchmark('send_sos_email body')
+def bench_sos_email():
+    from app.notifications import send_sos_email
+
+    user, _ = _tourist()
+    outbox = []
+    send = lambda subject, recipients, body: outbox.append(body)
+
+    def run():
+        send_sos_email(send, user, 25.5788, 91.8933)
+        outbox.clear()
+    return run
+
+
+@benchmark('send_trip_created_email body')
+def bench_trip_created_email():
+    from app.notifications import send_trip_created_email
+
+    user, trip = _tourist()
+    outbox = []
+    send = lambda subject, recipients, body: outbox.append(body)
+
+    def run():
+        send_trip_created_email(send, user, trip)
+        outbox.clear()
+    return run
+
+
+@benchmark('build_welcome_email')
+def bench_welcome_email():
+    from app.notifications import build_welcome_email
+
+    valid_until = datetime(2025, 12, 31)
+    return lambda: build_welcome_email('Asha Lyngdoh', 'DT1A2B3C4D5E6F', 'asha@example.com',
+                                       'Shillong', valid_until)
+
+
+# --------------------------------------------------
+# RUNNER
+# --------------------------------------------------
+def measure(fn, rounds, min_round_s):
+    """Per-call seconds for each round."""
+    loops = 1
+    while True:  # calibrate, which also warms up
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - started >= min_round_s:
+            break
+        loops *= 2
+
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            timings.append((time.perf_counter() - started) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return timings, loops
+
+
+def stats(timings, loops):
+    median = statistics.median(timings)
+    return {
+        'min_us': round(min(timings) * 1e6, 3),
+        'median_us': round(median * 1e6, 3),
+        'mean_us': round(statistics.fmean(timings) * 1e6, 3),
+        'stddev_us': round(statistics.stdev(timings) * 1e6, 3) if len(timings) > 1 else 0.0,
+        'ops_per_s': round(1 / median, 1) if median else 0.0,
+        'rounds': len(timings),
+        'loops': loops,
+    }
+
+
+def compare(results, baseline, threshold, stat='median'):
+    """Rows comparing `stat` with a baseline; returns (rows, names of regressions)."""
+    key = f'{stat}_us'
+    rows, regressions = [], []
+    for name, result in results.items():
+        before = baseline['results'].get(name)
+        if not before:
+            rows.append({'benchmark': name, 'after_us': result[key], 'verdict': 'new'})
+            continue
+        change = (result[key] - before[key]) / before[key]
+        verdict = 'ok'
+        if change > threshold:
+            verdict = 'REGRESSION'
+            regressions.append(name)
+        elif change < -threshold:
+            verdict = 'faster'
+        rows.append({'benchmark': name, 'before_us': before[key], 'after_us': result[key],
+                     'change': f'{change * 100:+.1f}%', 'verdict': verdict})
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filter', help='only run benchmarks whose name contains this text')
+    parser.add_argument('--rounds', type=int, default=15)
+    parser.add_argument('--min-round-ms', type=float, default=50.0, help='minimum duration of one round')
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON file of an earlier run to compare against')
+    parser.add_argument('--stat', choices=['median', 'min', 'mean'], default='median',
+                        help='statistic compared with --compare')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='relative slowdown flagged as a regression (0.10 = 10%%)')
+    parser.add_argument('--list', action='store_true', help='list the benchmarks and exit')
+    args = parser.parse_args()
+
+    selected = [(name, setup) for name, setup in BENCHMARKS if not args.filter or args.filter in name]
+    if args.list:
+        print('\n'.join(name for name, _ in selected))
+        return
+
+    results = {}
+    for name, setup in selected:
+        timings, loops = measure(setup(), args.rounds, args.min_round_ms / 1000)
+        results[name] = stats(timings, loops)
+
+    print(f"Python {platform.python_version()} on {platform.machine()}, {args.rounds} rounds")
+    print_table([dict(benchmark=name, **result) for name, result in results.items()],
+                ['benchmark', 'min_us', 'median_us', 'mean_us', 'stddev_us', 'ops_per_s', 'loops'])
+
+    if args.save:
+        from load_test import git_revision
+        with open(args.save, 'w') as f:
+            json.dump({'revision': git_revision(), 'python': platform.python_version(),
+                       'machine': platform.machine(), 'results': results}, f, indent=2)
+        print(f"\nResults written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows, regressions = compare(results, baseline, args.threshold, args.stat)
+        print(f"\nCompared {args.stat} with {args.compare} ({baseline.get('revision', '?')}), "
+              f"threshold {args.threshold * 100:.0f}%")
+        print_table(rows, ['benchmark', 'before_us', 'after_us', 'change', 'verdict'])
+        if regressions:
+            print(f"\nFAIL: {len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,448 @@
+# movement_traces.py
+"""
+Synthetic tourist movement traces: generate, inspect, replay.
+
+`generate` simulates tourists around a set of points of interest. Each
+tourist starts at a hotel near the centre and alternates between dwelling
+at a POI (lognormal dwell time) and travelling to the next one, on foot
+for short hops or by vehicle for longer ones. GPS fixes carry accuracy-
+scaled noise (worse indoors while dwelling), the device battery drains
+with activity and the device goes silent at 0%, signal gaps drop fixes,
+and some arrivals get a manual check-in. The fixes of all tourists are
+merged in time order into a columnar file (app/columnar.py), in row
+groups, so even multi-million-fix traces are generated and replayed in
+constant memory.
+
+`replay` streams a trace into the database (bulk inserts into
+LocationHistory plus the TouristStatus last position), or through the
+ingest API (/safety/api/location_update) in-process or over HTTP. The time
+multiplier is given with --speed: 60 plays one trace hour per minute, and 0
+plays as fast as possible. Trace tourists are mapped to synthetic tourist
+accounts, which are created if missing.
+
+    python benchmarks/movement_traces.py generate --tourists 500 --hours 12 --out /tmp/shillong.trace
+    python benchmarks/movement_traces.py info /tmp/shillong.trace
+    python benchmarks/movement_traces.py replay /tmp/shillong.trace --target db --speed 0 --database /tmp/trace.db
+    python benchmarks/movement_traces.py replay /tmp/shillong.trace --target http --base-url http://127.0.0.1:8000 --speed 120
+"""
+import argparse
+import heapq
+import json
+import math
+import os
+import queue
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import common
+from common import use_scratch_database, percentile, print_table
+
+from app.columnar import ColumnarReader, ColumnarWriter, column
+
+TRACE_SCHEMA = [
+    column('timestamp_ms', 'q', 'delta'),
+    column('tourist', 'i'),
+    column('latitude', 'q', 'delta', scale=1e7),
+    column('longitude', 'q', 'delta', scale=1e7),
+    column('accuracy', 'i', scale=10),   # 0.1 m
+    column('altitude', 'i', scale=10),
+    column('speed', 'i', scale=100),     # 0.01 m/s
+    column('battery_level', 'b'),
+    column('is_manual_checkin', 'B'),
+]
+FIELDS = [spec['name'] for spec in TRACE_SCHEMA]
+
+# Shillong: (name, latitude, longitude, popularity)
+DEFAULT_POIS = [
+    ('Police Bazaar', 25.5760, 91.8825, 5),
+    ("Ward's Lake", 25.5778, 91.8886, 4),
+    ('Don Bosco Museum', 25.5857, 91.9006, 3),
+    ('Cathedral of Mary Help of Christians', 25.5723, 91.8903, 2),
+    ('Shillong Peak', 25.5450, 91.8720, 3),
+    ('Elephant Falls', 25.5355, 91.8218, 4),
+    ('Lady Hydari Park', 25.5669, 91.8869, 2),
+    ('Laitlum Canyons', 25.4640, 91.9600, 2),
+    ('Umiam Lake', 25.6560, 91.8870, 3),
+]
+ALTITUDE_M = 1500.0
+METRES_PER_DEGREE = 111320.0
+
+WALK_SPEED = (1.0, 1.6)      # m/s
+VEHICLE_SPEED = (6.0, 14.0)  # m/s, city and hill roads
+# Battery drain in % per hour by activity
+DRAIN_PER_HOUR = {'dwell': 3.0, 'walk': 6.0, 'vehicle': 5.0}
+# GPS accuracy range in metres by activity (dwelling is mostly indoors)
+ACCURACY_M = {'dwell': (15.0, 60.0), 'walk': (4.0, 12.0), 'vehicle': (8.0, 20.0)}
+
+
+def distance_m(lat1, lon1, lat2, lon2):
+    from app.routes.safety import calculate_distance
+    return calculate_distance(lat1, lon1, lat2, lon2)
+
+
+def offset(lat, lng, north_m, east_m):
+    return (lat + north_m / METRES_PER_DEGREE,
+            lng + east_m / (METRES_PER_DEGREE * math.cos(math.radians(lat))))
+
+
+def parse_poi(spec):
+    """'Name:lat,lng[,popularity]' → (name, lat, lng, popularity)."""
+    name, coords = spec.rsplit(':', 1)
+    parts = [float(p) for p in coords.split(',')]
+    return (name, parts[0], parts[1], parts[2] if len(parts) > 2 else 1.0)
+
+
+# --------------------------------------------------
+# GENERATOR
+# --------------------------------------------------
+def tourist_fixes(index, args, pois, start_ms, rng):
+    """Yields the trace rows of one tourist, in time order."""
+    end_ms = start_ms + int(args.hours * 3600 * 1000)
+    centre_lat = sum(p[1] for p in pois) / len(pois)
+    centre_lng = sum(p[2] for p in pois) / len(pois)
+    hotel = ('hotel',) + offset(centre_lat, centre_lng, rng.gauss(0, 600), rng.gauss(0, 600)) + (0,)
+
+    battery = rng.uniform(55, 100)
+    now = start_ms + int(rng.uniform(0, min(2.0, args.hours / 4) * 3600 * 1000))  # wake-up time
+    place = hotel
+    gap_until = 0
+
+    def fix(lat, lng, activity, speed, manual=False):
+        nonlocal gap_until
+        if now < gap_until:
+            return None
+        if not manual and rng.random() < args.gap_rate * args.interval / 3600.0:
+            gap_until = now + int(rng.uniform(2, 20) * 60 * 1000)  # signal lost for 2-20 min
+            return None
+        accuracy = 10.0 if manual else rng.uniform(*ACCURACY_M[activity])
+        noise = 0.0 if manual else accuracy / 2
+        lat, lng = offset(lat, lng, rng.gauss(0, noise), rng.gauss(0, noise))
+        return (now, index, lat, lng, round(accuracy, 1), round(ALTITUDE_M + rng.gauss(0, noise), 1),
+                round(max(0.0, speed + rng.gauss(0, 0.3)), 2), int(battery), int(manual))
+
+    def advance(activity):
+        nonlocal now, battery
+        step = args.interval * rng.uniform(0.9, 1.1)
+        now += int(step * 1000)
+        battery -= DRAIN_PER_HOUR[activity] * step / 3600.0
+
+    while now < end_ms and battery > 0:
+        # Dwell at the current place
+        dwell_until = now + int(rng.lognormvariate(math.log(args.dwell_minutes * 60), 0.6) * 1000)
+        while now < min(dwell_until, end_ms) and battery > 0:
+            row = fix(place[1], place[2], 'dwell', 0.0)
+            if row:
+                yield row
+            advance('dwell')
+
+        # Travel to the next point of interest
+        candidates = [p for p in pois if p is not place]
+        target = rng.choices(candidates, weights=[p[3] for p in candidates])[0]
+        distance = distance_m(place[1], place[2], target[1], target[2])
+        activity = 'walk' if distance <= args.walk_max_km * 1000 else 'vehicle'
+        speed = rng.uniform(*(WALK_SPEED if activity == 'walk' else VEHICLE_SPEED))
+        departed = now
+        duration_ms = distance / speed * 1000
+        wobble = rng.uniform(-0.15, 0.15) * distance  # roads are not straight lines
+        while now < end_ms and battery > 0 and now - departed < duration_ms:
+            progress = (now - departed) / duration_ms
+            lat = place[1] + (target[1] - place[1]) * progress
+            lng = place[2] + (target[2] - place[2]) * progress
+            lat, lng = offset(lat, lng, 0, wobble * math.sin(math.pi * progress))
+            row = fix(lat, lng, activity, speed)
+            if row:
+                yield row
+            advance(activity)
+
+        place = target
+        if now < end_ms and battery > 0 and rng.random() < args.checkin_probability:
+            row = fix(place[1], place[2], 'dwell', 0.0, manual=True)
+            if row:
+                yield row
+
+
+def generate(args):
+    pois = [parse_poi(p) for p in args.poi] if args.poi else DEFAULT_POIS
+    start = datetime.fromisoformat(args.start) if args.start else datetime.utcnow() - timedelta(hours=args.hours)
+    start_ms = int((start - datetime(1970, 1, 1)).total_seconds() * 1000)
+    meta = {
+        'kind': 'movement-trace', 'tourists': args.tourists, 'hours': args.hours,
+        'start': start.isoformat(timespec='seconds'), 'interval_s': args.interval, 'seed': args.seed,
+        'pois': [list(p) for p in pois],
+    }
+
+    streams = [tourist_fixes(i, args, pois, start_ms, random.Random(args.seed * 100003 + i))
+               for i in range(args.tourists)]
+    started = time.perf_counter()
+    with ColumnarWriter(args.out, TRACE_SCHEMA, meta) as writer:
+        group = []
+        for row in heapq.merge(*streams):
+            group.append(row)
+            if len(group) >= args.group_size:
+                writer.write(dict(zip(FIELDS, zip(*group))))
+                group = []
+        if group:
+            writer.write(dict(zip(FIELDS, zip(*group))))
+    elapsed = time.perf_counter() - started
+
+    size = os.path.getsize(args.out)
+    print(f"{writer.rows} fixes for {args.tourists} tourists over {args.hours} h written to {args.out} "
+          f"({size / 1024:.0f} KiB, {size / max(writer.rows, 1):.1f} bytes/fix) in {elapsed:.1f}s")
+
+
+def info(args):
+    with ColumnarReader(args.trace) as reader:
+        rows = 0
+        first = last = None
+        manual = 0
+        tourists = set()
+        for columns in reader.row_groups(['timestamp_ms', 'tourist', 'is_manual_checkin']):
+            rows += len(columns['timestamp_ms'])
+            first = columns['timestamp_ms'][0] if first is None else first
+            last = columns['timestamp_ms'][-1]
+            manual += sum(columns['is_manual_checkin'])
+            tourists.update(columns['tourist'])
+        print(json.dumps({
+            'meta': reader.meta, 'fixes': rows, 'tourists_with_fixes': len(tourists),
+            'manual_checkins': manual, 'span_hours': round((last - first) / 3600000, 2) if rows else 0,
+        }, indent=2))
+
+
+# --------------------------------------------------
+# REPLAY
+# --------------------------------------------------
+def ensure_trace_tourists(app, count):
+    """User ids for trace tourists 0..count-1, creating the missing synthetic accounts."""
+    from app.extensions import db
+    from app.models import User, TouristStatus
+    from app.passwords import password_hasher
+    from load_test import PASSWORD
+
+    with app.app_context():
+        db.create_all()
+        emails = [f'trace{i}@trace.travelbuddy.local' for i in range(count)]
+        existing = dict(db.session.query(User.email, User.id).filter(User.email.in_(emails)))
+        missing = [i for i, email in enumerate(emails) if email not in existing]
+        if missing:
+            password_hash = password_hasher.hash(PASSWORD)
+            users = [User(name=f'Trace Tourist {i}', email=emails[i], username=f'TRACE{i:06d}',
+                          role='tourist', password_hash=password_hash, is_real_time_tracking_enabled=True)
+                     for i in missing]
+            db.session.add_all(users)
+            db.session.flush()
+            db.session.add_all(TouristStatus(user_id=u.id, current_status='active') for u in users)
+            db.session.commit()
+            existing.update({u.email: u.id for u in users})
+        return [(existing[email], email) for email in emails]
+
+
+def paced(reader, speed, limit):
+    """Yields (due wall-clock time, row dict) for each fix at `speed` × real time."""
+    started = time.perf_counter()
+    first_ms = None
+    count = 0
+    for columns in reader.row_groups():
+        for row in zip(*(columns[name] for name in FIELDS)):
+            row = dict(zip(FIELDS, row))
+            first_ms = row['timestamp_ms'] if first_ms is None else first_ms
+            due = started + (row['timestamp_ms'] - first_ms) / 1000.0 / speed if speed else started
+            yield due, row
+            count += 1
+            if limit and count >= limit:
+                return
+
+
+def replay_to_database(app, reader, tourists, args):
+    """Bulk-inserts fixes in batches; a batch is written early when the next fix is not yet due."""
+    from sqlalchemy import insert, update, bindparam
+    from app.extensions import db
+    from app.models import LocationHistory, TouristStatus
+
+    shift = timedelta(0)
+    if args.shift_to_now:
+        trace_end = datetime.fromisoformat(reader.meta['start']) + timedelta(hours=reader.meta['hours'])
+        shift = datetime.utcnow() - trace_end
+
+    batch = []
+    written = 0
+    batch_seconds = []
+
+    def flush():
+        nonlocal batch, written
+        if not batch:
+            return
+        started = time.perf_counter()
+        latest = {}
+        for row in batch:
+            latest[row['user_id']] = row
+        connection = db.session.connection()
+        connection.execute(insert(LocationHistory.__table__), batch)
+        status = TouristStatus.__table__
+        connection.execute(
+            update(status).where(status.c.user_id == bindparam('b_user_id')).values(
+                last_location_update=bindparam('b_timestamp'),
+                last_seen_latitude=bindparam('b_latitude'),
+                last_seen_longitude=bindparam('b_longitude')),
+            [{'b_user_id': r['user_id'], 'b_timestamp': r['timestamp'],
+              'b_latitude': r['latitude'], 'b_longitude': r['longitude']} for r in latest.values()])
+        db.session.commit()
+        batch_seconds.append(time.perf_counter() - started)
+        written += len(batch)
+        batch = []
+
+    with app.app_context():
+        for due, row in paced(reader, args.speed, args.limit):
+            if batch and (len(batch) >= args.batch_size or due > time.perf_counter()):
+                flush()
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            batch.append({
+                'user_id': tourists[row['tourist']][0],
+                'timestamp': datetime(1970, 1, 1) + timedelta(milliseconds=row['timestamp_ms']) + shift,
+                'latitude': row['latitude'], 'longitude': row['longitude'],
+                'accuracy': row['accuracy'], 'altitude': row['altitude'], 'speed': row['speed'],
+                'battery_level': row['battery_level'], 'is_manual_checkin': bool(row['is_manual_checkin']),
+            })
+        flush()
+
+    batch_seconds.sort()
+    return {'fixes': written, 'errors': 0, 'batches': len(batch_seconds),
+            'batch_p50_ms': round(percentile(batch_seconds, 50) * 1000, 2),
+            'batch_p99_ms': round(percentile(batch_seconds, 99) * 1000, 2)}
+
+
+def replay_to_api(make_client, reader, tourists, args):
+    """POSTs every fix to the ingest API as its tourist, from --concurrency workers."""
+    from load_test import login
+
+    clients = {}
+    client_locks = defaultdict(threading.Lock)
+    latencies, lags = [], []
+    errors = [0]
+    lock = threading.Lock()
+    work = queue.Queue(maxsize=args.concurrency * 100)
+
+    def worker():
+        while True:
+            item = work.get()
+            if item is None:
+                return
+            due, row = item
+            tourist = row['tourist']
+            with client_locks[tourist]:
+                client = clients.get(tourist)
+                if client is None:
+                    client = clients[tourist] = login(make_client(), tourists[tourist][1])
+                body = {name: row[name] for name in ('latitude', 'longitude', 'accuracy', 'altitude',
+                                                     'speed', 'battery_level')}
+                body['is_manual_checkin'] = bool(row['is_manual_checkin'])
+                started = time.perf_counter()
+                try:
+                    failed = client.request('POST', '/safety/api/location_update', json=body) >= 400
+                except Exception:
+                    failed = True
+                elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                lags.append(max(0.0, started - due))
+                errors[0] += failed
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for due, row in paced(reader, args.speed, args.limit):
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        work.put((due, row))
+    for _ in threads:
+        work.put(None)
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    lags.sort()
+    return {'fixes': len(latencies), 'errors': errors[0],
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'start_lag_p99_ms': round(percentile(lags, 99) * 1000, 2)}
+
+
+def replay(args):
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+    if args.database:
+        use_scratch_database(args.database)
+
+    from app import create_app
+    app = create_app()
+
+    with ColumnarReader(args.trace) as reader:
+        tourists = ensure_trace_tourists(app, reader.meta['tourists'])
+        started = time.perf_counter()
+        if args.target == 'db':
+            result = replay_to_database(app, reader, tourists, args)
+        elif args.target == 'app':
+            from load_test import InProcessClient
+            result = replay_to_api(lambda: InProcessClient(app), reader, tourists, args)
+        else:
+            from load_test import HttpClient
+            result = replay_to_api(lambda: HttpClient(args.base_url), reader, tourists, args)
+        elapsed = time.perf_counter() - started
+
+    result = dict({'target': args.target, 'speed': args.speed or 'max', 'seconds': round(elapsed, 2),
+                   'fixes_per_s': round(result['fixes'] / elapsed, 1) if elapsed else 0.0}, **result)
+    print_table([result], list(result))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    gen = commands.add_parser('generate', help='write a synthetic trace')
+    gen.add_argument('--tourists', type=int, default=100)
+    gen.add_argument('--hours', type=float, default=8.0)
+    gen.add_argument('--start', help='UTC start time, ISO format (default: --hours ago)')
+    gen.add_argument('--interval', type=float, default=30.0, help='seconds between GPS fixes')
+    gen.add_argument('--poi', action='append', help="point of interest 'Name:lat,lng[,popularity]' "
+                                                    "(repeatable; default: Shillong sights)")
+    gen.add_argument('--dwell-minutes', type=float, default=40.0, help='median dwell time at a POI')
+    gen.add_argument('--walk-max-km', type=float, default=1.5, help='longer hops are made by vehicle')
+    gen.add_argument('--gap-rate', type=float, default=1.0, help='signal losses per tourist per hour')
+    gen.add_argument('--checkin-probability', type=float, default=0.15, help='manual check-in on arrival')
+    gen.add_argument('--group-size', type=int, default=65536, help='fixes per row group')
+    gen.add_argument('--seed', type=int, default=1)
+    gen.add_argument('--out', required=True)
+    gen.set_defaults(func=generate)
+
+    show = commands.add_parser('info', help='summarize a trace file')
+    show.add_argument('trace')
+    show.set_defaults(func=info)
+
+    play = commands.add_parser('replay', help='stream a trace into the database or the ingest API')
+    play.add_argument('trace')
+    play.add_argument('--target', choices=['db', 'app', 'http'], default='db')
+    play.add_argument('--speed', type=float, default=60.0, help='time multiplier (0 = as fast as possible)')
+    play.add_argument('--database', help='SQLite file to replay into (default: DATABASE_URL)')
+    play.add_argument('--base-url', default='http://127.0.0.1:8000', help='server for --target http')
+    play.add_argument('--batch-size', type=int, default=1000, help='rows per transaction for --target db')
+    play.add_argument('--concurrency', type=int, default=8, help='request workers for --target app/http')
+    play.add_argument('--shift-to-now', action='store_true',
+                      help='--target db: move timestamps so the trace ends now')
+    play.add_argument('--limit', type=int, help='stop after this many fixes')
+    play.add_argument('--json', help='write the replay report to this file')
+    play.set_defaults(func=replay)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
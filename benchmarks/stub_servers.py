@@ -0,0 +1,256 @@
+# stub_servers.py
+"""
+Local stand-ins for the OpenRouter and OpenWeather APIs.
+
+They replay canned responses with a configurable latency and error
+distribution so the AI and weather routes can be benchmarked offline.
+Point the app at them with OPENROUTER_BASE_URL / OPENWEATHER_BASE_URL.
+
+    python benchmarks/stub_servers.py llm --port 8091 --latency lognormal:800,0.4 --error-rate 0.05
+    python benchmarks/stub_servers.py weather --port 8092 --latency uniform:50,200
+
+Latency specs (milliseconds):
+    fixed:MS | uniform:LO,HI | normal:MEAN,SD | lognormal:MEDIAN,SIGMA
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+
+# --------------------------------------------------
+# CANNED RESPONSES
+# --------------------------------------------------
+LLM_RESPONSES = {
+    'travel brief': json.dumps({
+        'packing': ["passport", "phone charger", "comfortable walking shoes", "light jacket",
+                    "sunscreen", "reusable water bottle", "toiletries", "rain poncho", "power bank"],
+        'itinerary': ["Day 1: Visit the old town, Try local street food, Sunset viewpoint",
+                      "Day 2: Guided museum tour, Botanical garden walk, Evening cultural show",
+                      "Day 3: Day hike to the waterfall, Village market, Farewell dinner"],
+        'safety_tips': ["Keep digital copies of your ID", "Use registered taxis after dark",
+                        "Share your itinerary with your emergency contact"],
+    }),
+    'packing list': (
+        "passport, phone charger, comfortable walking shoes, light jacket, sunscreen, "
+        "reusable water bottle, toiletries, rain poncho, power bank, first-aid kit"
+    ),
+    'daily activities': (
+        "Day 1: Visit the old town, Try local street food, Sunset viewpoint\n"
+        "Day 2: Guided museum tour, Botanical garden walk, Evening cultural show\n"
+        "Day 3: Day hike to the waterfall, Village market, Farewell dinner"
+    ),
+    'budget': (
+        "Lodging is the largest share of this budget, so booking a guesthouse or a longer-stay "
+        "discount can cut it noticeably. Use shared transport for intra-city travel and eat at "
+        "local eateries to keep food costs down. Prioritise one or two paid activities and fill "
+        "the rest of the time with free walking tours."
+    ),
+    'overview': (
+        "This destination blends lively markets, historic temples and green hills. Visitors come "
+        "for the food, the festivals and the easy day trips into the countryside. Dress modestly "
+        "at religious sites and carry cash for smaller shops. Evenings are cooler, so pack a layer."
+    ),
+}
+DEFAULT_LLM_RESPONSE = "This is a canned response from the local LLM stub."
+
+UNKNOWN_CITIES = {'atlantis', 'nowhere', 'el dorado'}
+
+
+def pick_llm_response(prompt, responses=LLM_RESPONSES):
+    prompt = prompt.lower()
+    for keyword, content in responses.items():
+        if keyword in prompt:
+            return content
+    return DEFAULT_LLM_RESPONSE
+
+
+def weather_payload(city):
+    seed = sum(ord(c) for c in city)
+    return {
+        'name': city.title(),
+        'main': {'temp': 18 + seed % 15, 'feels_like': 17 + seed % 15, 'humidity': 40 + seed % 50},
+        'weather': [{'description': ('clear sky', 'scattered clouds', 'light rain')[seed % 3]}],
+        'wind': {'speed': 1.5 + (seed % 7) * 0.5},
+    }
+
+
+# --------------------------------------------------
+# LATENCY / ERROR DISTRIBUTIONS
+# --------------------------------------------------
+def parse_latency(spec):
+    """Turns a latency spec string into a zero-argument sampler returning seconds."""
+    kind, _, args = (spec or 'fixed:0').partition(':')
+    values = [float(v) for v in args.split(',') if v.strip()] or [0.0]
+    if kind == 'fixed':
+        sampler = lambda: values[0]
+    elif kind == 'uniform':
+        sampler = lambda: random.uniform(values[0], values[1])
+    elif kind == 'normal':
+        sampler = lambda: random.gauss(values[0], values[1])
+    elif kind == 'lognormal':
+        sampler = lambda: random.lognormvariate(math.log(max(values[0], 1e-3)), values[1])
+    else:
+        raise ValueError(f"Unknown latency distribution: {kind}")
+    return lambda: max(0.0, sampler()) / 1000.0
+
+
+class StubBehaviour:
+    """Shared latency/error settings, adjustable while the server runs."""
+
+    def __init__(self, latency='fixed:0', error_rate=0.0, error_statuses=(500, 503),
+                 hang_rate=0.0, hang_seconds=60.0, responses=None):
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.responses = responses or LLM_RESPONSES
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def next_outcome(self):
+        """Returns (delay_seconds, error_status_or_None) for the next request."""
+        with self.lock:
+            self.requests += 1
+        roll = random.random()
+        if roll < self.hang_rate:
+            return self.hang_seconds, None
+        if roll < self.hang_rate + self.error_rate:
+            with self.lock:
+                self.errors += 1
+            return self.sample_latency(), random.choice(self.error_statuses)
+        return self.sample_latency(), None
+
+
+# --------------------------------------------------
+# HANDLERS
+# --------------------------------------------------
+class _StubHandler(BaseHTTPRequestHandler):
+    behaviour = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up (e.g. its latency budget expired)
+
+    def _delay_or_error(self):
+        delay, error_status = self.behaviour.next_outcome()
+        time.sleep(delay)
+        if error_status:
+            self._send_json(error_status, {'error': {'message': 'injected stub error', 'code': error_status}})
+            return True
+        return False
+
+
+class LLMStubHandler(_StubHandler):
+    """Mimics POST /chat/completions of the OpenRouter API."""
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        request_body = json.loads(self.rfile.read(length) or b'{}')
+        if not urlparse(self.path).path.endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'not found'}})
+            return
+        if self._delay_or_error():
+            return
+        messages = request_body.get('messages') or [{}]
+        prompt = messages[-1].get('content', '')
+        content = pick_llm_response(prompt, self.behaviour.responses)
+        self._send_json(200, {
+            'id': 'stub-completion',
+            'model': request_body.get('model', 'stub'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}}],
+        })
+
+
+class WeatherStubHandler(_StubHandler):
+    """Mimics GET /weather of the OpenWeather current-weather API."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if not url.path.endswith('/weather'):
+            self._send_json(404, {'cod': '404', 'message': 'not found'})
+            return
+        if self._delay_or_error():
+            return
+        city = (parse_qs(url.query).get('q') or [''])[0].split(',')[0].strip().lower()
+        if not city or city in UNKNOWN_CITIES:
+            self._send_json(404, {'cod': '404', 'message': 'city not found'})
+            return
+        self._send_json(200, weather_payload(city))
+
+
+HANDLERS = {'llm': LLMStubHandler, 'weather': WeatherStubHandler}
+
+
+def start_stub_server(kind, host='127.0.0.1', port=0, behaviour=None):
+    """
+    Starts a stub server in a daemon thread.
+    Returns (server, base_url); call server.shutdown() to stop it.
+    """
+    handler = type(f'{kind.title()}Handler', (HANDLERS[kind],), {'behaviour': behaviour or StubBehaviour()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://{host}:{server.server_port}"
+    if kind == 'llm':
+        base_url += '/api/v1'
+    else:
+        base_url += '/data/2.5'
+    return server, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('kind', choices=sorted(HANDLERS))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--latency', default='fixed:0', help='latency distribution in ms')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with an error')
+    parser.add_argument('--error-status', default='500,503', help='comma-separated statuses used for errors')
+    parser.add_argument('--hang-rate', type=float, default=0.0, help='fraction of requests that stall')
+    parser.add_argument('--hang-seconds', type=float, default=60.0)
+    parser.add_argument('--responses', help='JSON file mapping prompt keywords to canned LLM replies')
+    args = parser.parse_args()
+
+    responses = None
+    if args.responses:
+        with open(args.responses) as f:
+            responses = json.load(f)
+
+    behaviour = StubBehaviour(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_statuses=[int(s) for s in args.error_status.split(',')],
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        responses=responses
+    )
+    server, base_url = start_stub_server(args.kind, args.host, args.port, behaviour)
+    env_var = 'OPENROUTER_BASE_URL' if args.kind == 'llm' else 'OPENWEATHER_BASE_URL'
+    print(f"{args.kind} stub listening; export {env_var}={base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+# upsert_stress.py
+"""
+Concurrency check for the TouristStatus writes: parallel SOS and location
+requests for the same tourists.
+
+Seeds --tourists tourists, then per round deletes their TouristStatus rows
+(so the first writes race to insert them) and releases --requests panic
+presses and --requests location pings per tourist at the same moment from
+separate logged-in clients. After each round it flushes the latest
+positions and checks:
+
+  - no request failed (a lost unique-constraint race shows up as HTTP 500)
+  - every tourist has exactly one TouristStatus row, in 'emergency' status
+  - every tourist has one SafetyAlert per panic press
+
+The rounds give no coverage of the race on SQLite: the SafetyAlert insert
+takes the database write lock before TouristStatus is touched, so requests
+are serialized. Run them against PostgreSQL (--database-url) to exercise
+real concurrency. tests/test_upsert_race.py covers the race itself on
+either database with a deterministic interleaving of two sessions.
+
+The exit status is 1 if any check fails.
+
+    python benchmarks/upsert_stress.py --tourists 20 --requests 4 --rounds 5
+    python benchmarks/upsert_stress.py --server gunicorn --workers 4
+    python benchmarks/upsert_stress.py --server gunicorn --database-url postgresql://localhost/travelbuddy_stress
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from common import use_scratch_database, print_table
+from load_test import seed, login, InProcessClient, HttpClient, CENTRE
+
+
+def fire(client, kind, barrier, statuses, lock):
+    if kind == 'panic':
+        path, body = '/safety/api/panic_button', {'latitude': CENTRE[0], 'longitude': CENTRE[1]}
+    else:
+        path, body = '/safety/api/location_update', {'latitude': CENTRE[0] + 0.001, 'longitude': CENTRE[1]}
+    barrier.wait()
+    try:
+        status = client.request('POST', path, json=body)
+    except Exception:
+        status = 'exception'
+    with lock:
+        statuses[kind][status] += 1
+
+
+def check_round(app, user_ids, panics_per_tourist):
+    from sqlalchemy import func, select
+    from app.extensions import db
+    from app.models import SafetyAlert, TouristStatus
+
+    with app.app_context():
+        rows = db.session.execute(
+            select(TouristStatus.user_id, func.count(), func.min(TouristStatus.current_status))
+            .where(TouristStatus.user_id.in_(user_ids)).group_by(TouristStatus.user_id)).all()
+        alerts = dict(db.session.execute(
+            select(SafetyAlert.user_id, func.count()).where(SafetyAlert.user_id.in_(user_ids))
+            .group_by(SafetyAlert.user_id)).all())
+    by_user = {user_id: (count, status) for user_id, count, status in rows}
+    return {
+        'missing_status': sum(1 for u in user_ids if u not in by_user),
+        'duplicate_status': sum(1 for count, _ in by_user.values() if count > 1),
+        'not_emergency': sum(1 for _, status in by_user.values() if status != 'emergency'),
+        'alert_mismatch': sum(1 for u in user_ids if alerts.get(u, 0) != panics_per_tourist),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tourists', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=4, help='panic presses and location pings per tourist per round')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--server', choices=['inprocess', 'gunicorn'], default='inprocess')
+    parser.add_argument('--profile', default='threads', help='SERVE_PROFILE for --server gunicorn')
+    parser.add_argument('--workers', type=int, help='WEB_CONCURRENCY for --server gunicorn')
+    parser.add_argument('--database-url', help='use this (empty, disposable) database instead of a scratch SQLite file')
+    args = parser.parse_args()
+
+    os.environ.update({'MAIL_SUPPRESS_SEND': '1', 'MAIL_USERNAME': 'loadtest@travelbuddy.local',
+                       'POSITION_FLUSH_SECONDS': '0.2'})
+    os.environ.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+    os.environ.setdefault('LOG_LEVEL', 'ERROR')
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+        db_path = None
+    else:
+        db_path = use_scratch_database()
+
+    from sqlalchemy import delete, select
+    from app import create_app
+    from app.extensions import db
+    from app.models import SafetyAlert, TouristStatus, User
+    from app.positions import positions
+
+    app = create_app()
+    emails, _ = seed(app, args.tourists, 0)
+    with app.app_context():
+        user_ids = list(db.session.scalars(select(User.id).where(User.email.in_(emails))))
+
+    process = None
+    try:
+        if args.server == 'gunicorn':
+            from bench_serving import free_port, start_gunicorn, stop_gracefully
+            process, base_url = start_gunicorn(args.profile, free_port(), os.environ, args.workers)
+            make_client = lambda: HttpClient(base_url)
+        else:
+            make_client = lambda: InProcessClient(app)
+        # One logged-in client per request, each fired from its own thread
+        jobs = [(login(make_client(), email), kind)
+                for email in emails for kind in ('panic', 'ping') for _ in range(args.requests)]
+
+        results, failed = [], False
+        for round_number in range(1, args.rounds + 1):
+            with app.app_context():
+                db.session.execute(delete(TouristStatus).where(TouristStatus.user_id.in_(user_ids)))
+                db.session.execute(delete(SafetyAlert).where(SafetyAlert.user_id.in_(user_ids)))
+                db.session.commit()
+
+            statuses = {'panic': Counter(), 'ping': Counter()}
+            lock = threading.Lock()
+            barrier = threading.Barrier(len(jobs))
+            threads = [threading.Thread(target=fire, args=(client, kind, barrier, statuses, lock))
+                       for client, kind in jobs]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+            # Let the position flushers (in-process or in the workers) catch up before checking
+            if process is None:
+                positions.flush_in_app_context()
+            else:
+                time.sleep(1.0)
+            checks = check_round(app, user_ids, args.requests)
+            errors = sum(n for store in statuses.values() for status, n in store.items() if status != 200)
+            row = {'round': round_number, 'requests': len(jobs), 'seconds': round(elapsed, 2),
+                   'errors': errors, **checks,
+                   'statuses': ' '.join(f'{kind}:{status}x{n}' for kind, store in statuses.items()
+                                        for status, n in sorted(store.items(), key=str))}
+            failed = failed or errors or any(checks.values())
+            results.append(row)
+    finally:
+        if process:
+            stop_gracefully(process)
+        positions.clear()
+        with app.app_context():
+            db.engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if db_path and os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    print_table(results, ['round', 'requests', 'seconds', 'errors', 'missing_status', 'duplicate_status',
+                          'not_emergency', 'alert_mismatch', 'statuses'])
+    if failed:
+        print("\nFAIL: concurrent SOS/location writes lost requests or left TouristStatus inconsistent")
+        sys.exit(1)
+    print("\nOK: every request succeeded and every tourist has one TouristStatus row in 'emergency'")
+
+
+if __name__ == '__main__':
+    main()
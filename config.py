@@ -1,21 +1,156 @@
 import os
 from dotenv import load_dotenv
 
+# The only place .env is read
 load_dotenv()
 
+# Route classes and their PostgreSQL statement timeouts in ms (0 = no limit),
+# applied per request by app/database.py
+DEFAULT_STATEMENT_TIMEOUTS = {
+    'ingest': 2000,       # location pings: must be quick or dropped
+    'interactive': 5000,  # regular pages and forms
+    'report': 30000,      # admin/authority listings and exports
+}
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def engine_options_from_env(database_uri):
+    """SQLALCHEMY_ENGINE_OPTIONS built from DB_POOL_* environment variables."""
+    is_sqlite = database_uri.startswith('sqlite')
+    options = {
+        # A local SQLite file cannot drop the connection, so skip the ping there
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', not is_sqlite),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+    }
+    if not is_sqlite:
+        options.update({
+            'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+            'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        })
+    return options
+
+
+def parse_statement_timeouts(spec):
+    """'ingest=2000,report=60000' → dict merged over the defaults."""
+    timeouts = dict(DEFAULT_STATEMENT_TIMEOUTS)
+    for part in (spec or '').split(','):
+        if '=' in part:
+            name, ms = part.split('=', 1)
+            timeouts[name.strip()] = int(ms)
+    return timeouts
+
+
 class Config:
-    SECRET_KEY = os.getenv("SECRET_KEY")
-    SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-    OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-    OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
+    """
+    Application settings, read from the environment when instantiated so each
+    create_app() call sees the current environment. Paths that default to a
+    location inside the app (instance folder, static folder) are left as None
+    here and filled in by create_app.
+    """
+
+    def __init__(self):
+        self.SECRET_KEY = os.getenv("SECRET_KEY", "a_very_secret_key_for_dev")
+        self.SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///travelbuddy.db")
+        self.SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+        # Engine pool (DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING),
+        # SQLite pragma profile ('fast' or 'default') and PostgreSQL statement timeouts per route class
+        self.SQLALCHEMY_ENGINE_OPTIONS = engine_options_from_env(self.SQLALCHEMY_DATABASE_URI)
+        self.SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "fast")
+        self.SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", 65536))
+        self.SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+        self.DB_STATEMENT_TIMEOUTS = parse_statement_timeouts(os.getenv("DB_STATEMENT_TIMEOUTS"))
+
+        # Upstream APIs
+        self.OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+        self.OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
+        self.OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+        self.OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org/data/2.5")
+
+        # Password hashing: Werkzeug method string (e.g. 'scrypt:32768:8:1', 'pbkdf2:sha256:600000')
+        self.PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+        self.PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 0)) or None
+
+        # Per-process identity cache for the login user_loader (seconds; 0 disables)
+        self.USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 30))
+
+        # Weather cache (seconds): fresh TTL, extra stale-while-revalidate window, unknown-city TTL
+        self.WEATHER_CACHE_TTL = int(os.getenv("WEATHER_CACHE_TTL", 600))
+        self.WEATHER_CACHE_STALE_TTL = int(os.getenv("WEATHER_CACHE_STALE_TTL", 3600))
+        self.WEATHER_CACHE_NEGATIVE_TTL = int(os.getenv("WEATHER_CACHE_NEGATIVE_TTL", 3600))
+        self.WEATHER_CACHE_PATH = os.getenv("WEATHER_CACHE_PATH")
+
+        # LLM circuit breaker and default latency budget (routes may declare their own)
+        self.LLM_DEFAULT_TIMEOUT = float(os.getenv("LLM_DEFAULT_TIMEOUT", 30))
+        self.LLM_BREAKER_FAILURE_THRESHOLD = float(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", 0.5))
+        self.LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", 20))
+        self.LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", 5))
+        self.LLM_BREAKER_OPEN_SECONDS = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", 30))
+        self.LLM_BREAKER_HALF_OPEN_CALLS = int(os.getenv("LLM_BREAKER_HALF_OPEN_CALLS", 1))
+
+        # Gmail SMTP settings
+        self.MAIL_SERVER = os.getenv("MAIL_SERVER", "smtp.gmail.com")
+        self.MAIL_PORT = int(os.getenv("MAIL_PORT", 587))
+        self.MAIL_USE_TLS = True
+        self.MAIL_USE_SSL = False
+        self.MAIL_USERNAME = os.getenv("MAIL_USERNAME")
+        self.MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
+        self.MAIL_DEFAULT_SENDER = ("TravelBuddy SOS", os.getenv("MAIL_USERNAME"))
+        # Build messages but do not connect to SMTP (load tests, local runs)
+        self.MAIL_SUPPRESS_SEND = os.getenv("MAIL_SUPPRESS_SEND", "false").lower() in ("1", "true", "yes")
+
+        # Profile pictures
+        self.UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER") or os.path.join(os.getcwd(), 'uploads')
+
+        # Trip documents: content-addressed store, streamed uploads with a size cap
+        self.DOCUMENT_STORAGE_ROOT = os.getenv("DOCUMENT_STORAGE_ROOT")  # default: <instance>/documents
+        self.MAX_CONTENT_LENGTH = int(os.getenv("MAX_UPLOAD_MB", 16)) * 1024 * 1024
+        self.DOCUMENT_ALLOWED_TYPES = ('application/pdf', 'image/png', 'image/jpeg', 'image/gif', 'image/webp')
+
+        # Fingerprinted static assets written by `flask build-assets`
+        self.ASSET_BUILD_DIR = os.getenv("ASSET_BUILD_DIR")  # default: <static>/dist
+
+        # Response compression for HTML/JSON above COMPRESS_MIN_SIZE bytes (gzip level 1-9)
+        self.COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+        self.COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", 6))
+        self.COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", 4))
+
+        # Metrics at /metrics: per-process snapshot directory for multi-worker servers,
+        # and an optional bearer token required to scrape
+        self.METRICS_DIR = os.getenv("METRICS_DIR")
+        self.METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", 5))
+        self.METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+        # Logging: level of the 'app' logger, per-module overrides ('app.utils=DEBUG,...'),
+        # sampling of DEBUG/INFO records per module ('app.routes.dashboard=0.1'), json or text
+        self.LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+        self.LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+        self.LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+        self.LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+        self.LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
 
+        # Ingest-time trajectory compression: store only the fixes needed to redraw each path within
+        # LOCATION_MAX_ERROR_M metres (0 stores every fix), and at least one every LOCATION_MAX_GAP_SECONDS
+        self.LOCATION_MAX_ERROR_M = float(os.getenv("LOCATION_MAX_ERROR_M", 25))
+        self.LOCATION_MAX_GAP_SECONDS = int(os.getenv("LOCATION_MAX_GAP_SECONDS", 300))
 
+        # Latest positions are kept in memory and written to TouristStatus every
+        # POSITION_FLUSH_SECONDS, POSITION_FLUSH_BATCH rows per statement
+        self.POSITION_FLUSH_SECONDS = float(os.getenv("POSITION_FLUSH_SECONDS", 2))
+        self.POSITION_FLUSH_BATCH = int(os.getenv("POSITION_FLUSH_BATCH", 500))
 
-    MAIL_SERVER = os.getenv("MAIL_SERVER")
-    MAIL_PORT = int(os.getenv("MAIL_PORT", 587))
-    MAIL_USE_TLS = True
-    MAIL_USE_SSL = False
-    MAIL_USERNAME = os.getenv("MAIL_USERNAME")
-    MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
-    MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER")
+        # LocationHistory retention (`flask location-retention`): full resolution for N days,
+        # then one fix per user per M minutes, archived to columnar files and deleted after
+        # LOCATION_ARCHIVE_AFTER_DAYS (0 = never); at most LOCATION_RETENTION_BATCH rows per transaction
+        self.LOCATION_FULL_RESOLUTION_DAYS = int(os.getenv("LOCATION_FULL_RESOLUTION_DAYS", 7))
+        self.LOCATION_DOWNSAMPLE_MINUTES = int(os.getenv("LOCATION_DOWNSAMPLE_MINUTES", 5))
+        self.LOCATION_ARCHIVE_AFTER_DAYS = int(os.getenv("LOCATION_ARCHIVE_AFTER_DAYS", 90))
+        self.LOCATION_ARCHIVE_DIR = os.getenv("LOCATION_ARCHIVE_DIR")  # default: <instance>/location_archive
+        self.LOCATION_RETENTION_BATCH = int(os.getenv("LOCATION_RETENTION_BATCH", 5000))
@@ -0,0 +1,88 @@
+# gunicorn.conf.py
+"""
+Gunicorn settings for wsgi:app. SERVE_PROFILE selects the worker model:
+
+  cpu      sync workers, 2 x cores + 1. Best when requests are short and
+           CPU-bound (dashboards, location pings).
+  threads  gthread workers, cores + 1 processes x THREADS_PER_WORKER
+           threads. Requests waiting on OpenRouter, OpenWeather or SMTP
+           only block a thread. Default.
+  io       gevent workers with WORKER_CONNECTIONS greenlets each. Needs
+           gevent; falls back to `threads` without it. With PostgreSQL,
+           also install psycogreen so database waits yield too.
+
+WEB_CONCURRENCY overrides the number of worker processes. The app is
+preloaded in the master before forking, and on SIGTERM workers stop
+accepting connections and get GRACEFUL_TIMEOUT seconds to finish
+in-flight requests and queued background jobs.
+
+Measured throughput per profile: benchmarks/bench_serving.py.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+profile = os.getenv('SERVE_PROFILE', 'threads')
+cores = multiprocessing.cpu_count()
+
+if profile == 'io':
+    try:
+        from gevent import monkey
+    except ImportError:
+        profile = 'threads'
+    else:
+        # Must happen before the app (and its sockets/locks) is preloaded
+        monkey.patch_all()
+
+bind = os.getenv('BIND', f"0.0.0.0:{os.getenv('PORT', '8000')}")
+preload_app = True
+graceful_timeout = int(os.getenv('GRACEFUL_TIMEOUT', 30))
+timeout = int(os.getenv('WORKER_TIMEOUT', 60))  # above the longest LLM budget
+keepalive = 5
+max_requests = int(os.getenv('MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+accesslog = os.getenv('ACCESS_LOG', '-') or None
+
+# Workers write metric snapshots here so /metrics can add them up
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), f'travelbuddy-metrics-{os.getpid()}'))
+
+if profile == 'cpu':
+    worker_class = 'sync'
+    workers = int(os.getenv('WEB_CONCURRENCY', cores * 2 + 1))
+elif profile == 'io':
+    worker_class = 'gevent'
+    workers = int(os.getenv('WEB_CONCURRENCY', cores))
+    worker_connections = int(os.getenv('WORKER_CONNECTIONS', 256))
+else:
+    worker_class = 'gthread'
+    workers = int(os.getenv('WEB_CONCURRENCY', cores + 1))
+    threads = int(os.getenv('THREADS_PER_WORKER', 8))
+
+
+def on_starting(server):
+    # Runs after the app is preloaded: start this server's metrics from zero
+    shutil.rmtree(os.environ['METRICS_DIR'], ignore_errors=True)
+    os.makedirs(os.environ['METRICS_DIR'])
+
+
+def on_exit(server):
+    shutil.rmtree(os.environ['METRICS_DIR'], ignore_errors=True)
+
+
+def when_ready(server):
+    server.log.info("TravelBuddy serving with profile=%s worker_class=%s workers=%s",
+                    profile, worker_class, workers)
+
+
+def post_fork(server, worker):
+    from app.serving import after_fork
+    from wsgi import app
+
+    after_fork(app)
+
+
+def worker_exit(server, worker):
+    from app.serving import drain
+
+    drain()
@@ -0,0 +1,27 @@
+"""baseline schema
+
+The tables as db.create_all() built them before migrations were added.
+`flask init-db` stamps existing unversioned databases at this revision.
+
+Revision ID: 0c5d2a9e41b7
+Revises: 
+Create Date: 2026-10-19 19:47:10.286412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c5d2a9e41b7'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    pass
+
+
+def downgrade():
+    pass
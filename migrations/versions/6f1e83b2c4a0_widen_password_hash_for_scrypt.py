@@ -0,0 +1,37 @@
+"""widen password_hash for scrypt
+
+scrypt hashes (app/passwords.py) are longer than 128 characters. SQLite
+does not enforce VARCHAR lengths, but batch mode rebuilds its tables so the
+declared type matches the models there too.
+
+Revision ID: 6f1e83b2c4a0
+Revises: 0c5d2a9e41b7
+Create Date: 2026-10-19 19:47:11.549876
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f1e83b2c4a0'
+down_revision = '0c5d2a9e41b7'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ('user', 'authority_user')
+
+
+def upgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('password_hash', existing_type=sa.String(length=128),
+                                  type_=sa.String(length=256), existing_nullable=True)
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('password_hash', existing_type=sa.String(length=256),
+                                  type_=sa.String(length=128), existing_nullable=True)
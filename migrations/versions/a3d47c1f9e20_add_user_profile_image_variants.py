@@ -0,0 +1,30 @@
+"""add user.profile_image_variants
+
+JSON map of resized profile picture variants (app/images.py). Databases
+that ran init-db before migrations were added may already have it.
+
+Revision ID: a3d47c1f9e20
+Revises: 6f1e83b2c4a0
+Create Date: 2026-10-19 19:50:50.160114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d47c1f9e20'
+down_revision = '6f1e83b2c4a0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('user')}
+    if 'profile_image_variants' not in columns:
+        op.add_column('user', sa.Column('profile_image_variants', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('profile_image_variants')
@@ -0,0 +1,30 @@
+"""index location_history user timestamp
+
+ix_location_history_user_timestamp on (user_id, timestamp), used by
+`flask location-retention` and per-tourist history queries. Databases that
+ran init-db before migrations were added may already have it.
+
+Revision ID: d81b6e5f2a93
+Revises: a3d47c1f9e20
+Create Date: 2026-10-19 19:59:44.205828
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd81b6e5f2a93'
+down_revision = 'a3d47c1f9e20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    indexes = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('location_history')}
+    if 'ix_location_history_user_timestamp' not in indexes:
+        op.create_index('ix_location_history_user_timestamp', 'location_history', ['user_id', 'timestamp'])
+
+
+def downgrade():
+    op.drop_index('ix_location_history_user_timestamp', table_name='location_history')
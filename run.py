@@ -1,9 +1,6 @@
 from app import create_app  # ✅ From __init__.py
-from app.extensions import db  # ✅ Only import db from extensions
 
 app = create_app()
 
 if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
     app.run(debug=True)
@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'benchmarks')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """
+    Returns a factory building an app on a scratch SQLite database in
+    tmp_path, with tables created. Keyword arguments are set as environment
+    variables before create_app() reads them.
+    """
+    from app.positions import positions
+    from app.trajectory import trajectory
+    from app.utils import llm_breaker
+
+    apps = []
+
+    def factory(**env):
+        settings = {
+            'DATABASE_URL': f"sqlite:///{tmp_path / 'test.db'}",
+            'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+            'LOG_LEVEL': 'ERROR',
+            'MAIL_SUPPRESS_SEND': '1',
+            'MAIL_USERNAME': 'tests@travelbuddy.local',
+            'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+            'POSITION_FLUSH_SECONDS': '3600',  # tests flush explicitly
+        }
+        settings.update(env)
+        for key, value in settings.items():
+            monkeypatch.setenv(key, str(value))
+
+        from app import create_app
+        from app.extensions import db
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+        apps.append(app)
+        return app
+
+    yield factory
+
+    from app.extensions import db
+
+    positions.clear()
+    trajectory.clear()
+    llm_breaker.reset()
+    for app in apps:
+        with app.app_context():
+            db.engine.dispose()
@@ -0,0 +1,53 @@
+"""
+build_assets: which build folders it refuses, and that a rebuild replaces
+the previous build without leaving staging folders behind.
+"""
+import json
+import os
+
+import pytest
+
+from app.assets import MANIFEST_NAME, AssetBuildError, build_assets
+
+
+@pytest.fixture
+def static_folder(tmp_path):
+    static = tmp_path / 'static'
+    (static / 'css').mkdir(parents=True)
+    (static / 'css' / 'site.css').write_text('body { color: #123; }\n' * 40)
+    (static / 'logo.png').write_bytes(b'\x89PNG\r\n\x1a\n' + bytes(64))
+    return static
+
+
+def test_rebuild_swaps_in_the_new_build(static_folder):
+    build_dir = static_folder / 'dist'
+    first = build_assets(str(static_folder), str(build_dir))
+    assert set(first) == {'css/site.css', 'logo.png'}
+
+    (static_folder / 'css' / 'site.css').write_text('body { color: #456; }\n' * 40)
+    second = build_assets(str(static_folder), str(build_dir))
+    assert second['css/site.css'] != first['css/site.css']
+    assert json.loads((build_dir / MANIFEST_NAME).read_text()) == second
+    assert not (build_dir / first['css/site.css']).exists()
+    assert sorted(os.listdir(static_folder)) == ['css', 'dist', 'logo.png']
+
+
+@pytest.mark.parametrize('build_dir', ['.', '..', '../..'])
+def test_refuses_a_build_dir_containing_the_static_folder(static_folder, build_dir):
+    with pytest.raises(AssetBuildError):
+        build_assets(str(static_folder), str(static_folder / build_dir))
+    assert (static_folder / 'logo.png').exists()
+
+
+def test_outside_the_static_folder_needs_allow_outside(static_folder, tmp_path):
+    with pytest.raises(AssetBuildError):
+        build_assets(str(static_folder), str(tmp_path / 'cdn'))
+    assert build_assets(str(static_folder), str(tmp_path / 'cdn'), allow_outside=True)
+
+
+def test_refuses_to_replace_a_folder_that_is_not_a_build(static_folder):
+    (static_folder / 'vendor').mkdir()
+    (static_folder / 'vendor' / 'lib.js').write_text('// keep me\n')
+    with pytest.raises(AssetBuildError):
+        build_assets(str(static_folder), str(static_folder / 'vendor'))
+    assert (static_folder / 'vendor' / 'lib.js').exists()
@@ -0,0 +1,93 @@
+"""
+The LLM circuit breaker against the local OpenRouter stub: call_llm_api with
+a short latency budget is driven through closed → open → half-open → closed.
+"""
+import time
+
+import pytest
+
+from stub_servers import StubBehaviour, parse_latency, start_stub_server
+
+BUDGET = 0.25
+OPEN_SECONDS = 0.5
+MIN_CALLS = 3
+DEGRADED = "AI unavailable: service is temporarily degraded"
+
+
+@pytest.fixture
+def llm_stub():
+    behaviour = StubBehaviour(latency='fixed:0')
+    server, base_url = start_stub_server('llm', behaviour=behaviour)
+    yield behaviour, base_url
+    server.shutdown()
+
+
+@pytest.fixture
+def app(make_app, llm_stub):
+    _, base_url = llm_stub
+    return make_app(
+        OPENROUTER_API_KEY='stub-key',
+        OPENROUTER_BASE_URL=base_url,
+        LLM_BREAKER_MIN_CALLS=MIN_CALLS,
+        LLM_BREAKER_WINDOW=MIN_CALLS * 2,
+        LLM_BREAKER_FAILURE_THRESHOLD=0.5,
+        LLM_BREAKER_OPEN_SECONDS=OPEN_SECONDS,
+        LLM_BREAKER_HALF_OPEN_CALLS=1,
+    )
+
+
+def call():
+    from app.utils import call_llm_api
+
+    started = time.perf_counter()
+    reply = call_llm_api("Give me a packing list", timeout=BUDGET)
+    return reply, time.perf_counter() - started
+
+
+def test_breaker_opens_on_slow_upstream_and_recovers(app, llm_stub):
+    from app.utils import llm_breaker
+
+    behaviour, _ = llm_stub
+    with app.app_context():
+        llm_breaker.reset()
+        for _ in range(MIN_CALLS):
+            reply, _ = call()
+            assert not reply.startswith('AI ')
+        assert llm_breaker.state == 'closed'
+
+        # Slower than the budget: calls are cut at the budget until the breaker opens
+        behaviour.sample_latency = parse_latency(f'fixed:{BUDGET * 4000}')
+        for _ in range(MIN_CALLS):
+            reply, elapsed = call()
+            assert reply.startswith('AI unavailable: no response')
+            assert elapsed < BUDGET + 0.5
+        assert llm_breaker.state == 'open'
+
+        # Open: rejected at once, without reaching the stub
+        reached = behaviour.requests
+        reply, elapsed = call()
+        assert reply.startswith(DEGRADED)
+        assert elapsed < BUDGET
+        assert behaviour.requests == reached
+
+        # Half-open: a slow probe re-opens it
+        time.sleep(OPEN_SECONDS)
+        assert llm_breaker.state == 'half_open'
+        call()
+        assert llm_breaker.state == 'open'
+
+        # Upstream fast again: the next probe closes it
+        behaviour.sample_latency = parse_latency('fixed:0')
+        time.sleep(OPEN_SECONDS)
+        assert llm_breaker.state == 'half_open'
+        reply, _ = call()
+        assert not reply.startswith('AI ')
+        assert llm_breaker.state == 'closed'
+        assert llm_breaker.snapshot()['times_opened'] == 2
+
+
+def test_llm_status_is_internal_only(app):
+    client = app.test_client()
+    assert client.get('/status/llm').status_code == 200
+    assert client.get('/status/llm', environ_base={'REMOTE_ADDR': '10.0.0.5'}).status_code == 403
+    assert client.get('/status/llm', headers={'X-Forwarded-For': '10.0.0.5'}).status_code == 403
@@ -0,0 +1,47 @@
+"""
+send_email and send_bulk_email log how many recipients a message had, never
+their addresses, including when the SMTP error quotes them.
+"""
+import logging
+import smtplib
+
+ADDRESS = 'tourist.contact@example.com'
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_addresses_are_not_logged(make_app, monkeypatch):
+    from app.extensions import mail
+    from app.utils import send_bulk_email, send_email
+
+    app = make_app()
+    handler = ListHandler()
+    logger = logging.getLogger('app.utils')
+    level = logger.level
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    try:
+        with app.app_context():
+            assert send_email("Trip created", [ADDRESS], "Body")
+            assert send_bulk_email([("Welcome", [ADDRESS], "Body")]) == 1
+
+            def refused(*args, **kwargs):
+                raise smtplib.SMTPRecipientsRefused({ADDRESS: (550, b'mailbox unavailable')})
+
+            monkeypatch.setattr(mail, 'send', refused)
+            assert not send_email("Trip created", [ADDRESS], "Body")
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(level)
+
+    logged = ' '.join(f"{record.getMessage()} {record.__dict__}" for record in handler.records)
+    assert [record.recipient_count for record in handler.records if hasattr(record, 'recipient_count')] == [1, 1]
+    assert 'SMTPRecipientsRefused' in logged
+    assert ADDRESS not in logged
@@ -0,0 +1,64 @@
+"""
+`flask init-db` on an empty database and on one created before migrations
+were added: both end at the latest Alembic revision.
+"""
+import os
+
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+
+from conftest import PROJECT_ROOT
+
+HEAD = ScriptDirectory(os.path.join(PROJECT_ROOT, 'migrations')).get_current_head()
+
+
+def init_db(app):
+    result = app.test_cli_runner().invoke(args=['init-db'])
+    assert result.exit_code == 0, result.output
+
+
+def version(app):
+    from app.extensions import db
+
+    with app.app_context():
+        return db.session.execute(text('SELECT version_num FROM alembic_version')).scalar()
+
+
+def test_empty_database_is_created_at_head(make_app):
+    from app.extensions import db
+
+    app = make_app()
+    with app.app_context():
+        db.drop_all()
+    init_db(app)
+    assert version(app) == HEAD
+    with app.app_context():
+        assert set(db.metadata.tables) <= set(inspect(db.engine).get_table_names())
+
+
+def test_database_from_create_all_is_upgraded(make_app):
+    app = make_app()  # already has every column the migrations add
+    init_db(app)
+    assert version(app) == HEAD
+
+
+def test_unversioned_database_is_stamped_and_upgraded(make_app):
+    from app.database import BASELINE_REVISION
+    from app.extensions import db
+
+    app = make_app()  # tables from db.create_all(), no alembic_version
+    with app.app_context(), db.engine.begin() as connection:
+        # As before user.profile_image_variants and the location history index were added
+        connection.execute(text('ALTER TABLE user DROP COLUMN profile_image_variants'))
+        connection.execute(text('DROP INDEX ix_location_history_user_timestamp'))
+    init_db(app)
+    with app.app_context():
+        inspector = inspect(db.engine)
+        assert 'profile_image_variants' in {c['name'] for c in inspector.get_columns('user')}
+        assert 'ix_location_history_user_timestamp' in {i['name'] for i in inspector.get_indexes('location_history')}
+    assert BASELINE_REVISION != HEAD
+    assert version(app) == HEAD
+    init_db(app)  # nothing pending: a no-op
+    assert version(app) == HEAD
+    check = app.test_cli_runner().invoke(args=['db', 'check'])
+    assert check.exit_code == 0, check.output  # the migrated schema matches the models
@@ -0,0 +1,66 @@
+"""
+Several workers sharing TouristStatus: each one's merge picks up positions
+the others flush, including a fix older than ones already merged and a row
+stamped before, but committed after, a newer one.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+import app.positions as positions_module
+from app.positions import LatestPositions
+
+T0 = datetime(2025, 3, 1, 9, 0, 0)
+
+
+class Clock(datetime):
+    """Stands in for datetime in app.positions, so flushes stamp updated_at with `now`."""
+    now = T0
+
+    @classmethod
+    def utcnow(cls):
+        return cls.now
+
+
+@pytest.fixture
+def workers(make_app, monkeypatch):
+    """(app, three user ids, three workers with their arrays loaded)."""
+    from load_test import seed
+    from app.models import User
+
+    monkeypatch.setattr(positions_module, 'datetime', Clock)
+    app = make_app()
+    emails, _ = seed(app, 3, 0)
+    with app.app_context():
+        user_ids = [User.query.filter_by(email=email).one().id for email in emails]
+        processes = [LatestPositions(flush_seconds=2) for _ in range(3)]
+        for worker in processes:
+            worker.flush()
+        yield app, user_ids, processes
+
+
+def test_merge_takes_an_older_fix_flushed_later(workers):
+    _, (first, second, _), (a, b, c) = workers
+    b.update(first, 26.10, 91.70, T0)
+    c.update(second, 26.20, 91.80, T0 + timedelta(seconds=5))
+    Clock.now = T0 + timedelta(seconds=6)
+    c.flush()
+    a.flush()
+    Clock.now = T0 + timedelta(seconds=7)
+    b.flush()  # older fix, flushed after a has merged the newer one
+    a.flush()
+    assert a.get(first) == (26.10, 91.70, T0)
+    assert a.get(second) == (26.20, 91.80, T0 + timedelta(seconds=5))
+
+
+def test_merge_takes_a_row_committed_after_a_newer_stamp(workers):
+    _, (first, second, _), (a, b, c) = workers
+    b.update(first, 26.10, 91.70, T0)
+    c.update(second, 26.20, 91.80, T0)
+    Clock.now = T0 + timedelta(seconds=3)
+    c.flush()
+    a.flush()
+    Clock.now = T0 + timedelta(seconds=2)  # b stamped its batch before c did, committed after a merged
+    b.flush()
+    a.flush()
+    assert a.get(first) == (26.10, 91.70, T0)
@@ -0,0 +1,86 @@
+"""
+Start-up budget for short-lived CLI and job processes: importing the app and
+calling create_app() in a fresh interpreter stays under STARTUP_BUDGET_MS
+(500 ms, best of 5 runs) and leaves the heavy optional modules unimported.
+A batch over budget is measured again, up to ATTEMPTS times, so a busy
+machine does not fail it. Reading the configuration must not import the
+app package at all.
+"""
+import os
+import subprocess
+import sys
+
+from conftest import PROJECT_ROOT
+
+BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', 500))
+RUNS = 5
+ATTEMPTS = 3
+LAZY_MODULES = ['requests', 'alembic', 'flask_migrate', 'PIL']
+
+CHILD = """
+import sys, time
+started = time.perf_counter()
+from app import create_app
+create_app()
+elapsed = time.perf_counter() - started
+print('ELAPSED_MS', round(elapsed * 1000, 1))
+print('LOADED', ' '.join(m for m in {lazy!r} if m in sys.modules))
+"""
+
+
+def run_child(code, env, importtime=False):
+    flags = ['-X', 'importtime'] if importtime else []
+    return subprocess.run([sys.executable, *flags, '-c', code], cwd=PROJECT_ROOT,
+                          env=env, capture_output=True, text=True, check=True)
+
+
+def run_once(env):
+    """(elapsed ms, lazy modules loaded)."""
+    elapsed_ms, loaded = None, []
+    for line in run_child(CHILD.format(lazy=LAZY_MODULES), env).stdout.splitlines():
+        if line.startswith('ELAPSED_MS'):
+            elapsed_ms = float(line.split()[1])
+        elif line.startswith('LOADED'):
+            loaded = line.split()[1:]
+    return elapsed_ms, loaded
+
+
+def slowest_imports(env, top=15):
+    """The slowest imports of one run, by self time (-X importtime slows the run, so it is not timed)."""
+    result = run_child(CHILD.format(lazy=LAZY_MODULES), env, importtime=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+        imports.append((int(self_us), int(cumulative_us), name.strip()))
+    return '\n'.join(f"  {self_us / 1000:7.1f} ms  {cumulative_us / 1000:7.1f} ms  {name}"
+                     for self_us, cumulative_us, name in sorted(imports, reverse=True)[:top])
+
+
+def child_env(tmp_path):
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f"sqlite:///{tmp_path / 'startup.db'}",
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+        'LOG_LEVEL': 'ERROR',
+    })
+    return env
+
+
+def test_create_app_within_budget_and_lazy(tmp_path):
+    env = child_env(tmp_path)
+    for _ in range(ATTEMPTS):
+        elapsed_ms, loaded = min((run_once(env) for _ in range(RUNS)), key=lambda run: run[0])
+        assert not loaded, f"imported at start-up but should be lazy: {', '.join(loaded)}"
+        if elapsed_ms <= BUDGET_MS:
+            break
+    else:
+        raise AssertionError(f"start-up took {elapsed_ms:.1f} ms, budget is {BUDGET_MS:.0f} ms\n"
+                             f"Slowest imports (self, cumulative):\n{slowest_imports(env)}")
+
+
+def test_config_does_not_import_the_app(tmp_path):
+    code = "import sys, config; config.Config(); print(sorted(m for m in sys.modules if m.split('.')[0] == 'app'))"
+    assert run_child(code, child_env(tmp_path)).stdout.strip() == '[]'
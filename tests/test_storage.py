@@ -0,0 +1,114 @@
+"""
+Content-addressed document storage: which uploads stream into the hashing
+spool file, how their type is decided, how they are served and when
+`flask gc-documents` deletes a blob.
+"""
+import io
+import os
+import time
+
+import pytest
+from flask import request
+
+from app.storage import HashingSpoolFile
+
+PDF = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n1 0 obj\n<<>>\nendobj\ntrailer\n<<>>\n%%EOF\n'
+SVG = b'<svg xmlns="http://www.w3.org/2000/svg"><script>alert(document.cookie)</script></svg>'
+
+
+@pytest.fixture
+def tourist(make_app):
+    """(app, logged-in test client, trip id)."""
+    from load_test import InProcessClient, login, seed
+    from app.extensions import db
+    from app.models import Trip, User
+
+    app = make_app()
+    emails, _ = seed(app, 1, 0)
+    client = login(InProcessClient(app), emails[0]).client
+    with app.app_context():
+        user = User.query.filter_by(email=emails[0]).one()
+        trip = Trip(title='Hills', destination='Shillong', start_date='2025-03-01',
+                    end_date='2025-03-03', user_id=user.id)
+        db.session.add(trip)
+        db.session.commit()
+        return app, client, trip.id
+
+
+def upload(client, trip_id, data, filename, content_type):
+    return client.post(f'/trip_notes/save/{trip_id}', content_type='multipart/form-data',
+                       data={'notes': '', 'doc': (io.BytesIO(data), filename, content_type)})
+
+
+def documents(app, trip_id):
+    from app.models import TripDocument
+
+    with app.app_context():
+        return [(d.id, d.original_name, d.content_type)
+                for d in TripDocument.query.filter_by(trip_id=trip_id).order_by(TripDocument.id)]
+
+
+def is_spooled(app, path, field):
+    data = {field: (io.BytesIO(PDF), 'ticket.pdf')}
+    with app.test_request_context(path, method='POST', data=data, content_type='multipart/form-data'):
+        upload = request.files[field]
+        try:
+            return isinstance(upload.stream, HashingSpoolFile)
+        finally:
+            upload.close()
+
+
+def test_only_document_uploads_are_spooled(make_app):
+    app = make_app()
+    assert is_spooled(app, '/trip_notes/save/1', 'doc')
+    assert not is_spooled(app, '/profile', 'profile_image')
+
+
+def test_document_type_comes_from_the_bytes(tourist):
+    app, client, trip_id = tourist
+    upload(client, trip_id, SVG, 'map.png', 'image/png')
+    upload(client, trip_id, PDF, 'ticket.svg', 'image/svg+xml')
+    assert [(name, content_type) for _, name, content_type in documents(app, trip_id)] == [
+        ('ticket.svg', 'application/pdf'),
+    ]
+
+
+def test_documents_are_served_as_attachments(tourist):
+    app, client, trip_id = tourist
+    upload(client, trip_id, PDF, 'ticket.pdf', 'application/pdf')
+    [(document_id, _, _)] = documents(app, trip_id)
+    response = client.get(f'/trip_notes/{trip_id}/documents/{document_id}')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/pdf'
+    assert response.headers['Content-Disposition'].startswith('attachment')
+    assert response.data == PDF
+
+
+def test_gc_deletes_only_old_unreferenced_blobs(tourist):
+    from app.extensions import db
+    from app.models import TripDocument
+    from app.storage import blob_path
+
+    app, client, trip_id = tourist
+    upload(client, trip_id, PDF, 'ticket.pdf', 'application/pdf')
+    upload(client, trip_id, PDF + b'% visa\n', 'visa.pdf', 'application/pdf')
+    with app.app_context():
+        kept, dropped = TripDocument.query.filter_by(trip_id=trip_id).order_by(TripDocument.id).all()
+        kept_path, dropped_path = blob_path(kept.sha256), blob_path(dropped.sha256)
+        db.session.delete(dropped)
+        db.session.commit()
+    day_ago = time.time() - 86400 - 60
+    for path in (kept_path, dropped_path):
+        os.utime(path, (day_ago, day_ago))
+
+    runner = app.test_cli_runner()
+    assert runner.invoke(args=['gc-documents', '--dry-run']).exit_code == 0
+    assert os.path.exists(dropped_path)
+    result = runner.invoke(args=['gc-documents'])
+    assert '"deleted": 1' in result.output
+    assert os.path.exists(kept_path) and not os.path.exists(dropped_path)
+
+    # Storing content that is already on disk refreshes the blob's mtime
+    os.utime(kept_path, (day_ago, day_ago))
+    upload(client, trip_id, PDF, 'ticket-again.pdf', 'application/pdf')
+    assert os.path.getmtime(kept_path) > day_ago + 60
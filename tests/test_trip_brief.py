@@ -0,0 +1,92 @@
+"""
+get_trip_brief against the local OpenRouter stub: concurrent views of a trip
+share one LLM call, and a trip edit generates a new brief.
+"""
+import threading
+
+import pytest
+
+from stub_servers import StubBehaviour, start_stub_server
+
+VIEWERS = 6
+
+
+@pytest.fixture
+def llm_stub():
+    behaviour = StubBehaviour(latency='fixed:200')
+    server, base_url = start_stub_server('llm', behaviour=behaviour)
+    yield behaviour, base_url
+    server.shutdown()
+
+
+@pytest.fixture
+def app(make_app, llm_stub):
+    _, base_url = llm_stub
+    return make_app(OPENROUTER_API_KEY='stub-key', OPENROUTER_BASE_URL=base_url)
+
+
+@pytest.fixture
+def trip_id(app):
+    from app.extensions import db
+    from app.models import Trip, User
+
+    with app.app_context():
+        user = User(name='Brief Tester', email='brief@travelbuddy.local')
+        db.session.add(user)
+        db.session.flush()
+        trip = Trip(title='Hills', destination='Shillong', start_date='2025-03-01',
+                    end_date='2025-03-03', user_id=user.id)
+        db.session.add(trip)
+        db.session.commit()
+        return trip.id
+
+
+def view(app, trip_id):
+    from app.extensions import db
+    from app.models import Trip
+    from app.trip_brief import get_trip_brief
+
+    with app.app_context():
+        return get_trip_brief(db.session.get(Trip, trip_id))
+
+
+def test_concurrent_views_share_one_llm_call(app, llm_stub, trip_id):
+    behaviour, _ = llm_stub
+    start = threading.Barrier(VIEWERS)
+    results = [None] * VIEWERS
+
+    def viewer(i):
+        start.wait()
+        results[i] = view(app, trip_id)
+
+    threads = [threading.Thread(target=viewer, args=(i,)) for i in range(VIEWERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert behaviour.requests == 1
+    briefs = [brief for brief, error in results]
+    assert all(error is None for _, error in results)
+    assert briefs[0]['packing'] and all(brief == briefs[0] for brief in briefs)
+
+    from app.trip_brief import _generating
+    assert not _generating
+
+
+def test_trip_edit_regenerates_the_brief(app, llm_stub, trip_id):
+    from app.extensions import db
+    from app.models import Trip, TripBrief
+
+    behaviour, _ = llm_stub
+    assert view(app, trip_id)[1] is None
+    assert view(app, trip_id)[1] is None
+    assert behaviour.requests == 1
+
+    with app.app_context():
+        db.session.get(Trip, trip_id).end_date = '2025-03-05'
+        db.session.commit()
+    assert view(app, trip_id)[1] is None
+    assert behaviour.requests == 2
+    with app.app_context():
+        assert TripBrief.query.filter_by(trip_id=trip_id).count() == 1
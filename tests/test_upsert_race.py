@@ -0,0 +1,107 @@
+"""
+The panic button's status write (mark_emergency) for a tourist without a
+TouristStatus row, from two sessions at once. Both are held just before
+their first write to tourist_status until the other one gets there, so any
+read-then-insert sees no row in both. The same interleaving makes the
+query-then-insert that mark_emergency replaced fail, which shows the
+harness reproduces the race.
+"""
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete, event, select
+
+
+def query_then_insert(user_id, latitude, longitude, now):
+    """The read-then-write that mark_emergency replaced."""
+    from app.extensions import db
+    from app.models import TouristStatus
+
+    status = TouristStatus.query.filter_by(user_id=user_id).first()
+    if status is None:
+        status = TouristStatus(user_id=user_id)
+        db.session.add(status)
+    status.current_status = 'emergency'
+    status.priority_level = 'critical'
+    status.last_seen_latitude, status.last_seen_longitude = latitude, longitude
+    status.status_changed_at = status.updated_at = now
+    db.session.flush()
+
+
+def race(app, write, user_id):
+    """
+    Runs write(user_id, ...) and commits from two sessions at once, each held
+    before its first INSERT/UPDATE of tourist_status until the other one
+    gets there. Returns (errors, statuses) for the user afterwards.
+    """
+    from load_test import CENTRE
+    from app.extensions import db
+    from app.models import TouristStatus
+
+    with app.app_context():
+        db.session.execute(delete(TouristStatus).where(TouristStatus.user_id == user_id))
+        db.session.commit()
+        engine = db.engine
+
+    barrier = threading.Barrier(2, timeout=5)
+
+    def hold(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('INSERT', 'UPDATE')) and 'tourist_status' in statement:
+            try:
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                pass  # the other session failed before writing
+
+    errors = []
+
+    def session():
+        with app.app_context():
+            try:
+                write(user_id, CENTRE[0], CENTRE[1], datetime.utcnow())
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                barrier.abort()
+                errors.append(e.__class__.__name__)
+
+    event.listen(engine, 'before_cursor_execute', hold)
+    try:
+        threads = [threading.Thread(target=session) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        event.remove(engine, 'before_cursor_execute', hold)
+
+    with app.app_context():
+        statuses = list(db.session.scalars(select(TouristStatus.current_status)
+                                           .where(TouristStatus.user_id == user_id)))
+    return errors, statuses
+
+
+@pytest.fixture
+def tourist(make_app):
+    """(app, id of a tourist whose TouristStatus row each race deletes first)."""
+    from load_test import seed
+    from app.models import User
+
+    app = make_app()
+    emails, _ = seed(app, 1, 0)
+    with app.app_context():
+        return app, User.query.filter_by(email=emails[0]).one().id
+
+
+def test_mark_emergency_wins_the_race(tourist):
+    from app.routes.safety import mark_emergency
+
+    app, user_id = tourist
+    assert race(app, mark_emergency, user_id) == ([], ['emergency'])
+
+
+def test_query_then_insert_loses_the_race(tourist):
+    app, user_id = tourist
+    errors, statuses = race(app, query_then_insert, user_id)
+    assert errors, "the harness did not reproduce the race"
+    assert statuses == ['emergency']
@@ -0,0 +1,40 @@
+"""
+WeatherCache when its SQLite file cannot be read or written: lookups fall
+through to fetch() and are counted as errors instead of failing.
+"""
+import sqlite3
+
+from app.weather_cache import STATUS_OK, WeatherCache
+
+PAYLOAD = {'main': {'temp': 21.5}, 'weather': [{'description': 'light rain'}]}
+
+
+def fetch():
+    return STATUS_OK, PAYLOAD
+
+
+def test_unreadable_cache_is_a_miss(tmp_path):
+    cache = WeatherCache(path=str(tmp_path))  # a directory: sqlite cannot open it
+    assert cache.get_or_fetch('shillong|metric', fetch) == PAYLOAD
+    stats = cache.snapshot()
+    assert stats['misses'] == 1
+    assert stats['errors'] == 2  # the read and the write
+
+
+def test_failed_cache_write_still_returns_the_payload(tmp_path, monkeypatch):
+    cache = WeatherCache(path=str(tmp_path / 'weather.sqlite'))
+
+    def locked(*args, **kwargs):
+        raise sqlite3.OperationalError('database is locked')
+
+    monkeypatch.setattr(cache, 'set', locked)
+    assert cache.refresh('shillong|metric', fetch) == PAYLOAD
+    assert cache.snapshot()['errors'] == 1
+    assert cache.get('shillong|metric') is None
+
+
+def test_weather_status_is_internal_only(make_app):
+    client = make_app().test_client()
+    assert client.get('/status/weather').status_code == 200
+    assert client.get('/status/weather', environ_base={'REMOTE_ADDR': '10.0.0.5'}).status_code == 403
+    assert client.get('/status/weather', headers={'X-Forwarded-For': '10.0.0.5'}).status_code == 403
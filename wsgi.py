@@ -0,0 +1,12 @@
+# wsgi.py
+"""
+Production WSGI entry point:
+
+    gunicorn -c gunicorn.conf.py wsgi:app      (or: flask serve)
+
+Unlike run.py it does not start the debugger. Run `flask init-db` when
+setting up a new database and after upgrades.
+"""
+from app import create_app
+
+app = create_app()